@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, List, Optional, Tuple
+from scrapy.crawler import CrawlerProcess
+from rolba import shops
+from rolba.log import StandardOutputLogger
+from rolba.shops import ShopDefinition
+from rolba.record import VinylRecordFactory, VinylRecordDictMapper
+from rolba.diff import RecordsChangeSet, VinylRecordsCollectionsDiffer
+from rolba.extraction import ShopRecordsExtractor, LxmlListingPageParser
+from rolba.notification import RecordsCollectionsNotifier
+from rolba.repository import JsonFileRecordsRepository
+from rolba.worker import WebSpiderExtractionsProcessor
+from tests.shop_server import ShopServer
+
+
+SHOP_DEFINITIONS = [shops.VINYL_EMPIRE, shops.BLACK_VINYL_BAZAR, shops.VINYL_BAZAR, shops.LP_BAZAR]
+
+CRAWLER_SETTINGS = {"LOG_LEVEL": "ERROR"}
+
+
+class AddedRecordsCounter(RecordsCollectionsNotifier):
+
+    def __init__(self):
+        self.added_records_count = 0
+
+    def send_notification(self, records_changesets: List[Tuple[str, RecordsChangeSet]]):
+        self.added_records_count = sum(len(changeset.get_added()) for (_, changeset) in records_changesets)
+
+
+def get_peak_memory() -> float:
+    """
+    :return: peak resident memory of the process and its children in MB
+    """
+    return max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    ) / 1024
+
+
+def benchmark_extractor(shop_definition: ShopDefinition) -> Tuple[float, int, float]:
+    """
+    :return: wall time, count of the extracted records and peak memory
+    """
+    crawler_process = CrawlerProcess(CRAWLER_SETTINGS)
+    extractor = ShopRecordsExtractor(crawler_process, shop_definition, page_parser=LxmlListingPageParser())
+    extractor.schedule_extraction()
+    start_time = time.perf_counter()
+    crawler_process.start()
+    return time.perf_counter() - start_time, len(extractor.get_records()), get_peak_memory()
+
+
+def benchmark_processor(shop_definitions: [ShopDefinition], processes_count: Optional[int]) \
+        -> Tuple[float, int, float]:
+    """
+    :return: wall time, count of the extracted records and peak memory
+    """
+    crawler_process = CrawlerProcess(CRAWLER_SETTINGS)
+    storage_dir_path = tempfile.mkdtemp()
+    added_records_counter = AddedRecordsCounter()
+    processor = WebSpiderExtractionsProcessor(
+        crawler_process=crawler_process,
+        records_collections_notifier=added_records_counter,
+        records_collections_differ=VinylRecordsCollectionsDiffer(),
+        processes_count=processes_count,
+        logger=StandardOutputLogger()
+    )
+    for (i, shop_definition) in enumerate(shop_definitions):
+        processor.register_extraction(
+            title=shop_definition.name,
+            extractor=ShopRecordsExtractor(crawler_process, shop_definition, page_parser=LxmlListingPageParser()),
+            repository=JsonFileRecordsRepository(
+                file_path=f"{storage_dir_path}/{i}_records.json",
+                record_factory=VinylRecordFactory(),
+                record_dict_mapper=VinylRecordDictMapper()
+            )
+        )
+    start_time = time.perf_counter()
+    try:
+        processor.run()
+    finally:
+        shutil.rmtree(storage_dir_path)
+    return time.perf_counter() - start_time, added_records_counter.added_records_count, get_peak_memory()
+
+
+def run_case_process(connection: Connection, function: Callable, args: tuple):
+    connection.send(function(*args))
+    connection.close()
+
+
+def run_case(shop_server: ShopServer, function: Callable, *args) -> Dict[str, float]:
+    """
+    Runs the benchmark case in its own forked process, the crawler process can't be started twice.
+    """
+    served_pages_count = sum(shop_server.get_served_pages_counts().values())
+    context = multiprocessing.get_context("fork")
+    receiving_connection, sending_connection = context.Pipe(duplex=False)
+    process = context.Process(target=run_case_process, args=(sending_connection, function, args))
+    process.start()
+    sending_connection.close()
+    wall_time, items_count, peak_memory = receiving_connection.recv()
+    process.join()
+    pages_count = sum(shop_server.get_served_pages_counts().values()) - served_pages_count
+    return {
+        "wall_time": wall_time,
+        "pages": pages_count,
+        "pages_per_second": pages_count / wall_time,
+        "items": items_count,
+        "items_per_second": items_count / wall_time,
+        "peak_memory": peak_memory
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the extractions against the local stand-in shops server."
+    )
+    parser.add_argument("--pages", type=int, default=20, help="Count of the listing pages of each shop category")
+    parser.add_argument("--products", type=int, default=60, help="Count of the products of each listing page")
+    parser.add_argument("--latency", type=float, default=0.05, help="Delay of each response in seconds")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count(),
+        help="Count of the processes of the sharded extractions run"
+    )
+    parser.add_argument("--output", help="JSON file the results are written to")
+    arguments = parser.parse_args()
+
+    logger = StandardOutputLogger()
+    results = {}
+    with ShopServer(arguments.pages, arguments.products, arguments.latency) as shop_server:
+        local_shop_definitions = [shop_server.get_shop_definition(definition) for definition in SHOP_DEFINITIONS]
+        cases = [
+            (definition.name, benchmark_extractor, definition) for definition in local_shop_definitions
+        ] + [
+            ("Extractions processor", benchmark_processor, local_shop_definitions, None),
+            (
+                f"Extractions processor ({arguments.processes} processes)",
+                benchmark_processor,
+                local_shop_definitions,
+                arguments.processes
+            )
+        ]
+        for (name, function, *args) in cases:
+            results[name] = run_case(shop_server, function, *args)
+            logger.info(
+                f"{name}: {results[name]['wall_time']:.2f} s, "
+                f"{results[name]['pages']} pages ({results[name]['pages_per_second']:.1f}/s), "
+                f"{results[name]['items']} items ({results[name]['items_per_second']:.1f}/s), "
+                f"{results[name]['peak_memory']:.1f} MB peak memory"
+            )
+
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump(results, f, indent=4)
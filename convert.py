@@ -0,0 +1,65 @@
+import os
+import glob
+import argparse
+from rolba.log import StandardOutputLogger
+from rolba.record import VinylRecordFactory, VinylRecordDictMapper, RecordFactoryException
+from rolba.repository import JsonFileRecordsRepository, BinaryFileRecordsRepository, RecordsRepositoryException
+from rolba.conversion import RecordsRepositoryConverter
+
+
+logger = StandardOutputLogger()
+
+current_dir_path = os.path.dirname(os.path.abspath(__file__))
+storage_dir_path = current_dir_path + "/storage"
+
+formats = {
+    "json": (".json", JsonFileRecordsRepository),
+    "binary": (".bin", BinaryFileRecordsRepository)
+}
+
+parser = argparse.ArgumentParser(description="Converts the records repository files between the formats.")
+parser.add_argument("source_format", choices=formats.keys())
+parser.add_argument("target_format", choices=formats.keys())
+parser.add_argument(
+    "files",
+    nargs="*",
+    help="Files to convert, all the storage files of the source format by default"
+)
+parser.add_argument("--remove-source", action="store_true", help="Removes the converted source files")
+arguments = parser.parse_args()
+if arguments.source_format == arguments.target_format:
+    parser.error("source and target formats must differ")
+
+source_extension, source_repository_class = formats[arguments.source_format]
+target_extension, target_repository_class = formats[arguments.target_format]
+
+exit_code = 0
+for source_file_path in arguments.files or sorted(glob.glob(storage_dir_path + "/*" + source_extension)):
+    target_file_path = os.path.splitext(source_file_path)[0] + target_extension
+    if os.path.abspath(source_file_path) == os.path.abspath(target_file_path):
+        # The file would be overwritten by its conversion (and removed with the source)
+        logger.error(f"{source_file_path}: the file already has the target extension")
+        exit_code = 1
+        continue
+    try:
+        records_count = RecordsRepositoryConverter(
+            source_repository=source_repository_class(
+                file_path=source_file_path,
+                record_factory=VinylRecordFactory(),
+                record_dict_mapper=VinylRecordDictMapper()
+            ),
+            target_repository=target_repository_class(
+                file_path=target_file_path,
+                record_factory=VinylRecordFactory(),
+                record_dict_mapper=VinylRecordDictMapper()
+            )
+        ).convert()
+    except (RecordsRepositoryException, RecordFactoryException) as e:
+        logger.error(f"{source_file_path}: {e}")
+        exit_code = 1
+        continue
+    if arguments.remove_source:
+        os.remove(source_file_path)
+    logger.info(f"{source_file_path} -> {target_file_path} ({records_count} records)")
+
+exit(exit_code)
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterator, Optional, Set
+from rolba.repository import open_atomically
+
+
+class CrawlCheckpoint(ABC):
+    """
+    State of the unfinished crawl, so the crawl interrupted by the process restart continues where it stopped:
+    the pending requests, the fingerprints of the finished ones and the records read so far.
+    """
+
+    @abstractmethod
+    def is_saved(self) -> bool:
+        """
+        :return: whether there is a saved state of the interrupted crawl to continue
+        """
+        pass
+
+    @abstractmethod
+    def get_records(self) -> Iterator[dict]:
+        """
+        :return: records read before the interruption
+        """
+        pass
+
+    @abstractmethod
+    def get_pending_requests(self) -> [dict]:
+        pass
+
+    @abstractmethod
+    def get_spider_state(self) -> dict:
+        pass
+
+    @abstractmethod
+    def is_finished_request(self, fingerprint: str) -> bool:
+        pass
+
+    @abstractmethod
+    def add_record(self, record: dict):
+        pass
+
+    @abstractmethod
+    def add_pending_request(self, fingerprint: str, request: dict):
+        pass
+
+    @abstractmethod
+    def finish_request(self, fingerprint: str):
+        pass
+
+    @abstractmethod
+    def save(self, spider_state: dict, force: bool = False):
+        """
+        :param force: the state is saved even if the last save is more recent than the save interval
+        """
+        pass
+
+    @abstractmethod
+    def close(self, spider_state: dict):
+        """
+        Saves the state of the interrupted crawl.
+        """
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """
+        Removes the state of the finished crawl.
+        """
+        pass
+
+
+class JsonFileCrawlCheckpoint(CrawlCheckpoint):
+    """
+    Keeps the requests in the JSON file, which is replaced atomically, and appends the records to the JSON lines file.
+    The state file holds the size of the records file at the time of the save, the records appended after it
+    are dropped on the load, so the records always match the requests.
+    """
+
+    STATE_FILE_NAME = "state.json"
+    RECORDS_FILE_NAME = "records.jsonl"
+
+    def __init__(self, dir_path: str, save_interval: float = 10.0):
+        """
+        :param save_interval: minimal seconds between the saves of the state
+        """
+        self.state_file_path = dir_path + "/" + self.STATE_FILE_NAME
+        self.records_file_path = dir_path + "/" + self.RECORDS_FILE_NAME
+        self.save_interval = save_interval
+        self.pending_requests: Dict[str, dict] = {}
+        self.finished_fingerprints: Set[str] = set()
+        self.spider_state: dict = {}
+        self.records_size = 0
+        self.records_file: Optional[BinaryIO] = None
+        self.last_save_time = time.monotonic()
+        self.saved = os.path.isfile(self.state_file_path)
+        if self.saved:
+            try:
+                with open(self.state_file_path) as f:
+                    state = json.load(f)
+                self.pending_requests = state["pending_requests"]
+                self.finished_fingerprints = set(state["finished_fingerprints"])
+                self.spider_state = state["spider_state"]
+                self.records_size = state["records_size"]
+                # Dropping the records appended after the last save
+                with open(self.records_file_path, "r+b") as f:
+                    f.truncate(self.records_size)
+            except (json.JSONDecodeError, KeyError, TypeError, OSError):
+                raise InvalidCheckpointError(dir_path)
+        else:
+            os.makedirs(dir_path, exist_ok=True)
+            if os.path.isfile(self.records_file_path):
+                os.remove(self.records_file_path)
+
+    def is_saved(self) -> bool:
+        return self.saved
+
+    def get_records(self) -> Iterator[dict]:
+        if not self.saved:
+            return
+        with open(self.records_file_path, "rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def get_pending_requests(self) -> [dict]:
+        return list(self.pending_requests.values())
+
+    def get_spider_state(self) -> dict:
+        return self.spider_state
+
+    def is_finished_request(self, fingerprint: str) -> bool:
+        return fingerprint in self.finished_fingerprints
+
+    def add_record(self, record: dict):
+        if not self.records_file:
+            self.records_file = open(self.records_file_path, "ab")
+        self.records_file.write(json.dumps(record).encode() + b"\n")
+
+    def add_pending_request(self, fingerprint: str, request: dict):
+        self.pending_requests[fingerprint] = request
+
+    def finish_request(self, fingerprint: str):
+        self.pending_requests.pop(fingerprint, None)
+        self.finished_fingerprints.add(fingerprint)
+
+    def save(self, spider_state: dict, force: bool = False):
+        if not force and time.monotonic() - self.last_save_time < self.save_interval:
+            return
+        if self.records_file:
+            self.records_file.flush()
+            os.fsync(self.records_file.fileno())
+            self.records_size = self.records_file.tell()
+        elif not os.path.isfile(self.records_file_path):
+            open(self.records_file_path, "wb").close()
+        with open_atomically(self.state_file_path, "w") as f:
+            json.dump({
+                "pending_requests": self.pending_requests,
+                "finished_fingerprints": list(self.finished_fingerprints),
+                "spider_state": spider_state,
+                "records_size": self.records_size
+            }, f)
+        self.last_save_time = time.monotonic()
+        self.saved = True
+
+    def close(self, spider_state: dict):
+        self.save(spider_state, force=True)
+        self._close_records_file()
+
+    def clear(self):
+        self._close_records_file()
+        for file_path in [self.state_file_path, self.records_file_path]:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+        self.pending_requests = {}
+        self.finished_fingerprints = set()
+        self.spider_state = {}
+        self.records_size = 0
+        self.saved = False
+
+    def _close_records_file(self):
+        if self.records_file:
+            self.records_file.close()
+            self.records_file = None
+
+
+class CheckpointException(Exception):
+    pass
+
+
+class InvalidCheckpointError(CheckpointException):
+
+    def __init__(self, dir_path: str):
+        self.dir_path = dir_path
+
+    def __str__(self) -> str:
+        return f"Crawl checkpoint ({self.dir_path}) content is not valid"
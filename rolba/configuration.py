@@ -1,5 +1,7 @@
 import json
 import jsonschema
+from typing import Dict, List, Optional, Tuple
+from rolba.schema import create_json_schema_validator
 
 
 class Configuration:
@@ -21,6 +23,52 @@ class Configuration:
             "subscribers": {
                 "type": "array",
                 "item": {"type": "string"}
+            },
+            "crawl_profiles": {
+                "type": "object",
+                "additionalProperties": {
+                    "type": "object",
+                    "properties": {
+                        "concurrent_requests_per_domain": {"type": "integer", "minimum": 1},
+                        "download_delay": {"type": "number", "minimum": 0},
+                        "autothrottle": {"type": "boolean"},
+                        "autothrottle_target_concurrency": {"type": "number", "exclusiveMinimum": 0},
+                        "autothrottle_max_delay": {"type": "number", "minimum": 0},
+                        "download_timeout": {"type": "number", "exclusiveMinimum": 0},
+                        "http2": {"type": "boolean"},
+                        "keep_alive": {"type": "boolean"},
+                        "dns_cache_size": {"type": "integer", "minimum": 0},
+                        "dns_timeout": {"type": "number", "exclusiveMinimum": 0},
+                        "crawl_timeout": {"type": "number", "minimum": 0}
+                    },
+                    "additionalProperties": False
+                }
+            },
+            "polling": {
+                "type": "object",
+                "properties": {
+                    "min_interval": {"type": "number", "minimum": 0},
+                    "max_interval": {"type": "number", "minimum": 0}
+                },
+                "required": [
+                    "min_interval", "max_interval"
+                ],
+                "additionalProperties": False
+            },
+            "watchlists": {
+                "type": "object",
+                "additionalProperties": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "keyword": {"type": "string", "minLength": 1},
+                            "max_price": {"type": "number", "minimum": 0}
+                        },
+                        "required": ["keyword"],
+                        "additionalProperties": False
+                    }
+                }
             }
         },
         "required": [
@@ -29,11 +77,15 @@ class Configuration:
         ]
     }
 
+    VALIDATOR = create_json_schema_validator(JSON_SCHEMA)
+
+    DEFAULT_CRAWL_PROFILE = "default"
+
     def __init__(self, config_file_path: str):
         try:
             with open(config_file_path) as config_file:
                 self.config = json.load(config_file)
-            jsonschema.validate(self.config, self.JSON_SCHEMA)
+            self.VALIDATOR.validate(self.config)
         except FileNotFoundError:
             raise ConfigurationFileNotFound(config_file_path)
         except json.JSONDecodeError:
@@ -53,6 +105,31 @@ class Configuration:
     def get_subscribers(self) -> [str]:
         return self.config["subscribers"]
 
+    def get_crawl_profile(self, title: str = DEFAULT_CRAWL_PROFILE) -> dict:
+        """
+        :return: values of the crawl profile of the extraction, completed with the values of the default one
+        """
+        crawl_profiles = self.config.get("crawl_profiles", {})
+        return {**crawl_profiles.get(self.DEFAULT_CRAWL_PROFILE, {}), **crawl_profiles.get(title, {})}
+
+    def get_polling_intervals(self) -> Optional[Tuple[float, float]]:
+        """
+        :return: min and max seconds between the polls of the extraction, None if the adaptive polling is disabled
+        """
+        if "polling" not in self.config:
+            return None
+        return self.config["polling"]["min_interval"], self.config["polling"]["max_interval"]
+
+    def get_watchlists(self) -> Dict[str, List[Tuple[str, Optional[float]]]]:
+        """
+        :return: keywords and price ceilings (None for any price) by the subscribers emails, the subscribers
+                 without the watchlist are notified of all the changes
+        """
+        return {
+            email: [(watch["keyword"], watch.get("max_price")) for watch in watchlist]
+            for email, watchlist in self.config.get("watchlists", {}).items()
+        }
+
 
 class ConfigurationException(Exception):
     pass
@@ -0,0 +1,18 @@
+from rolba.repository import RecordsRepository
+
+
+class RecordsRepositoryConverter:
+
+    def __init__(self, source_repository: RecordsRepository, target_repository: RecordsRepository):
+        self.source_repository = source_repository
+        self.target_repository = target_repository
+
+    def convert(self) -> int:
+        """
+        :returns: the number of converted records
+        :raises RecordsRepositoryException: if the source repository can't be loaded
+        :raises RecordFactoryException: if the record creation fails
+        """
+        records = self.source_repository.load_records()
+        self.target_repository.save_records(records)
+        return len(records)
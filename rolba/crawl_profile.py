@@ -0,0 +1,95 @@
+import importlib.util
+from scrapy.settings import default_settings
+
+
+class CrawlProfile:
+    """
+    Crawl settings of the shop, so each shop runs at the highest rate it allows.
+    The DNS settings take effect for the whole crawler process, they are taken from the profile
+    the process is created with.
+    """
+
+    HTTP2_DOWNLOAD_HANDLER = "scrapy.core.downloader.handlers.http2.H2DownloadHandler"
+
+    def __init__(
+            self,
+            concurrent_requests_per_domain: int = 8,
+            download_delay: float = 0.0,
+            autothrottle: bool = False,
+            autothrottle_target_concurrency: float = 1.0,
+            autothrottle_max_delay: float = 60.0,
+            download_timeout: float = 180.0,
+            http2: bool = False,
+            keep_alive: bool = True,
+            dns_cache_size: int = 10000,
+            dns_timeout: float = 60.0,
+            crawl_timeout: float = 0.0
+    ):
+        """
+        :param autothrottle_target_concurrency: average count of the concurrent requests AutoThrottle aims at
+        :param http2: HTTPS requests are sent over HTTP/2, requires the h2 package
+        :param keep_alive: connections to the shop are kept open and reused
+        :param dns_cache_size: count of the cached DNS records, 0 disables the cache
+        :param crawl_timeout: seconds the crawl may take, it is closed as incomplete after them, 0 for no limit
+        :raises Http2NotAvailableError:
+        """
+        if http2 and importlib.util.find_spec("h2") is None:
+            raise Http2NotAvailableError
+        self.concurrent_requests_per_domain = concurrent_requests_per_domain
+        self.download_delay = download_delay
+        self.autothrottle = autothrottle
+        self.autothrottle_target_concurrency = autothrottle_target_concurrency
+        self.autothrottle_max_delay = autothrottle_max_delay
+        self.download_timeout = download_timeout
+        self.http2 = http2
+        self.keep_alive = keep_alive
+        self.dns_cache_size = dns_cache_size
+        self.dns_timeout = dns_timeout
+        self.crawl_timeout = crawl_timeout
+
+    def get_settings(self) -> dict:
+        """
+        :return: Scrapy settings of the shop crawler
+        """
+        settings = {
+            "CONCURRENT_REQUESTS": max(default_settings.CONCURRENT_REQUESTS, self.concurrent_requests_per_domain),
+            "CONCURRENT_REQUESTS_PER_DOMAIN": self.concurrent_requests_per_domain,
+            "DOWNLOAD_DELAY": self.download_delay,
+            "AUTOTHROTTLE_ENABLED": self.autothrottle,
+            "AUTOTHROTTLE_TARGET_CONCURRENCY": self.autothrottle_target_concurrency,
+            "AUTOTHROTTLE_MAX_DELAY": self.autothrottle_max_delay,
+            "DOWNLOAD_TIMEOUT": self.download_timeout,
+            "CLOSESPIDER_TIMEOUT": self.crawl_timeout
+        }
+        if self.http2:
+            settings["DOWNLOAD_HANDLERS"] = {"https": self.HTTP2_DOWNLOAD_HANDLER}
+        if not self.keep_alive:
+            settings["DEFAULT_REQUEST_HEADERS"] = {**default_settings.DEFAULT_REQUEST_HEADERS, "Connection": "close"}
+        return settings
+
+    def get_process_settings(self) -> dict:
+        """
+        :return: Scrapy settings of the crawler process
+        """
+        return {
+            "DNSCACHE_ENABLED": self.dns_cache_size > 0,
+            "DNSCACHE_SIZE": self.dns_cache_size,
+            "DNS_TIMEOUT": self.dns_timeout
+        }
+
+    @staticmethod
+    def from_dict(dict_profile: dict) -> "CrawlProfile":
+        """
+        :param dict_profile: values of the profile, the missing ones are the defaults
+        """
+        return CrawlProfile(**dict_profile)
+
+
+class CrawlProfileException(Exception):
+    pass
+
+
+class Http2NotAvailableError(CrawlProfileException):
+
+    def __str__(self) -> str:
+        return "HTTP/2 requires the h2 package to be installed"
@@ -0,0 +1,70 @@
+from scrapy.crawler import CrawlerRunner
+from scrapy.utils.misc import load_object, create_instance
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred, maybeDeferred
+from twisted.internet.task import LoopingCall
+from twisted.python.failure import Failure
+from rolba.log import Logger
+from rolba.worker import WebSpiderExtractionsProcessor
+
+
+class ExtractionsDaemon:
+    """
+    Runs the extractions repeatedly in the long-running process. The reactor, the configuration and
+    the state of the extractions (e.g. the cached saved records) are kept between the runs,
+    so each run costs only its crawl and diff.
+    """
+
+    def __init__(
+            self,
+            crawler_runner: CrawlerRunner,
+            extractions_processor: WebSpiderExtractionsProcessor,
+            run_interval: float,
+            logger: Logger = None
+    ):
+        """
+        :param crawler_runner: crawler runner of the extractions processor
+        :param run_interval: seconds between the starts of the runs, the run taking longer is followed
+                             by the next one at once
+        :param logger: reports the failed runs
+        """
+        self.crawler_runner = crawler_runner
+        self.extractions_processor = extractions_processor
+        self.run_interval = run_interval
+        self.logger = logger
+        self.looping_call = LoopingCall(self._run)
+
+    def start(self):
+        """
+        Starts the reactor running the extractions until the process is stopped (e.g. by SIGTERM),
+        the running crawls are closed before the reactor stops.
+        """
+        self._configure_reactor()
+        reactor.addSystemEventTrigger("before", "shutdown", self._stop)
+        self.looping_call.start(self.run_interval, now=True)
+        reactor.run()
+
+    def _run(self) -> Deferred:
+        if self.logger:
+            self.logger.info("Extractions run started")
+        return maybeDeferred(self.extractions_processor.run_in_reactor).addErrback(self._log_failure)
+
+    def _stop(self) -> Deferred:
+        if self.looping_call.running:
+            self.looping_call.stop()
+        return self.extractions_processor.stop()
+
+    def _log_failure(self, failure: Failure):
+        # The next runs are still scheduled
+        if self.logger:
+            self.logger.error(f"Extractions run has failed: {failure.getTraceback()}")
+
+    def _configure_reactor(self):
+        """
+        Installs the DNS resolver and sizes the thread pool by the crawler settings, as the crawler process
+        does on its start.
+        """
+        settings = self.crawler_runner.settings
+        resolver_class = load_object(settings["DNS_RESOLVER"])
+        create_instance(resolver_class, settings, self.crawler_runner, reactor=reactor).install_on_reactor()
+        reactor.getThreadPool().adjustPoolsize(maxthreads=settings.getint("REACTOR_THREADPOOL_MAXSIZE"))
@@ -0,0 +1,91 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Hashable, Iterable, List, Set, Tuple
+from rolba.record import Record, VinylRecord, RecordsCollection, BaseRecordsCollection
+
+
+class RecordsChangeSet:
+
+    def __init__(self):
+        self.added = RecordsCollection()
+        self.removed = RecordsCollection()
+        # Price changes are kept as (saved record, new record) pairs
+        self.price_increased: List[Tuple[Record, Record]] = []
+        self.price_decreased: List[Tuple[Record, Record]] = []
+
+    def get_added(self) -> BaseRecordsCollection:
+        return self.added
+
+    def get_removed(self) -> BaseRecordsCollection:
+        return self.removed
+
+    def get_price_increased(self) -> List[Tuple[Record, Record]]:
+        return self.price_increased
+
+    def get_price_decreased(self) -> List[Tuple[Record, Record]]:
+        return self.price_decreased
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.price_increased) + len(self.price_decreased)
+
+    def __eq__(self, other: "RecordsChangeSet") -> bool:
+        return self.added == other.get_added() \
+            and self.removed == other.get_removed() \
+            and self.price_increased == other.get_price_increased() \
+            and self.price_decreased == other.get_price_decreased()
+
+
+class RecordsCollectionsDiffer(ABC):
+
+    @abstractmethod
+    def get_record_key(self, record: Record) -> Hashable:
+        pass
+
+    @abstractmethod
+    def get_changeset(self, new_records: Iterable[Record], saved_records: Iterable[Record]) -> RecordsChangeSet:
+        pass
+
+    def is_keyed_by_link(self) -> bool:
+        """
+        :return: whether the records are keyed by their links, so the storage indexed by the links may diff them
+        """
+        return False
+
+
+class VinylRecordsCollectionsDiffer(RecordsCollectionsDiffer):
+
+    def __init__(self, record_key_getter: Callable[[VinylRecord], Hashable] = VinylRecord.get_link):
+        self.record_key_getter = record_key_getter
+
+    def get_record_key(self, record: VinylRecord) -> Hashable:
+        return self.record_key_getter(record)
+
+    def is_keyed_by_link(self) -> bool:
+        return self.record_key_getter is VinylRecord.get_link
+
+    def get_changeset(self, new_records: Iterable[VinylRecord], saved_records: Iterable[VinylRecord]) \
+            -> RecordsChangeSet:
+        """
+        Indexes the new records by their key and streams the saved ones against the index,
+        so each side is walked exactly once and the saved records may come from a generator.
+        """
+        new_records_index: Dict[Hashable, VinylRecord] = {}
+        for record in new_records:
+            new_records_index.setdefault(self.get_record_key(record), record)
+        changeset = RecordsChangeSet()
+        saved_keys: Set[Hashable] = set()
+        for saved_record in saved_records:
+            key = self.get_record_key(saved_record)
+            if key in saved_keys:
+                continue
+            saved_keys.add(key)
+            new_record = new_records_index.get(key)
+            if new_record is None:
+                changeset.removed.add_record(saved_record)
+            elif new_record.get_price() > saved_record.get_price():
+                changeset.price_increased.append((saved_record, new_record))
+            elif new_record.get_price() < saved_record.get_price():
+                changeset.price_decreased.append((saved_record, new_record))
+        for key, new_record in new_records_index.items():
+            if key not in saved_keys:
+                changeset.added.add_record(new_record)
+        return changeset
@@ -1,254 +1,660 @@
+import time
 from abc import ABC, abstractmethod
-from urllib.parse import urlsplit, urlparse
-from scrapy import Spider
-from scrapy.crawler import CrawlerProcess
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type
+import lxml.html
+from lxml import etree
+from scrapy import Spider, Request, signals
+from scrapy.crawler import Crawler, CrawlerRunner
+from scrapy.exceptions import IgnoreRequest
 from scrapy.http.response import Response
-from rolba.record import VinylRecord, RecordsCollection
+from scrapy.spidermiddlewares.httperror import HttpError
+from scrapy.utils.request import request_fingerprint
+from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
+from rolba.record import Record, VinylRecord, BaseRecordsCollection, VinylRecordFactory, InvalidJsonSchemaError
+from rolba.http_cache import HttpCache, HttpCacheEntry
+from rolba.metrics import ExtractionMetrics
+from rolba.crawl_profile import CrawlProfile
+from rolba.checkpoint import CrawlCheckpoint
+from rolba import shops
+from rolba.shops import ShopDefinition
 
 
 class RecordsExtractor(ABC):
-    pass
 
+    @abstractmethod
+    def get_records(self) -> BaseRecordsCollection:
+        pass
 
-class WebSpider(Spider, ABC):
+    @abstractmethod
+    def set_known_records(self, records: Iterable[Record]):
+        """
+        Sets the already saved records before each run, the extraction may stop once it reads only the known ones.
+        The full extraction gets none.
+        """
+        pass
 
-    custom_settings = {
-        "USER_AGENT": "Mozilla/5.0 (iPad; CPU OS 12_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148"
-    }
+    @abstractmethod
+    def schedule_extraction(self):
+        """
+        Schedules the extraction, it runs once its crawler process starts.
+        """
+        pass
 
+    @abstractmethod
+    def add_finished_callback(self, callback: Callable[[], None]):
+        """
+        Adds the callback called as soon as the extraction has finished, the other ones may still run.
+        """
+        pass
 
-class WebSpiderRecordsExtractor(RecordsExtractor, ABC):
+    @abstractmethod
+    def is_complete(self) -> bool:
+        """
+        :return: whether the finished extraction has read all the records, the records of the incomplete one
+                 (stopped early or failing to download the pages) mustn't replace the saved ones
+        """
+        pass
 
-    def __init__(self, crawler_process: CrawlerProcess):
-        self.crawler_process = crawler_process
-        self.records = RecordsCollection()
-        self._register_spider()
+    @abstractmethod
+    def is_failed(self) -> bool:
+        """
+        :return: whether the incomplete extraction has failed (e.g. timed out or failing to download the pages),
+                 the one interrupted by the shutdown hasn't
+        """
+        pass
 
     @abstractmethod
-    def _register_spider(self):
+    def get_metrics(self) -> ExtractionMetrics:
+        """
+        :return: metrics of the finished extraction
+        """
         pass
 
-    def get_records(self) -> RecordsCollection:
-        return self.records
+    @abstractmethod
+    def release_records(self):
+        """
+        Releases the extracted records once they have been processed.
+        """
+        pass
 
 
-class VinylEmpireRecordsSpider(WebSpider):
+class WebSpider(Spider, ABC):
 
-    name = "Vinyl empire records spider"
+    custom_settings = {
+        "USER_AGENT": "Mozilla/5.0 (iPad; CPU OS 12_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148"
+    }
+
+    # Not modified pages are answered from the HTTP cache
+    handle_httpstatus_list = [304]
+
+    KNOWN_PAGES_COUNT_META_KEY = "known_pages_count"
+    FINGERPRINT_META_KEY = "checkpoint_fingerprint"
 
     def __init__(self, **kwargs):
         super().__init__()
         self.start_urls = kwargs["args"]["start_urls"]
         self.data_read_callback = kwargs["args"]["data_read_callback"]
+        self.is_known_record = kwargs["args"].get("is_known_record", lambda record: False)
+        self.known_pages_limit = kwargs["args"].get("known_pages_limit")
+        self.http_cache: Optional[HttpCache] = kwargs["args"].get("http_cache")
+        self.metrics: Optional[ExtractionMetrics] = kwargs["args"].get("metrics")
+        self.checkpoint: Optional[CrawlCheckpoint] = kwargs["args"].get("checkpoint")
+        self.failed_requests: List[Request] = []
+
+    def start_requests(self) -> Iterator[Request]:
+        if self.checkpoint and self.checkpoint.is_saved():
+            yield from self._resume_crawl()
+        else:
+            yield from self._checkpoint_requests(self._get_start_requests())
 
     def parse(self, response: Response, **kwargs):
-        for product_container in response.css('div.product-container'):
-            self.data_read_callback({
-                'name': product_container.css('a.product-name ::text').get().strip(),
-                'price': self._get_price_from_string(
-                    product_container.css('span.product-price ::text').get().strip()
-                ),
-                'link': product_container.css('a.product-name ::attr(href)').get().strip()
-            })
-        next_page = response.css('li.pagination_next a::attr(href)').get()
-        if next_page:
-            request_url_split = urlsplit(response.request.url)
-            yield response.follow(
-                f"{request_url_split.scheme}://{request_url_split.netloc}{next_page}",
-                self.parse
+        cache_entry = self.http_cache.get_entry(response.url) if self.http_cache else None
+        if response.status == 304 and not cache_entry:
+            # The entry has been evicted in the meantime
+            requests = [response.request.replace(headers={}, dont_filter=True)]
+        else:
+            if response.status == 304:
+                page_records = cache_entry.get_records()
+                next_page_url = cache_entry.get_next_page_url()
+            else:
+                parse_start_time = time.perf_counter()
+                page_records, next_page_url = self._parse_page(response)
+                if self.metrics:
+                    self.metrics.parse_time.observe(time.perf_counter() - parse_start_time)
+                self._cache_page(response, page_records, next_page_url)
+            for record in page_records:
+                self.data_read_callback(record)
+                if self.checkpoint:
+                    self.checkpoint.add_record(record)
+            requests = self._follow_pages(response, page_records, next_page_url)
+        if not self.checkpoint:
+            yield from requests
+            return
+        # The checkpoint is saved only once the page has been processed as a whole
+        self.checkpoint.finish_request(response.meta[self.FINGERPRINT_META_KEY])
+        requests = list(self._checkpoint_requests(requests))
+        self.checkpoint.save(self._get_checkpoint_state())
+        yield from requests
+
+    def on_request_failed(self, failure: Failure):
+        """
+        Errback of the pages requests, the pages following the failed one are never read.
+        """
+        # The error responses are ignored requests too, unlike the cancelled ones they are missing pages
+        if failure.check(IgnoreRequest) and not failure.check(HttpError):
+            return
+        self.logger.error(f"Request of the page {failure.request.url} has failed: {failure.value!r}")
+        self.failed_requests.append(failure.request)
+
+    def closed(self, reason: str):
+        if self.metrics:
+            self.metrics.failed_pages_count = sum(
+                not self._is_page_needless(request) for request in self.failed_requests
+            )
+        if self.http_cache:
+            self.http_cache.save()
+        if self.checkpoint:
+            if reason == "finished":
+                self.checkpoint.clear()
+            else:
+                self.checkpoint.close(self._get_checkpoint_state())
+
+    def _get_start_requests(self) -> Iterator[Request]:
+        for url in self.start_urls:
+            yield Request(
+                url,
+                dont_filter=True,
+                headers=self._get_conditional_headers(url),
+                errback=self.on_request_failed
             )
 
-    @staticmethod
-    def _get_price_from_string(price_value: str) -> float:
-        return float(price_value.split(" ")[0].replace(",", "."))
+    def _get_checkpoint_state(self) -> dict:
+        """
+        :return: state of the spider the interrupted crawl continues with
+        """
+        return {}
+
+    def _set_checkpoint_state(self, state: dict):
+        pass
 
+    def _is_page_needless(self, request: Request) -> bool:
+        """
+        :return: whether the failed page wouldn't have been read anyway, so the extraction hasn't missed it
+        """
+        return False
+
+    def _resume_crawl(self) -> Iterator[Request]:
+        for record in self.checkpoint.get_records():
+            self.data_read_callback(record)
+        self._set_checkpoint_state(self.checkpoint.get_spider_state())
+        yield from self._checkpoint_requests(
+            Request(
+                dict_request["url"],
+                self.parse,
+                errback=self.on_request_failed,
+                priority=dict_request["priority"],
+                dont_filter=dict_request["dont_filter"],
+                headers=self._get_conditional_headers(dict_request["url"]),
+                meta=dict_request["meta"]
+            )
+            for dict_request in self.checkpoint.get_pending_requests()
+        )
 
-class VinylEmpireRecordsExtractor(WebSpiderRecordsExtractor):
+    def _checkpoint_requests(self, requests: Iterable[Request]) -> Iterator[Request]:
+        """
+        Adds the requests to the pending ones of the checkpoint, the already finished pages of the interrupted crawl
+        aren't requested again.
+        """
+        for request in requests:
+            if not self.checkpoint:
+                yield request
+                continue
+            fingerprint = request_fingerprint(request)
+            if not request.dont_filter and self.checkpoint.is_finished_request(fingerprint):
+                continue
+            self.checkpoint.add_pending_request(fingerprint, {
+                "url": request.url,
+                "priority": request.priority,
+                "dont_filter": request.dont_filter,
+                "meta": dict(request.meta)
+            })
+            # The fingerprint is kept by the redirected requests too
+            request.meta[self.FINGERPRINT_META_KEY] = fingerprint
+            yield request
 
-    RECORDS_URL = "https://vinylempire.cz/13-bazarove-vinyly?id_category=13&n=60"
+    @abstractmethod
+    def _parse_page(self, response: Response) -> Tuple[List[dict], Optional[str]]:
+        """
+        :return: records of the page and URL of the next page
+        """
+        pass
 
-    def _register_spider(self):
-        self.crawler_process.crawl(
-            VinylEmpireRecordsSpider,
-            args={
-                "start_urls": [self.RECORDS_URL],
-                "data_read_callback": lambda record: self.records.add_record(
-                    VinylRecord(record["name"], record["price"], record["link"])
-                )
-            }
+    def _follow_pages(self, response: Response, page_records: [dict], next_page_url: Optional[str]) \
+            -> Iterator[Request]:
+        if next_page_url:
+            yield from self._follow_next_page(response, page_records, next_page_url)
+
+    def _is_known_page(self, page_records: [dict]) -> bool:
+        return bool(page_records) and all(self.is_known_record(record) for record in page_records)
+
+    def _follow_next_page(self, response: Response, page_records: [dict], next_page_url: str) -> Iterator[Request]:
+        """
+        Follows the next listing page unless the limit of consecutive pages holding only the known records
+        is reached. The listings are ordered from the newest records, so the rest of them is known too.
+        """
+        if self._is_known_page(page_records):
+            known_pages_count = response.meta.get(self.KNOWN_PAGES_COUNT_META_KEY, 0) + 1
+        else:
+            known_pages_count = 0
+        if self.known_pages_limit and known_pages_count >= self.known_pages_limit:
+            return
+        yield response.follow(
+            next_page_url,
+            self.parse,
+            errback=self.on_request_failed,
+            meta={self.KNOWN_PAGES_COUNT_META_KEY: known_pages_count},
+            headers=self._get_conditional_headers(response.urljoin(next_page_url))
         )
 
+    def _get_conditional_headers(self, url: str) -> Dict[str, str]:
+        cache_entry = self.http_cache.get_entry(url) if self.http_cache else None
+        return cache_entry.get_conditional_headers() if cache_entry else {}
+
+    def _cache_page(self, response: Response, page_records: [dict], next_page_url: Optional[str]):
+        if not self.http_cache:
+            return
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.http_cache.set_entry(
+                response.url,
+                HttpCacheEntry(
+                    etag=etag.decode() if etag else None,
+                    last_modified=last_modified.decode() if last_modified else None,
+                    records=page_records,
+                    next_page_url=next_page_url
+                )
+            )
 
-class BlackVinylBazarRecordsSpider(WebSpider):
-
-    name = "Black Vinyl Bazar records spider"
 
-    page_param_name = "krit"
+class ListingPageParser(ABC):
 
-    def __init__(self, **kwargs):
-        super().__init__()
-        self.start_urls = kwargs["args"]["start_urls"]
-        self.data_read_callback = kwargs["args"]["data_read_callback"]
+    @abstractmethod
+    def get_root(self, response: Response) -> etree.ElementBase:
+        pass
 
-    def parse(self, response: Response, **kwargs):
-        is_empty_page = True
-        for product_container in response.css('div.ramecekshop'):
-            is_empty_page = False
-            self.data_read_callback({
-                'name': product_container.css('a.nadpisramecek ::text').get().strip(),
-                'price': self._get_price_from_string(
-                    product_container.css('a.objednejkosobr ::text').get().strip()
-                ),
-                'link': self._get_product_link(
-                    response,
-                    product_container.css('a.nadpisramecek ::attr(href)').get().strip()
-                )
-            })
-        if not is_empty_page:
-            yield response.follow(self._get_next_page_url(response), self.parse)
 
-    @staticmethod
-    def _get_price_from_string(price_value: str) -> float:
-        return float(price_value.split("\xa0")[0].replace(",", "."))
+class SelectorListingPageParser(ListingPageParser):
+    """
+    Uses the document of the parsel selector of the response, built from the decoded response text.
+    """
+
+    def get_root(self, response: Response) -> etree.ElementBase:
+        return response.selector.root
+
+
+class LxmlListingPageParser(ListingPageParser):
+    """
+    Parses the raw response body with lxml at once, without decoding it to the text and building the selector.
+    """
+
+    def __init__(self):
+        self.html_parsers: Dict[str, lxml.html.HTMLParser] = {}
+
+    def get_root(self, response: Response) -> etree.ElementBase:
+        if not response.body.strip():
+            return etree.Element("html")
+        encoding = response.encoding
+        if encoding not in self.html_parsers:
+            self.html_parsers[encoding] = lxml.html.HTMLParser(encoding=encoding, recover=True)
+        return etree.fromstring(response.body, parser=self.html_parsers[encoding], base_url=response.url)
+
+
+class SpeculativePagesWindow:
+    """
+    Window of the listing pages requested ahead of the parsed ones, the pages following the last one
+    (the one before the empty page, or the one reaching the known pages limit) are cancelled.
+    """
+
+    def __init__(self, size: int, known_pages_limit: int = None):
+        self.size = size
+        self.known_pages_limit = known_pages_limit
+        self.requested_pages_count = 0
+        self.last_page_number: Optional[int] = None
+        self.known_pages_numbers: Set[int] = set()
+
+    def get_pages_to_request(self, first_page_number: int) -> range:
+        """
+        :return: numbers of the pages of the window starting at the given page, which haven't been requested yet
+        """
+        end_page_number = first_page_number + self.size
+        if self.last_page_number is not None:
+            end_page_number = min(end_page_number, self.last_page_number + 1)
+        pages_numbers = range(self.requested_pages_count, end_page_number)
+        self.requested_pages_count = max(self.requested_pages_count, end_page_number)
+        return pages_numbers
+
+    def set_last_page(self, page_number: int):
+        if self.last_page_number is None or page_number < self.last_page_number:
+            self.last_page_number = page_number
+
+    def mark_known_page(self, page_number: int):
+        if not self.known_pages_limit:
+            return
+        self.known_pages_numbers.add(page_number)
+        for first_page_number in range(page_number - self.known_pages_limit + 1, page_number + 1):
+            pages_numbers = range(first_page_number, first_page_number + self.known_pages_limit)
+            if all(number in self.known_pages_numbers for number in pages_numbers):
+                self.set_last_page(pages_numbers[-1])
+
+    def is_cancelled(self, page_number: int) -> bool:
+        return self.last_page_number is not None and page_number > self.last_page_number
+
+    def to_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "known_pages_limit": self.known_pages_limit,
+            "requested_pages_count": self.requested_pages_count,
+            "last_page_number": self.last_page_number,
+            "known_pages_numbers": sorted(self.known_pages_numbers)
+        }
 
     @staticmethod
-    def _get_next_page_url(response: Response) -> str:
-        current_url_split = response.request.url.split("-")
-        current_url_split[-1] = str(int(current_url_split[-1]) + 1)
-        return "-".join(current_url_split)
+    def from_dict(dict_window: dict) -> "SpeculativePagesWindow":
+        window = SpeculativePagesWindow(dict_window["size"], dict_window["known_pages_limit"])
+        window.requested_pages_count = dict_window["requested_pages_count"]
+        window.last_page_number = dict_window["last_page_number"]
+        window.known_pages_numbers = set(dict_window["known_pages_numbers"])
+        return window
 
-    @staticmethod
-    def _get_product_link(response: Response, product_link: str) -> str:
-        parsed_uri = urlparse(response.request.url)
-        return f"{parsed_uri.scheme}://{parsed_uri.netloc}/{product_link}"
 
+class CancelledRequestsMiddleware:
+    """
+    Drops the requests of the pages the spider doesn't need anymore, before they are downloaded.
+    """
 
-class BlackVinylBazarRecordsExtractor(WebSpiderRecordsExtractor):
+    def process_request(self, request: Request, spider: Spider):
+        if isinstance(spider, ShopRecordsSpider) and spider.is_cancelled_request(request):
+            raise IgnoreRequest()
 
-    RECORDS_URL = "https://www.blackvinylbazar.cz/bazar?ids=2&krit=raz8-80-1"
 
-    def _register_spider(self):
-        self.crawler_process.crawl(
-            BlackVinylBazarRecordsSpider,
-            args={
-                "start_urls": [self.RECORDS_URL],
-                "data_read_callback": lambda record: self.records.add_record(
-                    VinylRecord(record["name"], record["price"], record["link"])
-                )
-            }
-        )
+class ShopRecordsSpider(WebSpider):
+    """
+    Spider extracting the records from the listing pages of the shop by its definition.
+    """
 
+    name = "Shop records spider"
 
-class VinylBazarRecordsSpider(WebSpider):
+    custom_settings = {
+        **WebSpider.custom_settings,
+        "DOWNLOADER_MIDDLEWARES": {"rolba.extraction.CancelledRequestsMiddleware": 50}
+    }
 
-    name = "Vinyl Bazar records spider"
+    FIRST_PAGE_URL_META_KEY = "first_page_url"
+    PAGE_NUMBER_META_KEY = "page_number"
 
     def __init__(self, **kwargs):
-        super().__init__()
-        self.start_urls = kwargs["args"]["start_urls"]
-        self.data_read_callback = kwargs["args"]["data_read_callback"]
+        super().__init__(**kwargs)
+        self.shop_definition: ShopDefinition = kwargs["args"]["shop_definition"]
+        self.page_parser: ListingPageParser = kwargs["args"].get("page_parser") or SelectorListingPageParser()
+        self.name = self.shop_definition.name
+        self.pages_windows: Dict[str, SpeculativePagesWindow] = {}
+
+    def _get_start_requests(self) -> Iterator[Request]:
+        if self.shop_definition.pages_window <= 1:
+            yield from super()._get_start_requests()
+            return
+        for url in self.start_urls:
+            self.pages_windows[url] = SpeculativePagesWindow(self.shop_definition.pages_window, self.known_pages_limit)
+            yield from self._request_pages(url, self.pages_windows[url].get_pages_to_request(0))
+
+    def is_cancelled_request(self, request: Request) -> bool:
+        first_page_url = request.meta.get(self.FIRST_PAGE_URL_META_KEY)
+        if first_page_url is None:
+            return False
+        return self.pages_windows[first_page_url].is_cancelled(request.meta[self.PAGE_NUMBER_META_KEY])
+
+    def _is_page_needless(self, request: Request) -> bool:
+        # The pages requested ahead may fail past the last page of the listing
+        return self.is_cancelled_request(request)
+
+    def _get_checkpoint_state(self) -> dict:
+        return {"pages_windows": {url: window.to_dict() for url, window in self.pages_windows.items()}}
+
+    def _set_checkpoint_state(self, state: dict):
+        self.pages_windows = {
+            url: SpeculativePagesWindow.from_dict(dict_window)
+            for url, dict_window in state.get("pages_windows", {}).items()
+        }
+
+    def _parse_page(self, response: Response) -> Tuple[List[dict], Optional[str]]:
+        page_url = response.request.url
+        root = self.page_parser.get_root(response)
+        page_records = self.shop_definition.get_records(root, page_url)
+        return page_records, self.shop_definition.pagination.get_next_page_url(page_url, root, page_records)
+
+    def _follow_pages(self, response: Response, page_records: [dict], next_page_url: Optional[str]) \
+            -> Iterator[Request]:
+        first_page_url = response.meta.get(self.FIRST_PAGE_URL_META_KEY)
+        if first_page_url is None:
+            yield from super()._follow_pages(response, page_records, next_page_url)
+            return
+        pages_window = self.pages_windows[first_page_url]
+        page_number = response.meta[self.PAGE_NUMBER_META_KEY]
+        if not page_records:
+            pages_window.set_last_page(page_number - 1)
+        elif self._is_known_page(page_records):
+            pages_window.mark_known_page(page_number)
+        yield from self._request_pages(first_page_url, pages_window.get_pages_to_request(page_number + 1))
+
+    def _request_pages(self, first_page_url: str, pages_numbers: Iterable[int]) -> Iterator[Request]:
+        for page_number in pages_numbers:
+            url = self.shop_definition.pagination.get_page_url(first_page_url, page_number)
+            yield Request(
+                url,
+                self.parse,
+                errback=self.on_request_failed,
+                dont_filter=page_number == 0,
+                # The pages are downloaded in their order
+                priority=-page_number,
+                headers=self._get_conditional_headers(url),
+                meta={self.FIRST_PAGE_URL_META_KEY: first_page_url, self.PAGE_NUMBER_META_KEY: page_number}
+            )
 
-    def parse(self, response: Response, **kwargs):
-        for product_container in response.css('div.product'):
-            self.data_read_callback({
-                'name': product_container.css('div.productTitleContent a ::text').get().strip(),
-                'price': self._get_price_from_string(
-                    product_container.css('span.product_price_text ::text').get().strip()
-                ),
-                'link': self._get_base_url(response.request.url) + product_container.css(
-                    'div.productTitleContent a ::attr(href)'
-                ).get().strip()
-            })
-        next_page = response.css('div.pagination a.next ::attr(href)').get()
-        if next_page:
-            yield response.follow(next_page, self.parse)
 
-    @staticmethod
-    def _get_price_from_string(price_value: str) -> float:
-        return float(price_value.split("\xa0")[0].replace(",", "."))
+class WebSpiderRecordsExtractor(RecordsExtractor, ABC):
 
-    @staticmethod
-    def _get_base_url(url: str):
-        parsed_uri = urlparse(url)
-        return f"{parsed_uri.scheme}://{parsed_uri.netloc}"
-
-
-class VinylBazarRecordsExtractor(WebSpiderRecordsExtractor):
-
-    RECORDS_URLS = [
-        "https://www.vinylbazar.net/pop-rock-usa-uk",
-        "https://www.vinylbazar.net/soul-funk-disco",
-        "https://www.vinylbazar.net/breakbeat",
-        "https://www.vinylbazar.net/downtempo-chillout",
-        "https://www.vinylbazar.net/jazz-blues-usa-uk",
-        "https://www.vinylbazar.net/country-folk",
-        "https://www.vinylbazar.net/etnicka-hudba"
-    ]
-
-    def _register_spider(self):
-        self.crawler_process.crawl(
-            VinylBazarRecordsSpider,
-            args={
-                "start_urls": self.RECORDS_URLS,
-                "data_read_callback": lambda record: self.records.add_record(
-                    VinylRecord(record["name"], record["price"], record["link"])
-                )
-            }
-        )
+    RECORD_FACTORY = VinylRecordFactory()
+
+    def __init__(
+            self,
+            crawler_process: CrawlerRunner,
+            known_pages_limit: int = 2,
+            http_cache: HttpCache = None,
+            crawl_profile: CrawlProfile = None,
+            checkpoint: CrawlCheckpoint = None
+    ):
+        """
+        :param crawl_profile: crawl settings of the spider, the crawler process settings are used without it
+        :param checkpoint: makes the crawl resumable, the interrupted crawl continues where it stopped
+        """
+        self.crawler_process = crawler_process
+        self.known_pages_limit = known_pages_limit
+        self.http_cache = http_cache
+        self.crawl_profile = crawl_profile
+        self.checkpoint = checkpoint
+        self.records = self.RECORD_FACTORY.create_collection()
+        self.metrics = ExtractionMetrics()
+        self.known_records_links: Set[str] = set()
+        self.crawl_deferred: Optional[Deferred] = None
 
+    @abstractmethod
+    def _get_spider(self) -> Tuple[Type[WebSpider], dict]:
+        """
+        :return: class of the spider and its args
+        """
+        pass
 
-class LpBazarRecordsSpider(WebSpider):
+    def get_records(self) -> BaseRecordsCollection:
+        return self.records
 
-    name = "LP Bazar records spider"
+    def set_known_records(self, records: Iterable[VinylRecord]):
+        self.known_records_links = {record.get_link() for record in records}
 
-    def __init__(self, **kwargs):
-        super().__init__()
-        self.start_urls = kwargs["args"]["start_urls"]
-        self.data_read_callback = kwargs["args"]["data_read_callback"]
+    def is_complete(self) -> bool:
+        return not self.metrics.is_incomplete and not self.metrics.failed_pages_count
 
-    def parse(self, response: Response, **kwargs):
-        for product_container in response.css('div.product'):
-            availability = product_container.css("span.p-cat-availability ::text").get().strip()
-            if not availability.startswith("Skladem"):
-                continue
-            self.data_read_callback({
-                'name': product_container.css('a.p-name span ::text').get().strip(),
-                'price': self._get_price_from_string(
-                    product_container.css('span.p-det-main-price ::text').get().strip()
-                ),
-                'link': self._get_base_url(response.request.url) + product_container.css(
-                    'a.p-name ::attr(href)'
-                ).get().strip()[1:]
+    def is_failed(self) -> bool:
+        return self.metrics.is_timed_out or bool(self.metrics.failed_pages_count)
+
+    def get_metrics(self) -> ExtractionMetrics:
+        return self.metrics
+
+    def schedule_extraction(self):
+        self.metrics = ExtractionMetrics()
+        spider_class, spider_args = self._get_spider()
+        if self.crawl_profile:
+            spider_class = type(spider_class.__name__, (spider_class,), {
+                "custom_settings": {**spider_class.custom_settings, **self.crawl_profile.get_settings()}
             })
-        next_page = response.css('div.pagination a.s-page.pagination-page ::attr(href)').get()
-        if next_page:
-            request_url_split = urlsplit(response.request.url)
-            yield response.follow(
-                f"{request_url_split.scheme}://{request_url_split.netloc}{next_page}",
-                self.parse
-            )
+        crawler = self.crawler_process.create_crawler(spider_class)
+        crawler.signals.connect(self._observe_download_latency, signal=signals.response_received)
+        self.crawl_deferred = self.crawler_process.crawl(crawler, args={**spider_args, "metrics": self.metrics})
+        self.crawl_deferred.addBoth(partial(self._set_crawl_stats, crawler))
+
+    def add_finished_callback(self, callback: Callable[[], None]):
+        def call_callback(result):
+            callback()
+            return result
+        self.crawl_deferred.addBoth(call_callback)
+
+    def release_records(self):
+        self.records = self.RECORD_FACTORY.create_collection()
+
+    def _add_record(self, dict_record: dict):
+        """
+        Records are validated and deduplicated as the spider reads them.
+        """
+        try:
+            self.records.add_record(self.RECORD_FACTORY.create_from_dict(dict_record))
+        except InvalidJsonSchemaError:
+            self.metrics.invalid_items_count += 1
+
+    def _observe_download_latency(self, response: Response, request: Request, spider: Spider):
+        download_latency = request.meta.get("download_latency")
+        if download_latency is not None:
+            self.metrics.download_latency.observe(download_latency)
+
+    def _set_crawl_stats(self, crawler: Crawler, result):
+        self.metrics.set_crawl_stats(crawler.stats.get_stats())
+        self.metrics.items_count = len(self.records)
+        return result
+
+    def _get_spider_args(self, start_urls: [str]) -> dict:
+        return {
+            "start_urls": start_urls,
+            "data_read_callback": self._add_record,
+            "is_known_record": lambda record: record["link"] in self.known_records_links,
+            "known_pages_limit": self.known_pages_limit,
+            "http_cache": self.http_cache,
+            "checkpoint": self.checkpoint
+        }
+
+
+class ShopRecordsExtractor(WebSpiderRecordsExtractor):
+
+    def __init__(
+            self,
+            crawler_process: CrawlerRunner,
+            shop_definition: ShopDefinition,
+            known_pages_limit: int = 2,
+            http_cache: HttpCache = None,
+            page_parser: ListingPageParser = None,
+            crawl_profile: CrawlProfile = None,
+            checkpoint: CrawlCheckpoint = None
+    ):
+        """
+        :param page_parser: parser of the listing pages, the parsel selector is used by default
+        """
+        self.shop_definition = shop_definition
+        self.page_parser = page_parser
+        super().__init__(crawler_process, known_pages_limit, http_cache, crawl_profile, checkpoint)
+
+    def _get_spider(self) -> Tuple[Type[WebSpider], dict]:
+        return ShopRecordsSpider, {
+            **self._get_spider_args(self.shop_definition.start_urls),
+            "shop_definition": self.shop_definition,
+            "page_parser": self.page_parser
+        }
+
+
+class VinylEmpireRecordsExtractor(ShopRecordsExtractor):
+
+    def __init__(
+            self,
+            crawler_process: CrawlerRunner,
+            known_pages_limit: int = 2,
+            http_cache: HttpCache = None,
+            page_parser: ListingPageParser = None,
+            crawl_profile: CrawlProfile = None,
+            checkpoint: CrawlCheckpoint = None
+    ):
+        super().__init__(
+            crawler_process, shops.VINYL_EMPIRE, known_pages_limit, http_cache, page_parser, crawl_profile, checkpoint
+        )
 
-    @staticmethod
-    def _get_price_from_string(price_value: str) -> float:
-        return float(price_value.split(" ")[0].replace(",", "."))
 
-    @staticmethod
-    def _get_base_url(url: str):
-        parsed_uri = urlparse(url)
-        return f"{parsed_uri.scheme}://{parsed_uri.netloc}/"
+class BlackVinylBazarRecordsExtractor(ShopRecordsExtractor):
+
+    def __init__(
+            self,
+            crawler_process: CrawlerRunner,
+            known_pages_limit: int = 2,
+            http_cache: HttpCache = None,
+            page_parser: ListingPageParser = None,
+            crawl_profile: CrawlProfile = None,
+            checkpoint: CrawlCheckpoint = None
+    ):
+        super().__init__(
+            crawler_process,
+            shops.BLACK_VINYL_BAZAR,
+            known_pages_limit,
+            http_cache,
+            page_parser,
+            crawl_profile,
+            checkpoint
+        )
 
 
-class LpBazarRecordsExtractor(WebSpiderRecordsExtractor):
+class VinylBazarRecordsExtractor(ShopRecordsExtractor):
 
-    RECORDS_URL = "https://www.lpbazar.cz/lp-desky/"
+    def __init__(
+            self,
+            crawler_process: CrawlerRunner,
+            known_pages_limit: int = 2,
+            http_cache: HttpCache = None,
+            page_parser: ListingPageParser = None,
+            crawl_profile: CrawlProfile = None,
+            checkpoint: CrawlCheckpoint = None
+    ):
+        super().__init__(
+            crawler_process, shops.VINYL_BAZAR, known_pages_limit, http_cache, page_parser, crawl_profile, checkpoint
+        )
 
-    def _register_spider(self):
-        self.crawler_process.crawl(
-            LpBazarRecordsSpider,
-            args={
-                "start_urls": [self.RECORDS_URL],
-                "data_read_callback": lambda record: self.records.add_record(
-                    VinylRecord(record["name"], record["price"], record["link"])
-                )
-            }
+
+class LpBazarRecordsExtractor(ShopRecordsExtractor):
+
+    def __init__(
+            self,
+            crawler_process: CrawlerRunner,
+            known_pages_limit: int = 2,
+            http_cache: HttpCache = None,
+            page_parser: ListingPageParser = None,
+            crawl_profile: CrawlProfile = None,
+            checkpoint: CrawlCheckpoint = None
+    ):
+        super().__init__(
+            crawler_process, shops.LP_BAZAR, known_pages_limit, http_cache, page_parser, crawl_profile, checkpoint
         )
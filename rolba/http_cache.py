@@ -0,0 +1,141 @@
+import os
+import json
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+from rolba.repository import open_atomically
+
+
+class HttpCacheEntry:
+
+    def __init__(
+            self,
+            etag: Optional[str],
+            last_modified: Optional[str],
+            records: [dict],
+            next_page_url: Optional[str]
+    ):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.records = records
+        self.next_page_url = next_page_url
+
+    def get_etag(self) -> Optional[str]:
+        return self.etag
+
+    def get_last_modified(self) -> Optional[str]:
+        return self.last_modified
+
+    def get_records(self) -> [dict]:
+        return self.records
+
+    def get_next_page_url(self) -> Optional[str]:
+        return self.next_page_url
+
+    def get_conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_dict(self) -> dict:
+        return {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "records": self.records,
+            "next_page_url": self.next_page_url
+        }
+
+    @staticmethod
+    def from_dict(dict_entry: dict) -> "HttpCacheEntry":
+        return HttpCacheEntry(
+            etag=dict_entry["etag"],
+            last_modified=dict_entry["last_modified"],
+            records=dict_entry["records"],
+            next_page_url=dict_entry["next_page_url"]
+        )
+
+
+class HttpCache(ABC):
+
+    @abstractmethod
+    def get_entry(self, url: str) -> Optional[HttpCacheEntry]:
+        pass
+
+    @abstractmethod
+    def set_entry(self, url: str, entry: HttpCacheEntry):
+        pass
+
+    @abstractmethod
+    def save(self):
+        pass
+
+
+class JsonFileHttpCache(HttpCache):
+    """
+    Cache of the listing pages validators (ETag, Last-Modified) and the records extracted from them,
+    limited by the size of the serialized entries. The least recently used entries are evicted first.
+    """
+
+    def __init__(self, file_path: str, max_size: int):
+        """
+        :param max_size: max size of the serialized entries in bytes
+        """
+        self.file_path = file_path
+        self.max_size = max_size
+        self.entries: OrderedDict[str, HttpCacheEntry] = OrderedDict()
+        self.entries_sizes: Dict[str, int] = {}
+        self.size = 0
+        if os.path.isfile(file_path):
+            try:
+                with open(file_path) as f:
+                    for url, dict_entry in json.load(f).items():
+                        self.set_entry(url, HttpCacheEntry.from_dict(dict_entry))
+            except (json.JSONDecodeError, AttributeError, KeyError, TypeError):
+                raise InvalidHttpCacheFileError(file_path)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+    def get_entry(self, url: str) -> Optional[HttpCacheEntry]:
+        entry = self.entries.get(url)
+        if entry:
+            self.entries.move_to_end(url)
+        return entry
+
+    def set_entry(self, url: str, entry: HttpCacheEntry):
+        self._remove_entry(url)
+        entry_size = len(url) + len(json.dumps(entry.to_dict()))
+        if entry_size > self.max_size:
+            return
+        self.entries[url] = entry
+        self.entries_sizes[url] = entry_size
+        self.size += entry_size
+        while self.size > self.max_size:
+            self._remove_entry(next(iter(self.entries)))
+
+    def save(self):
+        with open_atomically(self.file_path, "w") as f:
+            json.dump({url: entry.to_dict() for url, entry in self.entries.items()}, f)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _remove_entry(self, url: str):
+        if url in self.entries:
+            del self.entries[url]
+            self.size -= self.entries_sizes.pop(url)
+
+
+class HttpCacheException(Exception):
+    pass
+
+
+class InvalidHttpCacheFileError(HttpCacheException):
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def __str__(self) -> str:
+        return f"HTTP cache file ({self.file_path}) content is not valid"
@@ -0,0 +1,201 @@
+import re
+import math
+import unicodedata
+from collections import deque
+from abc import ABC, abstractmethod
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from rolba.record import VinylRecord
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def get_name_words(name: str) -> [str]:
+    """
+    :return: case and diacritics folded words of the name, e.g. "Kryštof – Ostrov" gives ["krystof", "ostrov"]
+    """
+    decomposed_name = unicodedata.normalize("NFKD", name.casefold())
+    folded_name = "".join(character for character in decomposed_name if not unicodedata.combining(character))
+    return TOKEN_PATTERN.findall(folded_name)
+
+
+def get_name_tokens(name: str) -> FrozenSet[str]:
+    return frozenset(get_name_words(name))
+
+
+class KeywordsAutomaton:
+    """
+    Aho-Corasick automaton finding all the keywords in the name in a single pass over its characters, however many
+    keywords there are. The keywords match the whole words of the name, case and diacritics insensitively.
+    """
+
+    def __init__(self, keywords: [str]):
+        """
+        :param keywords: the keywords without any word never match
+        """
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail_states: List[int] = [0]
+        # Indexes of the keywords ending in the state, including the ones of its fail states
+        self.outputs: List[List[int]] = [[]]
+        for keyword_index, keyword in enumerate(keywords):
+            words = get_name_words(keyword)
+            if words:
+                self._add_keyword(self._get_text(words), keyword_index)
+        self._build_fail_states()
+
+    def find(self, name: str) -> Set[int]:
+        """
+        :return: indexes of the keywords found in the name
+        """
+        found_keywords_indexes = set()
+        state = 0
+        for character in self._get_text(get_name_words(name)):
+            while character not in self.transitions[state] and state:
+                state = self.fail_states[state]
+            state = self.transitions[state].get(character, 0)
+            found_keywords_indexes.update(self.outputs[state])
+        return found_keywords_indexes
+
+    def _add_keyword(self, text: str, keyword_index: int):
+        state = 0
+        for character in text:
+            next_state = self.transitions[state].get(character)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions[state][character] = next_state
+                self.transitions.append({})
+                self.fail_states.append(0)
+                self.outputs.append([])
+            state = next_state
+        self.outputs[state].append(keyword_index)
+
+    def _build_fail_states(self):
+        # Breadth-first, so the fail state of each state is built before its children
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self.transitions[state].items():
+                fail_state = self.fail_states[state]
+                while character not in self.transitions[fail_state] and fail_state:
+                    fail_state = self.fail_states[fail_state]
+                self.fail_states[next_state] = self.transitions[fail_state].get(character, 0)
+                self.outputs[next_state].extend(self.outputs[self.fail_states[next_state]])
+                queue.append(next_state)
+
+    @staticmethod
+    def _get_text(words: [str]) -> str:
+        # The words are delimited by the spaces on both sides, so the keywords match only the whole words
+        return " " + " ".join(words) + " "
+
+
+class RecordsMatchingIndex(ABC):
+    """
+    Index of the records of all the shops, matching the listings of the same release by their names.
+    """
+
+    @abstractmethod
+    def set_records(self, title: str, records: Iterable[VinylRecord]):
+        """
+        Replaces the indexed records of the shop.
+        """
+        pass
+
+    @abstractmethod
+    def has_records(self, title: str) -> bool:
+        pass
+
+    @abstractmethod
+    def find_matches(self, record: VinylRecord, excluded_title: str = None) -> List[Tuple[str, VinylRecord, float]]:
+        """
+        :param excluded_title: shop whose records aren't matched, usually the one of the given record
+        :return: (shop title, record, similarity) of the matching records, the most similar first
+        """
+        pass
+
+    def get_cheapest_match(self, record: VinylRecord, excluded_title: str = None) \
+            -> Optional[Tuple[str, VinylRecord]]:
+        """
+        :return: shop title and the cheapest of the matching records, None if nothing matches
+        """
+        matches = self.find_matches(record, excluded_title)
+        if not matches:
+            return None
+        title, matching_record, _ = min(matches, key=lambda match: match[1].get_price())
+        return title, matching_record
+
+
+class InvertedRecordsMatchingIndex(RecordsMatchingIndex):
+    """
+    Keeps the records by the tokens of their names and scores them by the Jaccard similarity of the tokens.
+    A record matching with the similarity of at least the threshold shares at least one token with
+    the rarest ones of the searched name (the prefix filter), so only the records of these tokens are scored
+    and the common words (e.g. "LP") don't make every record a candidate.
+    """
+
+    def __init__(self, min_similarity: float = 0.8):
+        """
+        :param min_similarity: Jaccard similarity of the names tokens the matching records have at least
+        """
+        self.min_similarity = min_similarity
+        self.records: List[Optional[VinylRecord]] = []
+        self.records_tokens: List[FrozenSet[str]] = []
+        self.records_titles: List[str] = []
+        self.titles_ids: Dict[str, List[int]] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        # Ids of the removed records, reused by the next added ones
+        self.free_ids: List[int] = []
+
+    def set_records(self, title: str, records: Iterable[VinylRecord]):
+        for record_id in self.titles_ids.pop(title, []):
+            for token in self.records_tokens[record_id]:
+                posting = self.postings[token]
+                posting.discard(record_id)
+                if not posting:
+                    del self.postings[token]
+            self.records[record_id] = None
+            self.free_ids.append(record_id)
+        title_ids = self.titles_ids[title] = []
+        for record in records:
+            tokens = get_name_tokens(record.get_name())
+            if not tokens:
+                continue
+            if self.free_ids:
+                record_id = self.free_ids.pop()
+                self.records[record_id] = record
+                self.records_tokens[record_id] = tokens
+                self.records_titles[record_id] = title
+            else:
+                record_id = len(self.records)
+                self.records.append(record)
+                self.records_tokens.append(tokens)
+                self.records_titles.append(title)
+            title_ids.append(record_id)
+            for token in tokens:
+                self.postings.setdefault(token, set()).add(record_id)
+
+    def has_records(self, title: str) -> bool:
+        return title in self.titles_ids
+
+    def find_matches(self, record: VinylRecord, excluded_title: str = None) -> List[Tuple[str, VinylRecord, float]]:
+        tokens = get_name_tokens(record.get_name())
+        if not tokens:
+            return []
+        # The tokens missing from the index are the rarest, they still count in the prefix
+        rarest_tokens = sorted(tokens, key=lambda token: len(self.postings.get(token, ())))
+        # Rounding off the float error first, e.g. 0.28 * 25 is slightly above 7
+        min_common_tokens_count = math.ceil(round(self.min_similarity * len(tokens), 9))
+        prefix_length = len(tokens) - min_common_tokens_count + 1
+        candidates_ids: Set[int] = set()
+        for token in rarest_tokens[:prefix_length]:
+            candidates_ids.update(self.postings.get(token, ()))
+        matches = []
+        for record_id in candidates_ids:
+            title = self.records_titles[record_id]
+            if title == excluded_title:
+                continue
+            candidate_tokens = self.records_tokens[record_id]
+            common_tokens_count = len(tokens & candidate_tokens)
+            similarity = common_tokens_count / (len(tokens) + len(candidate_tokens) - common_tokens_count)
+            if similarity >= self.min_similarity:
+                matches.append((title, self.records[record_id], similarity))
+        matches.sort(key=lambda match: -match[2])
+        return matches
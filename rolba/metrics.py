@@ -0,0 +1,215 @@
+import json
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict
+from rolba.repository import open_atomically
+
+
+class Histogram:
+
+    def __init__(self, buckets: [float]):
+        """
+        :param buckets: upper bounds of the buckets, the last (infinite) one is added
+        """
+        self.buckets = list(buckets) + [math.inf]
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram"):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def get_cumulative_counts(self) -> [(float, int)]:
+        cumulative_counts = []
+        cumulative_count = 0
+        for bucket, count in zip(self.buckets, self.counts):
+            cumulative_count += count
+            cumulative_counts.append((bucket, cumulative_count))
+        return cumulative_counts
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": {str(bucket): count for bucket, count in self.get_cumulative_counts()},
+            "sum": self.sum,
+            "count": self.count
+        }
+
+
+class ExtractionMetrics:
+
+    DOWNLOAD_LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+    PARSE_TIME_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5]
+
+    def __init__(self):
+        self.wall_time = 0.0
+        self.pages_count = 0
+        self.not_modified_pages_count = 0
+        self.response_bytes = 0
+        self.items_count = 0
+        self.invalid_items_count = 0
+        self.retries_count = 0
+        self.cancelled_requests_count = 0
+        self.download_errors_count = 0
+        # Pages failing to download even after the retries, set by the spider
+        self.failed_pages_count = 0
+        self.errors_count = 0
+        self.is_crashed = False
+        self.is_incomplete = False
+        self.is_timed_out = False
+        self.is_skipped = False
+        self.download_latency = Histogram(self.DOWNLOAD_LATENCY_BUCKETS)
+        self.parse_time = Histogram(self.PARSE_TIME_BUCKETS)
+
+    def get_items_per_second(self) -> float:
+        return self.items_count / self.wall_time if self.wall_time else 0.0
+
+    def set_crawl_stats(self, stats: dict):
+        """
+        Sets the counters from the stats of the finished crawl.
+        """
+        self.wall_time = stats.get("elapsed_time_seconds", 0.0)
+        self.pages_count = stats.get("downloader/response_count", 0)
+        self.not_modified_pages_count = stats.get("downloader/response_status_count/304", 0)
+        self.response_bytes = stats.get("downloader/response_bytes", 0)
+        self.retries_count = stats.get("retry/count", 0)
+        # The cancelled requests are ignored by the downloader middleware
+        self.cancelled_requests_count = stats.get("downloader/exception_type_count/scrapy.exceptions.IgnoreRequest", 0)
+        self.download_errors_count = stats.get("downloader/exception_count", 0) - self.cancelled_requests_count
+        self.errors_count = stats.get("log_count/ERROR", 0)
+        # The spider closed before the end of the crawl, by the timeout or the shutdown
+        self.is_incomplete = stats.get("finish_reason", "finished") != "finished"
+        # Unlike the deliberate shutdown, the timeout counts as the failure of the shop
+        self.is_timed_out = stats.get("finish_reason") == "closespider_timeout"
+
+    def merge(self, other: "ExtractionMetrics"):
+        """
+        Adds the metrics of the other part of the extraction.
+        """
+        self.wall_time = max(self.wall_time, other.wall_time)
+        self.pages_count += other.pages_count
+        self.not_modified_pages_count += other.not_modified_pages_count
+        self.response_bytes += other.response_bytes
+        self.items_count += other.items_count
+        self.invalid_items_count += other.invalid_items_count
+        self.retries_count += other.retries_count
+        self.cancelled_requests_count += other.cancelled_requests_count
+        self.download_errors_count += other.download_errors_count
+        self.failed_pages_count += other.failed_pages_count
+        self.errors_count += other.errors_count
+        self.is_crashed = self.is_crashed or other.is_crashed
+        self.is_incomplete = self.is_incomplete or other.is_incomplete
+        self.is_timed_out = self.is_timed_out or other.is_timed_out
+        self.is_skipped = self.is_skipped or other.is_skipped
+        self.download_latency.merge(other.download_latency)
+        self.parse_time.merge(other.parse_time)
+
+    def to_dict(self) -> dict:
+        return {
+            "wall_time": self.wall_time,
+            "pages_count": self.pages_count,
+            "not_modified_pages_count": self.not_modified_pages_count,
+            "response_bytes": self.response_bytes,
+            "items_count": self.items_count,
+            "items_per_second": self.get_items_per_second(),
+            "invalid_items_count": self.invalid_items_count,
+            "retries_count": self.retries_count,
+            "cancelled_requests_count": self.cancelled_requests_count,
+            "download_errors_count": self.download_errors_count,
+            "failed_pages_count": self.failed_pages_count,
+            "errors_count": self.errors_count,
+            "is_crashed": self.is_crashed,
+            "is_incomplete": self.is_incomplete,
+            "is_timed_out": self.is_timed_out,
+            "is_skipped": self.is_skipped,
+            "download_latency": self.download_latency.to_dict(),
+            "parse_time": self.parse_time.to_dict()
+        }
+
+
+class MetricsWriter(ABC):
+
+    @abstractmethod
+    def write(self, extractions_metrics: Dict[str, ExtractionMetrics]):
+        """
+        :param extractions_metrics: metrics by the extractions titles
+        """
+        pass
+
+
+class JsonFileMetricsWriter(MetricsWriter):
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def write(self, extractions_metrics: Dict[str, ExtractionMetrics]):
+        with open_atomically(self.file_path, "w") as f:
+            json.dump({title: metrics.to_dict() for title, metrics in extractions_metrics.items()}, f, indent=4)
+
+
+class PrometheusTextFileMetricsWriter(MetricsWriter):
+    """
+    Writes the metrics in the Prometheus text format, for the textfile collector of the node exporter.
+    """
+
+    PREFIX = "rolba_extraction_"
+
+    GAUGES = [
+        ("wall_time_seconds", "Wall time of the crawl", lambda metrics: metrics.wall_time),
+        ("pages", "Count of the downloaded pages", lambda metrics: metrics.pages_count),
+        ("not_modified_pages", "Count of the not modified pages", lambda metrics: metrics.not_modified_pages_count),
+        ("response_bytes", "Size of the downloaded responses", lambda metrics: metrics.response_bytes),
+        ("items", "Count of the extracted records", lambda metrics: metrics.items_count),
+        ("items_per_second", "Extracted records per second", lambda metrics: metrics.get_items_per_second()),
+        ("invalid_items", "Count of the dropped invalid records", lambda metrics: metrics.invalid_items_count),
+        ("retries", "Count of the retried requests", lambda metrics: metrics.retries_count),
+        ("cancelled_requests", "Count of the cancelled requests", lambda metrics: metrics.cancelled_requests_count),
+        ("download_errors", "Count of the failed downloads", lambda metrics: metrics.download_errors_count),
+        ("failed_pages", "Count of the pages failing to download", lambda metrics: metrics.failed_pages_count),
+        ("errors", "Count of the logged errors", lambda metrics: metrics.errors_count),
+        ("crashed", "Whether the extraction has crashed", lambda metrics: int(metrics.is_crashed)),
+        ("incomplete", "Whether the crawl has been stopped early", lambda metrics: int(metrics.is_incomplete)),
+        ("timed_out", "Whether the crawl has exceeded its budget", lambda metrics: int(metrics.is_timed_out)),
+        ("skipped", "Whether the extraction has been skipped", lambda metrics: int(metrics.is_skipped))
+    ]
+
+    HISTOGRAMS = [
+        ("download_latency_seconds", "Download latency of the pages", lambda metrics: metrics.download_latency),
+        ("parse_time_seconds", "Parse time of the pages", lambda metrics: metrics.parse_time)
+    ]
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def write(self, extractions_metrics: Dict[str, ExtractionMetrics]):
+        lines = []
+        for (name, description, get_value) in self.GAUGES:
+            lines.append(f"# HELP {self.PREFIX}{name} {description}")
+            lines.append(f"# TYPE {self.PREFIX}{name} gauge")
+            for title, metrics in extractions_metrics.items():
+                lines.append(f"{self.PREFIX}{name}{{extraction=\"{self._escape(title)}\"}} {get_value(metrics)}")
+        for (name, description, get_histogram) in self.HISTOGRAMS:
+            lines.append(f"# HELP {self.PREFIX}{name} {description}")
+            lines.append(f"# TYPE {self.PREFIX}{name} histogram")
+            for title, metrics in extractions_metrics.items():
+                histogram = get_histogram(metrics)
+                label = f"extraction=\"{self._escape(title)}\""
+                for bucket, count in histogram.get_cumulative_counts():
+                    le = "+Inf" if math.isinf(bucket) else str(bucket)
+                    lines.append(f"{self.PREFIX}{name}_bucket{{{label},le=\"{le}\"}} {count}")
+                lines.append(f"{self.PREFIX}{name}_sum{{{label}}} {histogram.sum}")
+                lines.append(f"{self.PREFIX}{name}_count{{{label}}} {histogram.count}")
+        with open_atomically(self.file_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def _escape(label_value: str) -> str:
+        return label_value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
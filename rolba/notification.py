@@ -1,56 +1,181 @@
-from typing import Tuple, List
+from typing import Dict, Tuple, List, Optional, Set
 from abc import ABC, abstractmethod
-from rolba.record import RecordsCollection, VinylRecord
+from rolba.record import VinylRecord
+from rolba.diff import RecordsChangeSet
 from rolba.email import EmailMessage, EmailSender
+from rolba.matching import RecordsMatchingIndex, KeywordsAutomaton, get_name_words
 
 
 class RecordsCollectionsNotifier(ABC):
 
     @abstractmethod
-    def send_notification(self, records_collections: List[Tuple[str, RecordsCollection]]):
+    def send_notification(self, records_changesets: List[Tuple[str, RecordsChangeSet]]):
         pass
 
 
+class SubscribersWatchlists:
+    """
+    Keywords (e.g. artists) and price ceilings the subscribers watch. All the keywords are matched
+    by one automaton, so each record name is scanned once however many keywords are watched.
+    """
+
+    def __init__(self, watchlists: Dict[str, List[Tuple[str, Optional[float]]]]):
+        """
+        :param watchlists: keywords and price ceilings (None for any price) by the subscribers emails
+        """
+        keywords = []
+        # Watching subscribers and their price ceilings by the indexes of the keywords
+        self.keywords_watches: List[List[Tuple[str, Optional[float]]]] = []
+        keywords_indexes: Dict[str, int] = {}
+        for email, watchlist in watchlists.items():
+            for keyword, max_price in watchlist:
+                folded_keyword = " ".join(get_name_words(keyword))
+                if folded_keyword not in keywords_indexes:
+                    keywords_indexes[folded_keyword] = len(keywords)
+                    keywords.append(keyword)
+                    self.keywords_watches.append([])
+                self.keywords_watches[keywords_indexes[folded_keyword]].append((email, max_price))
+        self.emails = set(watchlists)
+        self.automaton = KeywordsAutomaton(keywords)
+
+    def has_watchlist(self, email: str) -> bool:
+        return email in self.emails
+
+    def get_watchers(self, record: VinylRecord) -> Set[str]:
+        """
+        :return: emails of the subscribers watching the record at its price
+        """
+        watchers = set()
+        for keyword_index in self.automaton.find(record.get_name()):
+            for email, max_price in self.keywords_watches[keyword_index]:
+                if max_price is None or record.get_price() <= max_price:
+                    watchers.add(email)
+        return watchers
+
+
 class EmailVinylRecordsCollectionsNotifier(RecordsCollectionsNotifier):
 
-    def __init__(self, email_sender: EmailSender, subscribers_emails: [str], email_subject: str):
+    def __init__(
+            self,
+            email_sender: EmailSender,
+            subscribers_emails: [str],
+            email_subject: str,
+            records_matching_index: RecordsMatchingIndex = None,
+            subscribers_watchlists: SubscribersWatchlists = None
+    ):
+        """
+        :param records_matching_index: the new records are listed with the cheapest listing of the same release
+                                       at the other shops
+        :param subscribers_watchlists: the subscribers with the watchlist are notified only of the new records
+                                       and the price drops they watch, the others of all the changes
+        """
         super().__init__()
         self.email_sender = email_sender
         self.subscribers_emails = subscribers_emails
         self.email_subject = email_subject
+        self.records_matching_index = records_matching_index
+        self.subscribers_watchlists = subscribers_watchlists
+
+    def send_notification(self, records_changesets: List[Tuple[str, RecordsChangeSet]]):
+        if not self.subscribers_watchlists:
+            self._send_email(records_changesets, self.subscribers_emails)
+            return
+        unfiltered_subscribers_emails = [
+            email for email in self.subscribers_emails if not self.subscribers_watchlists.has_watchlist(email)
+        ]
+        if unfiltered_subscribers_emails:
+            self._send_email(records_changesets, unfiltered_subscribers_emails)
+        watched_records_changesets = self._get_watched_records_changesets(records_changesets)
+        for email in self.subscribers_emails:
+            # The subscriber isn't notified when nothing watched has changed
+            if email in watched_records_changesets:
+                self._send_email(list(watched_records_changesets[email].items()), [email])
 
-    def send_notification(self, records_collections: List[Tuple[str, RecordsCollection]]):
+    def _send_email(self, records_changesets: List[Tuple[str, RecordsChangeSet]], subscribers_emails: [str]):
         self.email_sender.send_email(
             EmailMessage(
                 subject=self.email_subject,
-                body=self._get_email_message(records_collections)
+                body=self._get_email_message(records_changesets)
             ),
-            self.subscribers_emails
+            subscribers_emails
         )
 
-    @staticmethod
-    def _get_email_message(records_collections: List[Tuple[str, RecordsCollection]]) -> str:
+    def _get_watched_records_changesets(self, records_changesets: List[Tuple[str, RecordsChangeSet]]) \
+            -> Dict[str, Dict[str, RecordsChangeSet]]:
+        """
+        :return: changesets of the new records and the price drops by the collections names by the emails
+                 of their watchers
+        """
+        watched_records_changesets: Dict[str, Dict[str, RecordsChangeSet]] = {}
+
+        def get_watched_changeset(email: str, collection_name: str) -> RecordsChangeSet:
+            return watched_records_changesets.setdefault(email, {}).setdefault(collection_name, RecordsChangeSet())
+        for collection_name, changeset in records_changesets:
+            for record in changeset.get_added():
+                for email in self.subscribers_watchlists.get_watchers(record):
+                    get_watched_changeset(email, collection_name).added.add_record(record)
+            for saved_record, new_record in changeset.get_price_decreased():
+                for email in self.subscribers_watchlists.get_watchers(new_record):
+                    get_watched_changeset(email, collection_name).price_decreased.append((saved_record, new_record))
+        return watched_records_changesets
+
+    def _get_email_message(self, records_changesets: List[Tuple[str, RecordsChangeSet]]) -> str:
         message = """
         <html>
             <body>
                 <h1>Vinyl Records Notification</h1>
         """
-        for collection_name, collection in records_collections:
+        for collection_name, changeset in records_changesets:
             message += f"<h2>{collection_name}</h2>"
-            if len(collection):
-                message += "<ul>"
-                vinyl_records: [VinylRecord] = collection.get_records()
-                for record in vinyl_records:
-                    message += f"""
-                        <li>
-                            <a href='{record.get_link()}'>{record.get_name()}</a> | {round(record.get_price())} Kč
-                        </li>
-                    """
-                message += "</ul>"
+            if len(changeset):
+                message += self._get_records_list_message("New records", changeset.get_added(), collection_name)
+                message += self._get_price_changes_list_message("Price drops", changeset.get_price_decreased())
+                message += self._get_price_changes_list_message("Price increases", changeset.get_price_increased())
+                message += self._get_records_list_message("Removed records", changeset.get_removed())
             else:
-                message += "<p>No new records</p>"
+                message += "<p>No changes</p>"
         message += """
             </body>
         </html>
         """
         return message
+
+    def _get_records_list_message(self, title: str, vinyl_records: [VinylRecord], collection_name: str = None) -> str:
+        """
+        :param collection_name: shop of the records, they are listed with the cheaper listings at the other shops
+        """
+        if not len(vinyl_records):
+            return ""
+        message = f"<h3>{title}</h3><ul>"
+        for record in vinyl_records:
+            message += f"""
+                <li>
+                    <a href='{record.get_link()}'>{record.get_name()}</a> | {round(record.get_price())} Kč
+                    {self._get_cheapest_match_message(record, collection_name)}
+                </li>
+            """
+        return message + "</ul>"
+
+    def _get_cheapest_match_message(self, record: VinylRecord, collection_name: str = None) -> str:
+        if not self.records_matching_index or not collection_name:
+            return ""
+        cheapest_match = self.records_matching_index.get_cheapest_match(record, collection_name)
+        if not cheapest_match or cheapest_match[1].get_price() >= record.get_price():
+            return ""
+        match_collection_name, match_record = cheapest_match
+        return f"| cheapest at <a href='{match_record.get_link()}'>{match_collection_name}</a>" \
+               f" for {round(match_record.get_price())} Kč"
+
+    @staticmethod
+    def _get_price_changes_list_message(title: str, price_changes: List[Tuple[VinylRecord, VinylRecord]]) -> str:
+        if not price_changes:
+            return ""
+        message = f"<h3>{title}</h3><ul>"
+        for saved_record, new_record in price_changes:
+            message += f"""
+                <li>
+                    <a href='{new_record.get_link()}'>{new_record.get_name()}</a> |
+                    {round(saved_record.get_price())} Kč &rarr; {round(new_record.get_price())} Kč
+                </li>
+            """
+        return message + "</ul>"
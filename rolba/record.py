@@ -1,14 +1,23 @@
+import sys
 import jsonschema
 from abc import ABC, abstractmethod
-from typing import Dict
+from array import array
+from typing import Dict, Iterator, List, Set, Tuple
+from rolba.schema import create_json_schema_validator
 
 
 class Record(ABC):
 
+    __slots__ = ()
+
     @abstractmethod
     def __eq__(self, other: "Record") -> bool:
         pass
 
+    @abstractmethod
+    def __hash__(self) -> int:
+        pass
+
     @abstractmethod
     def __str__(self) -> str:
         pass
@@ -16,6 +25,8 @@ class Record(ABC):
 
 class VinylRecord(Record):
 
+    __slots__ = ("name", "price", "link")
+
     def __init__(self, name: str, price: float, link: str):
         self.name = name
         self.price = price
@@ -24,6 +35,13 @@ class VinylRecord(Record):
     def __eq__(self, other: "VinylRecord") -> bool:
         return self.name == other.name and self.price == other.price and self.link == other.link
 
+    def __hash__(self) -> int:
+        return hash(self.get_identity())
+
+    def __reduce__(self) -> tuple:
+        # Compact pickling of the records sent between the processes
+        return VinylRecord, self.get_identity()
+
     def __str__(self) -> str:
         return f"{self.name} | {round(self.price)} Kč"
 
@@ -36,6 +54,9 @@ class VinylRecord(Record):
     def get_link(self) -> str:
         return self.link
 
+    def get_identity(self) -> Tuple[str, float, str]:
+        return self.name, self.price, self.link
+
 
 class RecordFactory(ABC):
 
@@ -43,6 +64,12 @@ class RecordFactory(ABC):
     def create_from_dict(self, dict_record: dict) -> Record:
         pass
 
+    def create_many(self, dict_records: [dict]) -> [Record]:
+        return [self.create_from_dict(dict_record) for dict_record in dict_records]
+
+    def create_collection(self) -> "BaseRecordsCollection":
+        return RecordsCollection()
+
 
 class VinylRecordFactory(RecordFactory):
 
@@ -65,16 +92,41 @@ class VinylRecordFactory(RecordFactory):
         "required": ["name", "price", "link"]
     }
 
+    VALIDATOR = create_json_schema_validator(SCHEMA)
+
+    LIST_VALIDATOR = create_json_schema_validator({"type": "array", "items": SCHEMA})
+
     def create_from_dict(self, dict_record: dict) -> Record:
         try:
-            jsonschema.validate(dict_record, self.SCHEMA)
-            return VinylRecord(
-                name=dict_record["name"],
-                price=dict_record["price"],
-                link=dict_record["link"]
-            )
-        except jsonschema.ValidationError:
-            raise InvalidJsonSchemaError(dict_record)
+            self.VALIDATOR.validate(dict_record)
+            return self._create_record(dict_record)
+        except jsonschema.ValidationError as e:
+            raise InvalidJsonSchemaError(dict_record, e.message)
+
+    def create_many(self, dict_records: [dict]) -> [Record]:
+        """
+        Validates the whole list in one go, the records are validated one by one
+        only if it fails, to find the invalid one.
+
+        :raises InvalidJsonSchemaError: for the first invalid record
+        """
+        if not self.LIST_VALIDATOR.is_valid(dict_records):
+            if not isinstance(dict_records, list):
+                raise InvalidJsonSchemaError(dict_records)
+            for dict_record in dict_records:
+                self.create_from_dict(dict_record)
+        return [self._create_record(dict_record) for dict_record in dict_records]
+
+    def create_collection(self) -> "VinylRecordsCollection":
+        return VinylRecordsCollection()
+
+    @staticmethod
+    def _create_record(dict_record: dict) -> VinylRecord:
+        return VinylRecord(
+            name=dict_record["name"],
+            price=dict_record["price"],
+            link=dict_record["link"]
+        )
 
 
 class RecordDictMapper(ABC):
@@ -94,47 +146,127 @@ class VinylRecordDictMapper(RecordDictMapper):
         }
 
 
-class RecordsCollection:
+class BaseRecordsCollection(ABC):
+    """
+    Collection of the unique records, the storage is up to the subclasses.
+    """
+
+    @abstractmethod
+    def add_record(self, record: Record) -> "BaseRecordsCollection":
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Record]:
+        pass
+
+    @abstractmethod
+    def __contains__(self, item: Record) -> bool:
+        pass
+
+    def get_records(self) -> [Record]:
+        return list(self)
+
+    def __eq__(self, other: "BaseRecordsCollection") -> bool:
+        if len(self) != len(other):
+            return False
+        for record in self:
+            if record not in other:
+                return False
+        return True
+
+    def __sub__(self, other: "BaseRecordsCollection") -> "BaseRecordsCollection":
+        self_hash_map = self._get_records_hash_map()
+        other_hash_map = other._get_records_hash_map()
+        diff_collection = self.__class__()
+        for record_hash, record in self_hash_map.items():
+            if record_hash not in other_hash_map:
+                diff_collection.add_record(record)
+        return diff_collection
+
+    def _get_records_hash_map(self) -> Dict[str, Record]:
+        return {str(record): record for record in self}
+
+
+class RecordsCollection(BaseRecordsCollection):
 
     def __init__(self):
         self.records: [Record] = []
+        # Hash index of the records, keeps the membership check constant
+        self.records_index: Set[Record] = set()
 
     def get_records(self) -> [Record]:
         return self.records
 
     def add_record(self, record: Record) -> "RecordsCollection":
-        if record not in self:
+        if record not in self.records_index:
+            self.records_index.add(record)
             self.records.append(record)
         return self
 
     def __len__(self) -> int:
         return len(self.records)
 
-    def __eq__(self, other: "RecordsCollection") -> bool:
-        if len(self.records) != len(other.get_records()):
-            return False
-        for record in self.records:
-            if record not in other:
-                return False
-        return True
+    def __iter__(self) -> Iterator[Record]:
+        return iter(self.records)
 
     def __contains__(self, item: Record) -> bool:
-        for record in self.records:
-            if record == item:
+        return item in self.records_index
+
+
+class VinylRecordsCollection(BaseRecordsCollection):
+    """
+    Columnar collection of the vinyl records.
+
+    Names and links are kept interned (so the crawled and the saved collections share them)
+    and prices are packed in a typed array. Records are materialized only on access.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.prices = array("d")
+        self.links: List[str] = []
+        # The first row of each link, rows of other records sharing the link are kept aside
+        self.links_index: Dict[str, int] = {}
+        self.shared_links_rows: Dict[str, List[int]] = {}
+
+    def add_record(self, record: VinylRecord) -> "VinylRecordsCollection":
+        if record in self:
+            return self
+        link = sys.intern(record.get_link())
+        row = len(self.links)
+        if link in self.links_index:
+            self.shared_links_rows.setdefault(link, []).append(row)
+        else:
+            self.links_index[link] = row
+        self.names.append(sys.intern(record.get_name()))
+        self.prices.append(record.get_price())
+        self.links.append(link)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    def __iter__(self) -> Iterator[VinylRecord]:
+        for row in range(len(self.links)):
+            yield self._get_record(row)
+
+    def __contains__(self, item: VinylRecord) -> bool:
+        row = self.links_index.get(item.get_link())
+        if row is None:
+            return False
+        if self._get_record(row) == item:
+            return True
+        for shared_link_row in self.shared_links_rows.get(item.get_link(), []):
+            if self._get_record(shared_link_row) == item:
                 return True
         return False
 
-    def __sub__(self, other: "RecordsCollection") -> "RecordsCollection":
-        self_hash_map = self._get_records_hash_map()
-        other_hash_map = other._get_records_hash_map()
-        diff_collection = RecordsCollection()
-        for record_hash, record in self_hash_map.items():
-            if record_hash not in other_hash_map:
-                diff_collection.add_record(record)
-        return diff_collection
-
-    def _get_records_hash_map(self) -> Dict[str, Record]:
-        return {str(record): record for record in self.records}
+    def _get_record(self, row: int) -> VinylRecord:
+        return VinylRecord(self.names[row], self.prices[row], self.links[row])
 
 
 class RecordFactoryException(Exception):
@@ -143,8 +275,11 @@ class RecordFactoryException(Exception):
 
 class InvalidJsonSchemaError(RecordFactoryException):
 
-    def __init__(self, given_json: dict):
+    def __init__(self, given_json: dict, reason: str = None):
         self.given_json = given_json
+        self.reason = reason
 
     def __str__(self) -> str:
+        if self.reason:
+            return f"Invalid json has been given: {self.given_json} ({self.reason})"
         return f"Invalid json has been given: {self.given_json}"
@@ -1,22 +1,73 @@
 import os
+import re
+import sys
 import json
+import mmap
+import struct
+import sqlite3
+import tempfile
+import threading
+from array import array
 from abc import ABC, abstractmethod
-from rolba.record import RecordsCollection, RecordFactory, RecordDictMapper
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from rolba.record import Record, BaseRecordsCollection, RecordFactory, RecordDictMapper
+from rolba.diff import RecordsChangeSet, RecordsCollectionsDiffer
+
+
+@contextmanager
+def open_atomically(file_path: str, mode: str):
+    """
+    Writes to a temporary file renamed to the given path on success,
+    so the file is always either the old or the complete new one.
+    """
+    file_descriptor, temp_file_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(file_path)),
+        suffix=".tmp"
+    )
+    try:
+        with os.fdopen(file_descriptor, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file_path, file_path)
+    except BaseException:
+        os.remove(temp_file_path)
+        raise
 
 
 class RecordsRepository(ABC):
 
     @abstractmethod
-    def save_records(self, records: RecordsCollection):
+    def save_records(self, records: BaseRecordsCollection):
         pass
 
     @abstractmethod
-    def load_records(self) -> RecordsCollection:
+    def load_records(self) -> BaseRecordsCollection:
         pass
 
+    def iter_records(self) -> Iterator[Record]:
+        return iter(self.load_records())
+
+    def get_changeset(self, records: BaseRecordsCollection, records_collections_differ: RecordsCollectionsDiffer) \
+            -> RecordsChangeSet:
+        return records_collections_differ.get_changeset(records, self.iter_records())
+
+    def is_changeset_in_storage(self, records_collections_differ: RecordsCollectionsDiffer) -> bool:
+        """
+        :return: whether the changeset is computed by the storage, so the saved records needn't be loaded for it
+        """
+        return False
+
 
 class JsonFileRecordsRepository(RecordsRepository):
 
+    READ_CHUNK_SIZE = 65536
+
+    LOAD_BATCH_SIZE = 1000
+
+    VALUE_DELIMITER_PATTERN = re.compile(r"[\s,:\[\]{}\"]")
+
     def __init__(self, file_path: str, record_factory: RecordFactory, record_dict_mapper: RecordDictMapper):
         self.file_path = file_path
         self.record_factory = record_factory
@@ -24,31 +75,620 @@ class JsonFileRecordsRepository(RecordsRepository):
         # Ensuring the directory existence
         os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
 
-    def save_records(self, records: RecordsCollection):
+    def save_records(self, records: BaseRecordsCollection):
+        # Records are serialized one by one, so the whole mapped list is never held in memory
         with open(self.file_path, "w") as f:
-            f.write(
-                json.dumps(
-                    [self.record_dict_mapper.get_mapped_record(r) for r in records.get_records()]
-                )
-            )
+            f.write("[")
+            for i, record in enumerate(records):
+                if i:
+                    f.write(", ")
+                f.write(json.dumps(self.record_dict_mapper.get_mapped_record(record)))
+            f.write("]")
+
+    def load_records(self) -> BaseRecordsCollection:
+        """
+        :raises InvalidJsonError: if the file contains an invalid JSON
+        :raises RecordFactoryException: if the record creation fails
+        """
+        records_collection = self.record_factory.create_collection()
+        for record in self.iter_records():
+            records_collection.add_record(record)
+        return records_collection
 
-    def load_records(self) -> RecordsCollection:
+    def iter_records(self) -> Iterator[Record]:
         """
+        Parses the file incrementally, only one chunk of the file
+        and one batch of the records are held in memory at once.
+
         :raises InvalidJsonError: if the file contains an invalid JSON
         :raises RecordFactoryException: if the record creation fails
         """
-        records_collection = RecordsCollection()
         if not os.path.isfile(self.file_path):
-            return records_collection
+            return
+        batch: List[dict] = []
+        with open(self.file_path) as f:
+            for dict_record in self._iter_json_array_items(f):
+                batch.append(dict_record)
+                if len(batch) == self.LOAD_BATCH_SIZE:
+                    yield from self.record_factory.create_many(batch)
+                    batch = []
+        yield from self.record_factory.create_many(batch)
+
+    def _iter_json_array_items(self, f) -> Iterator:
+        decoder = json.JSONDecoder()
+        buffer = ""
+        position = 0
+        is_eof = False
+        # The next expected token: the array start, an item (or the array end) or a separator (or the array end)
+        expected = "["
+        while True:
+            # Skipping whitespaces, reading more data when the buffer is exhausted
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position == len(buffer):
+                if is_eof:
+                    raise InvalidJsonError
+                buffer = f.read(self.READ_CHUNK_SIZE)
+                position = 0
+                is_eof = buffer == ""
+                continue
+            character = buffer[position]
+            if expected == "[":
+                if character != "[":
+                    raise InvalidJsonError
+                expected = "item"
+                position += 1
+            elif character == "]" and expected != "next item":
+                if buffer[position + 1:].strip() or f.read().strip():
+                    raise InvalidJsonError
+                return
+            elif expected == "separator":
+                if character != ",":
+                    raise InvalidJsonError
+                expected = "next item"
+                position += 1
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                    # A value cut by the buffer end (e.g. a number) may continue in the next chunk
+                    if not is_eof and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                        raise json.JSONDecodeError("Incomplete value", buffer, end)
+                except json.JSONDecodeError as e:
+                    # Only the value cut by the buffer end is read on, the invalid one fails at once
+                    if is_eof or not self._is_cut_by_buffer_end(e):
+                        raise InvalidJsonError
+                    chunk = f.read(self.READ_CHUNK_SIZE)
+                    is_eof = chunk == ""
+                    buffer = buffer[position:] + chunk
+                    position = 0
+                    continue
+                yield item
+                expected = "separator"
+                position = end
+
+    @classmethod
+    def _is_cut_by_buffer_end(cls, error: json.JSONDecodeError) -> bool:
+        """
+        :return: whether the decoding has failed on the value running to the end of the buffer, e.g. the unterminated
+                 string or the number, literal or escape without any delimiter after it
+        """
+        if error.msg.startswith("Unterminated string"):
+            return True
+        return not cls.VALUE_DELIMITER_PATTERN.search(error.doc, error.pos)
+
+
+class JsonLinesFileRecordsRepository(RecordsRepository):
+    """
+    Append-only repository storing one JSON change per line.
+
+    Every save appends only the added and removed records, the log is rewritten
+    to the current records (compacted) in the background once it holds more than
+    the compaction threshold of changes. Interrupted append leaves at most one
+    truncated last line, which is ignored on load.
+    """
+
+    ADD_OPERATION = "add"
+
+    REMOVE_OPERATION = "remove"
+
+    LOAD_BATCH_SIZE = 1000
+
+    def __init__(
+            self,
+            file_path: str,
+            record_factory: RecordFactory,
+            record_dict_mapper: RecordDictMapper,
+            compaction_threshold: int = 10000
+    ):
+        self.file_path = file_path
+        self.record_factory = record_factory
+        self.record_dict_mapper = record_dict_mapper
+        self.compaction_threshold = compaction_threshold
+        # Insertion ordered set of the stored records, filled on the first access
+        self.records_index: Optional[Dict[Record, None]] = None
+        self.changes_count = 0
+        self.compaction_thread: Optional[threading.Thread] = None
+        # Ensuring the directory existence
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+    def save_records(self, records: BaseRecordsCollection):
+        self.wait_for_compaction()
+        records_index = self._get_records_index()
+        if not os.path.isfile(self.file_path):
+            for record in records:
+                records_index[record] = None
+            self._compact(list(records_index))
+            return
+        changes: List[Tuple[str, Record]] = [
+            (self.REMOVE_OPERATION, record) for record in records_index if record not in records
+        ]
+        changes += [
+            (self.ADD_OPERATION, record) for record in records if record not in records_index
+        ]
+        if not changes:
+            return
+        with open(self.file_path, "a") as f:
+            f.write("".join(self._get_change_line(operation, record) for operation, record in changes))
+            f.flush()
+            os.fsync(f.fileno())
+        for operation, record in changes:
+            if operation == self.ADD_OPERATION:
+                records_index[record] = None
+            else:
+                del records_index[record]
+        self.changes_count += len(changes)
+        if self.changes_count > self.compaction_threshold:
+            self.compaction_thread = threading.Thread(target=self._compact, args=(list(records_index),))
+            self.compaction_thread.start()
+
+    def load_records(self) -> BaseRecordsCollection:
+        """
+        :raises InvalidJsonLineError: if the file contains an invalid JSON line
+        :raises RecordFactoryException: if the record creation fails
+        """
+        self.wait_for_compaction()
+        records_collection = self.record_factory.create_collection()
+        for record in self._get_records_index():
+            records_collection.add_record(record)
+        return records_collection
+
+    def wait_for_compaction(self):
+        if self.compaction_thread:
+            self.compaction_thread.join()
+            self.compaction_thread = None
+
+    def _get_records_index(self) -> Dict[Record, None]:
+        if self.records_index is None:
+            self.records_index = {}
+            if os.path.isfile(self.file_path):
+                self._load_records_index()
+        return self.records_index
+
+    def _load_records_index(self):
+        is_truncated = False
+        changes_count = 0
+        batch: List[Tuple[str, dict]] = []
+        with open(self.file_path) as f:
+            for line_number, line in enumerate(f, 1):
+                # Only the last line may miss the line end, if the append has been interrupted
+                is_truncated = not line.endswith("\n")
+                try:
+                    change = json.loads(line)
+                    if change["op"] not in (self.ADD_OPERATION, self.REMOVE_OPERATION):
+                        raise InvalidJsonLineError(line_number)
+                    batch.append((change["op"], change["record"]))
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    if is_truncated:
+                        break
+                    raise InvalidJsonLineError(line_number)
+                if len(batch) == self.LOAD_BATCH_SIZE:
+                    changes_count += self._apply_changes(batch)
+                    batch = []
+        changes_count += self._apply_changes(batch)
+        self.changes_count = changes_count - len(self.records_index)
+        if is_truncated:
+            self._compact(list(self.records_index))
+
+    def _apply_changes(self, changes: List[Tuple[str, dict]]) -> int:
+        records = self.record_factory.create_many([dict_record for _, dict_record in changes])
+        for (operation, _), record in zip(changes, records):
+            if operation == self.ADD_OPERATION:
+                self.records_index[record] = None
+            else:
+                self.records_index.pop(record, None)
+        return len(changes)
+
+    def _compact(self, records: List[Record]):
+        with open_atomically(self.file_path, "w") as f:
+            for record in records:
+                f.write(self._get_change_line(self.ADD_OPERATION, record))
+        self.changes_count = 0
+
+    def _get_change_line(self, operation: str, record: Record) -> str:
+        return json.dumps({"op": operation, "record": self.record_dict_mapper.get_mapped_record(record)}) + "\n"
+
+
+class SqliteRecordsRepository(RecordsRepository):
+    """
+    Repository storing the records of one shop in one table of the SQLite database,
+    several repositories (shops) may share the database file.
+
+    The changeset is computed by set based queries joining on the indexed link.
+    """
+
+    TABLE_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+    FETCH_SIZE = 1000
+
+    def __init__(
+            self,
+            file_path: str,
+            table_name: str,
+            record_factory: RecordFactory,
+            record_dict_mapper: RecordDictMapper
+    ):
+        if not self.TABLE_NAME_PATTERN.match(table_name):
+            raise InvalidTableNameError(table_name)
+        self.file_path = file_path
+        self.table_name = table_name
+        self.record_factory = record_factory
+        self.record_dict_mapper = record_dict_mapper
+        # Ensuring the directory existence
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        self.connection = sqlite3.connect(file_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self._create_records_table(self.table_name)
+
+    def save_records(self, records: BaseRecordsCollection):
+        with self.connection:
+            self.connection.execute(f"DELETE FROM {self.table_name}")
+            self._insert_records(self.table_name, records)
+
+    def load_records(self) -> BaseRecordsCollection:
+        """
+        :raises RecordFactoryException: if the record creation fails
+        """
+        records_collection = self.record_factory.create_collection()
+        for record in self.iter_records():
+            records_collection.add_record(record)
+        return records_collection
+
+    def iter_records(self) -> Iterator[Record]:
+        """
+        :raises RecordFactoryException: if the record creation fails
+        """
+        return self._select_records(f"SELECT name, price, link FROM {self.table_name} ORDER BY position")
+
+    def get_changeset(self, records: BaseRecordsCollection, records_collections_differ: RecordsCollectionsDiffer) \
+            -> RecordsChangeSet:
+        """
+        The changes are keyed on the record link, only the first record of each link is compared, as the differ does.
+        The differ keyed otherwise diffs the streamed saved records itself.
+        """
+        if not self.is_changeset_in_storage(records_collections_differ):
+            return super().get_changeset(records, records_collections_differ)
+        changeset = RecordsChangeSet()
+        new_table_name = f"new_{self.table_name}"
+        saved_rows = self._get_first_link_rows_query(self.table_name)
+        new_rows = self._get_first_link_rows_query(new_table_name)
         try:
-            with open(self.file_path) as f:
-                for record in json.load(f):
-                    records_collection.add_record(
-                        self.record_factory.create_from_dict(record)
-                    )
-            return records_collection
-        except json.JSONDecodeError:
-            raise InvalidJsonError
+            with self.connection:
+                # The table left by the failed call of the connection isn't reused
+                self.connection.execute(f"DROP TABLE IF EXISTS temp.{new_table_name}")
+                self._create_records_table(new_table_name, is_temporary=True)
+                self._insert_records(new_table_name, records)
+            for record in self._select_records(
+                f"SELECT name, price, link FROM {new_rows} AS n "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {self.table_name} AS s WHERE s.link = n.link) "
+                f"ORDER BY n.position"
+            ):
+                changeset.get_added().add_record(record)
+            for record in self._select_records(
+                f"SELECT name, price, link FROM {saved_rows} AS s "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {new_table_name} AS n WHERE n.link = s.link) "
+                f"ORDER BY s.position"
+            ):
+                changeset.get_removed().add_record(record)
+            for operator, price_changes in (
+                    (">", changeset.get_price_increased()),
+                    ("<", changeset.get_price_decreased())
+            ):
+                rows = self.connection.execute(
+                    f"SELECT s.name, s.price, s.link, n.name, n.price, n.link FROM {saved_rows} AS s "
+                    f"JOIN {new_rows} AS n ON n.link = s.link "
+                    f"WHERE n.price {operator} s.price ORDER BY s.position"
+                ).fetchall()
+                price_changes.extend(zip(
+                    self._create_records([row[:3] for row in rows]),
+                    self._create_records([row[3:] for row in rows])
+                ))
+        finally:
+            with self.connection:
+                self.connection.execute(f"DROP TABLE IF EXISTS temp.{new_table_name}")
+        return changeset
+
+    def is_changeset_in_storage(self, records_collections_differ: RecordsCollectionsDiffer) -> bool:
+        return records_collections_differ.is_keyed_by_link()
+
+    @staticmethod
+    def _get_first_link_rows_query(table_name: str) -> str:
+        return f"(SELECT * FROM {table_name} WHERE position IN (SELECT MIN(position) FROM {table_name} GROUP BY link))"
+
+    def _create_records_table(self, table_name: str, is_temporary: bool = False):
+        self.connection.execute(
+            f"CREATE {'TEMPORARY ' if is_temporary else ''}TABLE IF NOT EXISTS {table_name} ("
+            f"position INTEGER PRIMARY KEY, name TEXT NOT NULL, price REAL NOT NULL, link TEXT NOT NULL)"
+        )
+        self.connection.execute(f"CREATE INDEX IF NOT EXISTS {table_name}_link ON {table_name} (link)")
+
+    def _insert_records(self, table_name: str, records: BaseRecordsCollection):
+        self.connection.executemany(
+            f"INSERT INTO {table_name} (name, price, link) VALUES (:name, :price, :link)",
+            (self.record_dict_mapper.get_mapped_record(record) for record in records)
+        )
+
+    def _select_records(self, query: str) -> Iterator[Record]:
+        cursor = self.connection.execute(query)
+        rows = cursor.fetchmany(self.FETCH_SIZE)
+        while rows:
+            yield from self._create_records(rows)
+            rows = cursor.fetchmany(self.FETCH_SIZE)
+
+    def _create_records(self, rows: List[tuple]) -> List[Record]:
+        return self.record_factory.create_many(
+            [{"name": name, "price": price, "link": link} for name, price, link in rows]
+        )
+
+
+class BinaryFileRecordsRepository(RecordsRepository):
+    """
+    Repository storing the records in the compact binary snapshot:
+    header | link prefixes | records | prices | strings
+
+    Links are split to the shared prefix (the shop URL) and the suffix, equal strings are stored once
+    and the prices are packed as doubles. The records are decoded lazily from the memory mapped file.
+    """
+
+    LOAD_BATCH_SIZE = 1000
+
+    def __init__(self, file_path: str, record_factory: RecordFactory, record_dict_mapper: RecordDictMapper):
+        self.file_path = file_path
+        self.record_factory = record_factory
+        self.record_dict_mapper = record_dict_mapper
+        # Ensuring the directory existence
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+    def save_records(self, records: BaseRecordsCollection):
+        strings = bytearray()
+        strings_references: Dict[str, Tuple[int, int]] = {}
+        prefixes_indexes: Dict[str, int] = {}
+        prefixes_table = bytearray()
+        records_table = bytearray()
+        prices = array("d")
+
+        def get_string_reference(value: str) -> Tuple[int, int]:
+            if value not in strings_references:
+                encoded_value = value.encode()
+                strings_references[value] = (len(strings), len(encoded_value))
+                strings.extend(encoded_value)
+            return strings_references[value]
+
+        for record in records:
+            dict_record = self.record_dict_mapper.get_mapped_record(record)
+            link_prefix, link_suffix = self._split_link(dict_record["link"])
+            if link_prefix not in prefixes_indexes:
+                prefixes_indexes[link_prefix] = len(prefixes_indexes)
+                prefixes_table += BinaryRecordsSnapshot.STRING_REFERENCE.pack(*get_string_reference(link_prefix))
+            records_table += BinaryRecordsSnapshot.RECORD.pack(
+                prefixes_indexes[link_prefix],
+                *get_string_reference(link_suffix),
+                *get_string_reference(dict_record["name"])
+            )
+            prices.append(dict_record["price"])
+        if sys.byteorder == "big":
+            prices.byteswap()
+        with open_atomically(self.file_path, "wb") as f:
+            f.write(BinaryRecordsSnapshot.HEADER.pack(
+                BinaryRecordsSnapshot.MAGIC,
+                BinaryRecordsSnapshot.VERSION,
+                len(prices),
+                len(prefixes_indexes),
+                len(strings)
+            ))
+            f.write(prefixes_table)
+            f.write(records_table)
+            f.write(prices.tobytes())
+            f.write(strings)
+
+    def load_records(self) -> BaseRecordsCollection:
+        """
+        :raises InvalidBinarySnapshotError: if the file is not a valid binary snapshot
+        :raises RecordFactoryException: if the record creation fails
+        """
+        records_collection = self.record_factory.create_collection()
+        for record in self.iter_records():
+            records_collection.add_record(record)
+        return records_collection
+
+    def iter_records(self) -> Iterator[Record]:
+        """
+        :raises InvalidBinarySnapshotError: if the file is not a valid binary snapshot
+        :raises RecordFactoryException: if the record creation fails
+        """
+        if not os.path.isfile(self.file_path):
+            return
+        batch: List[dict] = []
+        with BinaryRecordsSnapshot(self.file_path) as snapshot:
+            for dict_record in snapshot.iter_dict_records():
+                batch.append(dict_record)
+                if len(batch) == self.LOAD_BATCH_SIZE:
+                    yield from self.record_factory.create_many(batch)
+                    batch = []
+        yield from self.record_factory.create_many(batch)
+
+    @staticmethod
+    def _split_link(link: str) -> Tuple[str, str]:
+        scheme_end = link.find("://")
+        if scheme_end == -1:
+            return "", link
+        path_start = link.find("/", scheme_end + 3)
+        if path_start == -1:
+            return link, ""
+        return link[:path_start + 1], link[path_start + 1:]
+
+
+class BinaryRecordsSnapshot:
+    """
+    Read-only view of the binary snapshot file, decoding the records on access.
+    """
+
+    MAGIC = b"RLBA"
+
+    VERSION = 1
+
+    # Magic, version, records count, link prefixes count, strings size
+    HEADER = struct.Struct("<4sHIII")
+
+    # Offset and length of the string
+    STRING_REFERENCE = struct.Struct("<II")
+
+    # Link prefix index, link suffix offset and length, name offset and length
+    RECORD = struct.Struct("<IIIII")
+
+    PRICE = struct.Struct("<d")
+
+    def __init__(self, file_path: str):
+        with open(file_path, "rb") as f:
+            try:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file can't be mapped
+                raise InvalidBinarySnapshotError
+        try:
+            magic, version, self.records_count, prefixes_count, strings_size = self.HEADER.unpack_from(self.buffer)
+        except struct.error:
+            self.close()
+            raise InvalidBinarySnapshotError
+        self.records_offset = self.HEADER.size + prefixes_count * self.STRING_REFERENCE.size
+        self.prices_offset = self.records_offset + self.records_count * self.RECORD.size
+        self.strings_offset = self.prices_offset + self.records_count * self.PRICE.size
+        if magic != self.MAGIC or version != self.VERSION or len(self.buffer) != self.strings_offset + strings_size:
+            self.close()
+            raise InvalidBinarySnapshotError
+        self.strings_size = strings_size
+        try:
+            self.prefixes = [
+                self._get_string(
+                    *self.STRING_REFERENCE.unpack_from(self.buffer, self.HEADER.size + i * self.STRING_REFERENCE.size)
+                )
+                for i in range(prefixes_count)
+            ]
+        except InvalidBinarySnapshotError:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.records_count
+
+    def __enter__(self) -> "BinaryRecordsSnapshot":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_dict_record(self, index: int) -> dict:
+        """
+        :raises IndexError: if there isn't the record of the index
+        :raises InvalidBinarySnapshotError: if the record references the string or the prefix out of the snapshot
+        """
+        if not 0 <= index < self.records_count:
+            raise IndexError(index)
+        prefix_index, link_offset, link_length, name_offset, name_length = self.RECORD.unpack_from(
+            self.buffer,
+            self.records_offset + index * self.RECORD.size
+        )
+        if prefix_index >= len(self.prefixes):
+            raise InvalidBinarySnapshotError
+        return {
+            "name": self._get_string(name_offset, name_length),
+            "price": self.PRICE.unpack_from(self.buffer, self.prices_offset + index * self.PRICE.size)[0],
+            "link": self.prefixes[prefix_index] + self._get_string(link_offset, link_length)
+        }
+
+    def iter_dict_records(self) -> Iterator[dict]:
+        """
+        Unpacks the records straight from the mapped file, no table of the snapshot is copied to the memory.
+
+        :raises InvalidBinarySnapshotError: if a record references the string or the prefix out of the snapshot
+        """
+        buffer = self.buffer
+        unpack_record = self.RECORD.unpack_from
+        unpack_price = self.PRICE.unpack_from
+        record_size = self.RECORD.size
+        price_size = self.PRICE.size
+        strings_offset = self.strings_offset
+        strings_size = self.strings_size
+        prefixes = self.prefixes
+        prefixes_count = len(prefixes)
+        for index in range(self.records_count):
+            prefix_index, link_offset, link_length, name_offset, name_length = unpack_record(
+                buffer, self.records_offset + index * record_size
+            )
+            if prefix_index >= prefixes_count or name_offset + name_length > strings_size \
+                    or link_offset + link_length > strings_size:
+                raise InvalidBinarySnapshotError
+            name_start = strings_offset + name_offset
+            link_start = strings_offset + link_offset
+            try:
+                name = buffer[name_start:name_start + name_length].decode()
+                link = prefixes[prefix_index] + buffer[link_start:link_start + link_length].decode()
+            except UnicodeDecodeError:
+                raise InvalidBinarySnapshotError
+            yield {
+                "name": name,
+                "price": unpack_price(buffer, self.prices_offset + index * price_size)[0],
+                "link": link
+            }
+
+    def close(self):
+        self.buffer.close()
+
+    def _get_string(self, offset: int, length: int) -> str:
+        if offset + length > self.strings_size:
+            raise InvalidBinarySnapshotError
+        start = self.strings_offset + offset
+        try:
+            return self.buffer[start:start + length].decode()
+        except UnicodeDecodeError:
+            raise InvalidBinarySnapshotError
+
+
+class CachedRecordsRepository(RecordsRepository):
+    """
+    Keeps the saved records of the wrapped repository in memory, for the long-running process running
+    the extractions repeatedly. The records are loaded once, then only saved.
+    """
+
+    def __init__(self, repository: RecordsRepository):
+        self.repository = repository
+        self.records: Optional[BaseRecordsCollection] = None
+
+    def save_records(self, records: BaseRecordsCollection):
+        self.repository.save_records(records)
+        self.records = records
+
+    def load_records(self) -> BaseRecordsCollection:
+        """
+        :return: the cached collection, it mustn't be modified
+        """
+        if self.records is None:
+            self.records = self.repository.load_records()
+        return self.records
+
+    def iter_records(self) -> Iterator[Record]:
+        return iter(self.load_records())
 
 
 class RecordsRepositoryException(Exception):
@@ -63,3 +703,39 @@ class InvalidJsonError(JsonFileRecordsRepositoryException):
 
     def __str__(self) -> str:
         return "JSON repository file content is not valid"
+
+
+class JsonLinesFileRecordsRepositoryException(RecordsRepositoryException):
+    pass
+
+
+class InvalidJsonLineError(JsonLinesFileRecordsRepositoryException):
+
+    def __init__(self, line_number: int):
+        self.line_number = line_number
+
+    def __str__(self) -> str:
+        return f"JSON lines repository file contains an invalid line ({self.line_number})"
+
+
+class SqliteRecordsRepositoryException(RecordsRepositoryException):
+    pass
+
+
+class InvalidTableNameError(SqliteRecordsRepositoryException):
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+
+    def __str__(self) -> str:
+        return f"SQLite repository table name ({self.table_name}) is not valid"
+
+
+class BinaryFileRecordsRepositoryException(RecordsRepositoryException):
+    pass
+
+
+class InvalidBinarySnapshotError(BinaryFileRecordsRepositoryException):
+
+    def __str__(self) -> str:
+        return "Binary repository file content is not a valid snapshot"
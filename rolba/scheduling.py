@@ -0,0 +1,212 @@
+import os
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+from rolba.repository import open_atomically
+
+
+class FullCrawlSchedule(ABC):
+
+    @abstractmethod
+    def is_full_crawl_due(self, title: str) -> bool:
+        pass
+
+    @abstractmethod
+    def mark_full_crawl_done(self, title: str):
+        pass
+
+
+class JsonFileFullCrawlSchedule(FullCrawlSchedule):
+    """
+    Keeps the time of the last full crawl of each extraction in the JSON file,
+    the full crawl is due once the interval passes since then.
+    """
+
+    def __init__(self, file_path: str, full_crawl_interval: float):
+        """
+        :param full_crawl_interval: seconds between the full crawls
+        """
+        self.file_path = file_path
+        self.full_crawl_interval = full_crawl_interval
+        self.last_full_crawls: Dict[str, float] = {}
+        if os.path.isfile(file_path):
+            try:
+                with open(file_path) as f:
+                    self.last_full_crawls = json.load(f)
+            except json.JSONDecodeError:
+                raise InvalidScheduleFileError(file_path)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+    def is_full_crawl_due(self, title: str) -> bool:
+        return time.time() - self.last_full_crawls.get(title, 0) >= self.full_crawl_interval
+
+    def mark_full_crawl_done(self, title: str):
+        self.last_full_crawls[title] = time.time()
+        with open_atomically(self.file_path, "w") as f:
+            json.dump(self.last_full_crawls, f)
+
+
+class CircuitBreaker(ABC):
+    """
+    Skips the extractions failing repeatedly for a cool-off period, so the shop that is down isn't requested every run.
+    """
+
+    @abstractmethod
+    def is_open(self, title: str) -> bool:
+        """
+        :return: whether the extraction is skipped
+        """
+        pass
+
+    @abstractmethod
+    def record_success(self, title: str):
+        pass
+
+    @abstractmethod
+    def record_failure(self, title: str):
+        pass
+
+
+class JsonFileCircuitBreaker(CircuitBreaker):
+    """
+    Keeps the count of the consecutive failures of each extraction and the time of the last one in the JSON file.
+    Once the cool-off period passes, the extraction is tried again, the circuit is closed by its success
+    and opened again by its failure.
+    """
+
+    def __init__(self, file_path: str, failures_threshold: int, cool_off_period: float):
+        """
+        :param failures_threshold: count of the consecutive failures opening the circuit
+        :param cool_off_period: seconds the extraction is skipped for since its last failure
+        """
+        self.file_path = file_path
+        self.failures_threshold = failures_threshold
+        self.cool_off_period = cool_off_period
+        self.failures: Dict[str, dict] = {}
+        if os.path.isfile(file_path):
+            try:
+                with open(file_path) as f:
+                    self.failures = json.load(f)
+            except json.JSONDecodeError:
+                raise InvalidScheduleFileError(file_path)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+    def is_open(self, title: str) -> bool:
+        if title not in self.failures:
+            return False
+        return self.failures[title]["count"] >= self.failures_threshold \
+            and time.time() - self.failures[title]["last_time"] < self.cool_off_period
+
+    def record_success(self, title: str):
+        if self.failures.pop(title, None):
+            self._save()
+
+    def record_failure(self, title: str):
+        self.failures[title] = {"count": self.failures.get(title, {"count": 0})["count"] + 1, "last_time": time.time()}
+        self._save()
+
+    def _save(self):
+        with open_atomically(self.file_path, "w") as f:
+            json.dump(self.failures, f)
+
+
+class PollingSchedule(ABC):
+
+    @abstractmethod
+    def is_poll_due(self, title: str) -> bool:
+        pass
+
+    @abstractmethod
+    def record_poll(self, title: str, changes_count: int):
+        """
+        :param changes_count: count of the changes the finished extraction has found
+        """
+        pass
+
+
+class JsonFileAdaptivePollingSchedule(PollingSchedule):
+    """
+    Polls each extraction by its change rate, estimated from the changes found by its polls (exponentially
+    weighted, so it follows the changing activity of the shop). The interval aims at the given count
+    of changes per poll within the bounds, the busy shops are polled more often than the quiet ones.
+    The extraction with the unknown rate (not polled twice yet) is polled with the min interval.
+    """
+
+    # Share of the interval the poll may come early by, so it isn't postponed by the whole period of the runs
+    DUE_TOLERANCE = 0.1
+
+    def __init__(
+            self,
+            file_path: str,
+            min_interval: float,
+            max_interval: float,
+            changes_per_poll: float = 1.0,
+            smoothing: float = 0.5
+    ):
+        """
+        :param min_interval: min seconds between the polls
+        :param max_interval: max seconds between the polls
+        :param smoothing: weight of the rate observed by the last poll, from 0 to 1
+        """
+        self.file_path = file_path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.changes_per_poll = changes_per_poll
+        self.smoothing = smoothing
+        self.polls: Dict[str, dict] = {}
+        if os.path.isfile(file_path):
+            try:
+                with open(file_path) as f:
+                    self.polls = json.load(f)
+            except json.JSONDecodeError:
+                raise InvalidScheduleFileError(file_path)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+    def get_interval(self, title: str) -> float:
+        changes_rate = self.get_changes_rate(title)
+        if changes_rate is None:
+            return self.min_interval
+        if changes_rate == 0:
+            return self.max_interval
+        return min(max(self.changes_per_poll / changes_rate, self.min_interval), self.max_interval)
+
+    def get_changes_rate(self, title: str) -> Optional[float]:
+        """
+        :return: estimated changes per second, None if unknown
+        """
+        return self.polls[title]["changes_rate"] if title in self.polls else None
+
+    def is_poll_due(self, title: str) -> bool:
+        if title not in self.polls:
+            return True
+        return time.time() - self.polls[title]["last_time"] >= self.get_interval(title) * (1 - self.DUE_TOLERANCE)
+
+    def record_poll(self, title: str, changes_count: int):
+        poll_time = time.time()
+        changes_rate = None
+        if title in self.polls:
+            elapsed_time = poll_time - self.polls[title]["last_time"]
+            observed_changes_rate = changes_count / elapsed_time if elapsed_time > 0 else 0.0
+            previous_changes_rate = self.polls[title]["changes_rate"]
+            changes_rate = observed_changes_rate if previous_changes_rate is None \
+                else self.smoothing * observed_changes_rate + (1 - self.smoothing) * previous_changes_rate
+        self.polls[title] = {"last_time": poll_time, "changes_rate": changes_rate}
+        with open_atomically(self.file_path, "w") as f:
+            json.dump(self.polls, f)
+
+
+class ScheduleException(Exception):
+    pass
+
+
+class InvalidScheduleFileError(ScheduleException):
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def __str__(self) -> str:
+        return f"Schedule file ({self.file_path}) content is not a valid JSON"
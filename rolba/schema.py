@@ -0,0 +1,12 @@
+import jsonschema
+from typing import Any
+
+
+def create_json_schema_validator(schema: dict) -> Any:
+    """
+    Checks the schema once and returns the validator bound to it,
+    so the validation itself doesn't re-check and re-build anything per call.
+    """
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
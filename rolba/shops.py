@@ -0,0 +1,207 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+from urllib.parse import urljoin, urlsplit
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+
+CSS_TRANSLATOR = HTMLTranslator()
+
+
+def compile_css(css_selector: str) -> etree.XPath:
+    """
+    Translates the CSS selector (including the ::text and ::attr() pseudo-elements) to the compiled XPath,
+    which may be evaluated on any element, the same way as the parsel selector is.
+    """
+    return etree.XPath(CSS_TRANSLATOR.css_to_xpath(css_selector))
+
+
+def get_absolute_link(page_url: str, link: str) -> str:
+    return link
+
+
+def get_origin_link(page_url: str, link: str) -> str:
+    url_split = urlsplit(page_url)
+    return f"{url_split.scheme}://{url_split.netloc}{link}"
+
+
+def get_origin_root_link(page_url: str, link: str) -> str:
+    return get_origin_link(page_url, "/" + link)
+
+
+def get_joined_link(page_url: str, link: str) -> str:
+    return urljoin(page_url, link)
+
+
+class PriceParser:
+
+    def __init__(self, currency_separator: str):
+        self.currency_separator = currency_separator
+
+    def parse(self, price_value: str) -> float:
+        return float(price_value.split(self.currency_separator)[0].replace(",", "."))
+
+
+class Pagination(ABC):
+
+    @abstractmethod
+    def get_next_page_url(self, page_url: str, root: etree.ElementBase, page_records: [dict]) -> Optional[str]:
+        pass
+
+    def get_page_url(self, first_page_url: str, page_number: int) -> Optional[str]:
+        """
+        :return: URL of the page predicted without reading the previous ones, None if it is unpredictable
+        """
+        return None
+
+
+class NextLinkPagination(Pagination):
+    """
+    Follows the link to the next page.
+    """
+
+    def __init__(self, next_page_selector: str, link_builder: Callable[[str, str], str]):
+        self.next_page_xpath = compile_css(next_page_selector)
+        self.link_builder = link_builder
+
+    def get_next_page_url(self, page_url: str, root: etree.ElementBase, page_records: [dict]) -> Optional[str]:
+        next_page = self.next_page_xpath(root)
+        if next_page:
+            return self.link_builder(page_url, next_page[0])
+        return None
+
+
+class CounterPagination(Pagination):
+    """
+    Increments the page counter at the end of the URL until the page is empty.
+    """
+
+    def get_next_page_url(self, page_url: str, root: etree.ElementBase, page_records: [dict]) -> Optional[str]:
+        is_empty_page = not page_records
+        if is_empty_page:
+            return None
+        return self.get_page_url(page_url, 1)
+
+    def get_page_url(self, first_page_url: str, page_number: int) -> Optional[str]:
+        url_split = first_page_url.split("-")
+        url_split[-1] = str(int(url_split[-1]) + page_number)
+        return "-".join(url_split)
+
+
+class ShopDefinition:
+    """
+    Definition of the shop listing pages, the CSS selectors are compiled once.
+    The field selectors are relative to the product container.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            start_urls: [str],
+            container_selector: str,
+            name_selector: str,
+            price_selector: str,
+            link_selector: str,
+            price_parser: PriceParser,
+            link_builder: Callable[[str, str], str],
+            pagination: Pagination,
+            availability_selector: str = None,
+            availability_prefix: str = None,
+            pages_window: int = 1
+    ):
+        """
+        :param pages_window: count of the listing pages requested concurrently ahead of the parsed ones,
+                             the pagination must predict the pages URLs for more than one
+        """
+        self.name = name
+        self.start_urls = start_urls
+        self.container_selector = container_selector
+        self.container_xpath = compile_css(container_selector)
+        self.name_xpath = compile_css(name_selector)
+        self.price_xpath = compile_css(price_selector)
+        self.link_xpath = compile_css(link_selector)
+        self.price_parser = price_parser
+        self.link_builder = link_builder
+        self.pagination = pagination
+        self.availability_xpath = compile_css(availability_selector) if availability_selector else None
+        self.availability_prefix = availability_prefix
+        self.pages_window = pages_window
+
+    def is_available(self, container: etree.ElementBase) -> bool:
+        if self.availability_xpath is None:
+            return True
+        return self.availability_xpath(container)[0].strip().startswith(self.availability_prefix)
+
+    def get_records(self, root: etree.ElementBase, page_url: str) -> [dict]:
+        return [
+            self.get_record(container, page_url)
+            for container in self.container_xpath(root)
+            if self.is_available(container)
+        ]
+
+    def get_record(self, container: etree.ElementBase, page_url: str) -> dict:
+        return {
+            'name': self.name_xpath(container)[0].strip(),
+            'price': self.price_parser.parse(self.price_xpath(container)[0].strip()),
+            'link': self.link_builder(page_url, self.link_xpath(container)[0].strip())
+        }
+
+
+VINYL_EMPIRE = ShopDefinition(
+    name="Vinyl empire records spider",
+    start_urls=["https://vinylempire.cz/13-bazarove-vinyly?id_category=13&n=60"],
+    container_selector="div.product-container",
+    name_selector="a.product-name ::text",
+    price_selector="span.product-price ::text",
+    link_selector="a.product-name ::attr(href)",
+    price_parser=PriceParser(" "),
+    link_builder=get_absolute_link,
+    pagination=NextLinkPagination("li.pagination_next a::attr(href)", get_origin_link)
+)
+
+BLACK_VINYL_BAZAR = ShopDefinition(
+    name="Black Vinyl Bazar records spider",
+    start_urls=["https://www.blackvinylbazar.cz/bazar?ids=2&krit=raz8-80-1"],
+    container_selector="div.ramecekshop",
+    name_selector="a.nadpisramecek ::text",
+    price_selector="a.objednejkosobr ::text",
+    link_selector="a.nadpisramecek ::attr(href)",
+    price_parser=PriceParser("\xa0"),
+    link_builder=get_origin_root_link,
+    pagination=CounterPagination(),
+    pages_window=4
+)
+
+VINYL_BAZAR = ShopDefinition(
+    name="Vinyl Bazar records spider",
+    start_urls=[
+        "https://www.vinylbazar.net/pop-rock-usa-uk",
+        "https://www.vinylbazar.net/soul-funk-disco",
+        "https://www.vinylbazar.net/breakbeat",
+        "https://www.vinylbazar.net/downtempo-chillout",
+        "https://www.vinylbazar.net/jazz-blues-usa-uk",
+        "https://www.vinylbazar.net/country-folk",
+        "https://www.vinylbazar.net/etnicka-hudba"
+    ],
+    container_selector="div.product",
+    name_selector="div.productTitleContent a ::text",
+    price_selector="span.product_price_text ::text",
+    link_selector="div.productTitleContent a ::attr(href)",
+    price_parser=PriceParser("\xa0"),
+    link_builder=get_origin_link,
+    pagination=NextLinkPagination("div.pagination a.next ::attr(href)", get_joined_link)
+)
+
+LP_BAZAR = ShopDefinition(
+    name="LP Bazar records spider",
+    start_urls=["https://www.lpbazar.cz/lp-desky/"],
+    container_selector="div.product",
+    name_selector="a.p-name span ::text",
+    price_selector="span.p-det-main-price ::text",
+    link_selector="a.p-name ::attr(href)",
+    price_parser=PriceParser(" "),
+    link_builder=lambda page_url, link: get_origin_root_link(page_url, link[1:]),
+    pagination=NextLinkPagination("div.pagination a.s-page.pagination-page ::attr(href)", get_origin_link),
+    availability_selector="span.p-cat-availability ::text",
+    availability_prefix="Skladem"
+)
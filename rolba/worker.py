@@ -1,16 +1,108 @@
-from typing import Tuple, List
-from scrapy.crawler import CrawlerProcess
-from rolba.record import RecordsCollection
+import threading
+import multiprocessing
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_for_futures
+from functools import partial
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from typing import Dict, Tuple, List, Optional, Set
+from scrapy.crawler import CrawlerRunner
+from twisted.internet.defer import Deferred
+from twisted.internet.threads import deferToThread
+from rolba.log import Logger
+from rolba.metrics import ExtractionMetrics, MetricsWriter
+from rolba.record import BaseRecordsCollection
+from rolba.diff import RecordsChangeSet, RecordsCollectionsDiffer
 from rolba.extraction import RecordsExtractor
 from rolba.repository import RecordsRepository
 from rolba.notification import RecordsCollectionsNotifier
+from rolba.scheduling import FullCrawlSchedule, CircuitBreaker, PollingSchedule
+from rolba.matching import RecordsMatchingIndex
+
+
+class ExtractionsRun:
+    """
+    State of one run of the extractions, shared by the extractions finished in the I/O threads.
+    """
+
+    def __init__(
+            self,
+            polled_titles: List[str],
+            extractions_indexes: List[int],
+            incremental_saved_records: Dict[str, BaseRecordsCollection]
+    ):
+        """
+        :param polled_titles: titles of the extractions due to be polled, run or skipped by the circuit breaker
+        :param extractions_indexes: indexes of the extractions to run
+        :param incremental_saved_records: saved records of the incremental extractions, the crawl stops at them
+        """
+        self.polled_titles = polled_titles
+        self.extractions_indexes = extractions_indexes
+        self.incremental_saved_records = incremental_saved_records
+        # Saved records loaded while the crawl runs
+        self.loaded_saved_records: Dict[str, Future] = {}
+        self.finished_titles: Set[str] = set()
+        self.records_changesets: Dict[str, RecordsChangeSet] = {}
+        self.errors: List[Exception] = []
+        self.io_pool: Optional[ThreadPoolExecutor] = None
+        self.finishing_futures: List[Future] = []
+        self.lock = threading.Lock()
 
 
 class WebSpiderExtractionsProcessor:
 
-    def __init__(self, crawler_process: CrawlerProcess, records_collections_notifier: RecordsCollectionsNotifier):
+    # Messages sent by the extraction processes
+    RECORDS_MESSAGE = "records"
+    FINISHED_MESSAGE = "finished"
+    ERROR_MESSAGE = "error"
+
+    RECORDS_BATCH_SIZE = 1000
+
+    def __init__(
+            self,
+            crawler_process: CrawlerRunner,
+            records_collections_notifier: RecordsCollectionsNotifier,
+            records_collections_differ: RecordsCollectionsDiffer,
+            full_crawl_schedule: FullCrawlSchedule = None,
+            processes_count: int = None,
+            logger: Logger = None,
+            metrics_writer: MetricsWriter = None,
+            circuit_breaker: CircuitBreaker = None,
+            polling_schedule: PollingSchedule = None,
+            io_threads_count: int = None,
+            records_matching_index: RecordsMatchingIndex = None
+    ):
+        """
+        :param crawler_process: CrawlerProcess to run the extractions by run, CrawlerRunner to run them by
+                                run_in_reactor
+        :param full_crawl_schedule: enables the incremental extractions between the scheduled full ones,
+                                    all the extractions are full without it
+        :param processes_count: count of the processes the extractions are spread to, the extractions run
+                                in the current process without it
+        :param logger: reports the crashed, incomplete and skipped extractions
+        :param metrics_writer: writes the metrics of the extractions after each run
+        :param circuit_breaker: skips the repeatedly failing extractions, all the extractions run without it
+        :param polling_schedule: runs each extraction only when its poll is due, all the extractions run
+                                 without it
+        :param io_threads_count: count of the threads loading the saved records while the crawl runs and diffing
+                                 and saving the records of each extraction once it finishes, the extractions
+                                 are finished in the crawling thread without it
+        :param records_matching_index: updated with the saved records of all the extractions before
+                                       the notification of any new records
+        """
         self.crawler_process = crawler_process
         self.records_collections_notifier = records_collections_notifier
+        self.records_collections_differ = records_collections_differ
+        self.full_crawl_schedule = full_crawl_schedule
+        self.processes_count = processes_count
+        self.logger = logger
+        self.metrics_writer = metrics_writer
+        self.circuit_breaker = circuit_breaker
+        self.polling_schedule = polling_schedule
+        self.io_threads_count = io_threads_count
+        self.records_matching_index = records_matching_index
+        # Titles of the extractions whose records have been saved since they were indexed
+        self.outdated_indexed_titles: Set[str] = set()
         self.extractions: List[Tuple[str, RecordsExtractor, RecordsRepository]] = []
 
     def register_extraction(self, title: str, extractor: RecordsExtractor, repository: RecordsRepository) \
@@ -20,12 +112,318 @@ class WebSpiderExtractionsProcessor:
         )
         return self
 
-    def run(self):
-        self.crawler_process.start()
-        records_collections: List[Tuple[str, RecordsCollection]] = []
-        for (title, extractor, repository) in self.extractions:
+    def run(self) -> Dict[str, ExtractionMetrics]:
+        """
+        :return: metrics of the extractions by their titles
+        """
+        extractions_run = self._prepare_run()
+        if self.processes_count:
+            self._run_in_processes(extractions_run)
+        elif extractions_run.extractions_indexes:
+            self._start_io_pipeline(extractions_run)
+            self._schedule_extractions(extractions_run)
+            self.crawler_process.start()
+            self._wait_for_finished_extractions(extractions_run)
+            self._finish_remaining_extractions(extractions_run)
+        return self._finish_run(extractions_run)
+
+    def run_in_reactor(self) -> Deferred:
+        """
+        Runs the extractions in the current process within the already running reactor, so the long-running process
+        may run them repeatedly. The crawler process has to be the CrawlerRunner, which doesn't start the reactor.
+
+        :return: deferred fired with the metrics of the extractions by their titles
+        """
+        extractions_run = self._prepare_run()
+        self._start_io_pipeline(extractions_run)
+        self._schedule_extractions(extractions_run)
+
+        def finish_run(_) -> Dict[str, ExtractionMetrics]:
+            self._finish_remaining_extractions(extractions_run)
+            return self._finish_run(extractions_run)
+        joined = self.crawler_process.join()
+        if extractions_run.io_pool:
+            # The reactor isn't blocked by the extractions still being finished
+            joined.addCallback(lambda _: deferToThread(self._wait_for_finished_extractions, extractions_run))
+        return joined.addCallback(finish_run)
+
+    def stop(self) -> Deferred:
+        """
+        Stops the running extractions, they are finished as incomplete.
+        """
+        return self.crawler_process.stop()
+
+    def _prepare_run(self) -> ExtractionsRun:
+        """
+        Selects the extractions to run (the ones not due to be polled or skipped by the circuit breaker aren't)
+        and loads the saved records of the incremental ones.
+        """
+        polled_titles = []
+        extractions_indexes = []
+        for (index, (title, extractor, _)) in enumerate(self.extractions):
+            if self.polling_schedule and not self.polling_schedule.is_poll_due(title):
+                continue
+            polled_titles.append(title)
+            if self.circuit_breaker and self.circuit_breaker.is_open(title):
+                extractor.get_metrics().is_skipped = True
+                self._log_error(f"Extraction {title} is skipped after its repeated failures")
+            else:
+                extractions_indexes.append(index)
+        incremental_indexes = [
+            index for index in extractions_indexes
+            if self.full_crawl_schedule and not self.full_crawl_schedule.is_full_crawl_due(self.extractions[index][0])
+        ]
+        incremental_saved_records: Dict[str, BaseRecordsCollection] = {}
+        if self.io_threads_count and incremental_indexes:
+            # The pool is shut down before the extraction processes are forked
+            with ThreadPoolExecutor(self.io_threads_count) as io_pool:
+                loaded_records = list(io_pool.map(
+                    lambda index: self.extractions[index][2].load_records(), incremental_indexes
+                ))
+                for index, records in zip(incremental_indexes, loaded_records):
+                    incremental_saved_records[self.extractions[index][0]] = records
+        else:
+            for index in incremental_indexes:
+                incremental_saved_records[self.extractions[index][0]] = self.extractions[index][2].load_records()
+        for index in extractions_indexes:
+            title, extractor, _ = self.extractions[index]
+            # The full extraction doesn't stop at the records known to the previous incremental one
+            extractor.set_known_records(incremental_saved_records.get(title, ()))
+        return ExtractionsRun(polled_titles, extractions_indexes, incremental_saved_records)
+
+    def _start_io_pipeline(self, extractions_run: ExtractionsRun):
+        """
+        Starts loading the saved records of the full extractions while they crawl, so they are ready
+        to be diffed once the extractions finish. The repositories computing the changeset in their storage
+        diff the records themselves.
+        """
+        if not self.io_threads_count:
+            return
+        extractions_run.io_pool = ThreadPoolExecutor(self.io_threads_count, thread_name_prefix="rolba-io")
+        for index in extractions_run.extractions_indexes:
+            title, _, repository = self.extractions[index]
+            if repository.is_changeset_in_storage(self.records_collections_differ):
+                continue
+            if title in extractions_run.incremental_saved_records:
+                extractions_run.loaded_saved_records[title] = Future()
+                extractions_run.loaded_saved_records[title].set_result(extractions_run.incremental_saved_records[title])
+            else:
+                extractions_run.loaded_saved_records[title] = extractions_run.io_pool.submit(repository.load_records)
+
+    def _schedule_extractions(self, extractions_run: ExtractionsRun):
+        for index in extractions_run.extractions_indexes:
+            title, extractor, repository = self.extractions[index]
+            extractor.schedule_extraction()
+            extractor.add_finished_callback(
+                partial(self._dispatch_finished_extraction, title, extractor, repository, extractions_run)
+            )
+
+    def _dispatch_finished_extraction(
+            self,
+            title: str,
+            extractor: RecordsExtractor,
+            repository: RecordsRepository,
+            extractions_run: ExtractionsRun
+    ):
+        """
+        Finishes the extraction in the I/O thread if the pipeline runs, the crawl of the others goes on meanwhile.
+        """
+        extractions_run.finished_titles.add(title)
+        if extractions_run.io_pool:
+            extractions_run.finishing_futures.append(extractions_run.io_pool.submit(
+                self._finish_extraction, title, extractor, repository, extractions_run
+            ))
+        else:
+            self._finish_extraction(title, extractor, repository, extractions_run)
+
+    def _wait_for_finished_extractions(self, extractions_run: ExtractionsRun):
+        if extractions_run.io_pool:
+            wait_for_futures(extractions_run.finishing_futures)
+            extractions_run.io_pool.shutdown()
+
+    def _finish_remaining_extractions(self, extractions_run: ExtractionsRun):
+        """
+        Finishes the extractions the crawl has ended without finishing.
+
+        :raises Exception: the first error of the finished extractions
+        """
+        if not extractions_run.errors:
+            for index in extractions_run.extractions_indexes:
+                title, extractor, repository = self.extractions[index]
+                if title not in extractions_run.finished_titles:
+                    extractions_run.finished_titles.add(title)
+                    self._finish_extraction(title, extractor, repository, extractions_run)
+        if extractions_run.errors:
+            raise extractions_run.errors[0]
+
+    def _finish_run(self, extractions_run: ExtractionsRun) -> Dict[str, ExtractionMetrics]:
+        records_changesets = extractions_run.records_changesets
+        if self.records_matching_index and any(len(changeset.get_added()) for changeset in records_changesets.values()):
+            # The index is needed only for the new records, the saved ones are indexed as late as that
+            for (title, _, repository) in self.extractions:
+                if title in self.outdated_indexed_titles or not self.records_matching_index.has_records(title):
+                    self.records_matching_index.set_records(title, repository.iter_records())
+                    self.outdated_indexed_titles.discard(title)
+        # Nothing is sent when no extraction has finished, e.g. none of them was due to be polled
+        if records_changesets:
+            self.records_collections_notifier.send_notification([
+                (title, records_changesets[title]) for (title, _, _) in self.extractions if title in records_changesets
+            ])
+        # The extractions not due to be polled haven't any metrics of this run
+        extractions_metrics = {
+            title: extractor.get_metrics() for (title, extractor, _) in self.extractions
+            if title in extractions_run.polled_titles
+        }
+        if self.metrics_writer:
+            self.metrics_writer.write(extractions_metrics)
+        return extractions_metrics
+
+    def _run_in_processes(self, extractions_run: ExtractionsRun):
+        """
+        Runs the groups of the extractions in the forked processes, each with its own crawler process.
+        The records are sent back in batches and the extractions are finished here. The extractions
+        of a crashed process are reported and skipped, the others aren't affected.
+        """
+        extractions_indexes = extractions_run.extractions_indexes
+        context = multiprocessing.get_context("fork")
+        processes: Dict[Connection, Tuple[BaseProcess, List[int]]] = {}
+        for shard_index in range(min(self.processes_count, len(extractions_indexes))):
+            shard_extractions_indexes = extractions_indexes[shard_index::self.processes_count]
+            receiving_connection, sending_connection = context.Pipe(duplex=False)
+            process = context.Process(
+                target=self._run_extractions_process,
+                args=(shard_extractions_indexes, sending_connection),
+                daemon=True
+            )
+            process.start()
+            sending_connection.close()
+            processes[receiving_connection] = (process, shard_extractions_indexes)
+        # The I/O threads are started only once all the processes are forked
+        self._start_io_pipeline(extractions_run)
+        while processes:
+            for connection in wait(list(processes)):
+                try:
+                    message_type, extraction_index, payload = connection.recv()
+                except EOFError:
+                    process, shard_extractions_indexes = processes.pop(connection)
+                    process.join()
+                    for index in shard_extractions_indexes:
+                        title = self.extractions[index][0]
+                        if title not in extractions_run.finished_titles:
+                            self.extractions[index][1].get_metrics().is_crashed = True
+                            self._log_error(f"Extraction {title} has crashed (exit code {process.exitcode})")
+                            if self.circuit_breaker:
+                                with extractions_run.lock:
+                                    self.circuit_breaker.record_failure(title)
+                    continue
+                if message_type == self.RECORDS_MESSAGE:
+                    records = self.extractions[extraction_index][1].get_records()
+                    for record in payload:
+                        records.add_record(record)
+                elif message_type == self.FINISHED_MESSAGE:
+                    title, extractor, repository = self.extractions[extraction_index]
+                    extractor.get_metrics().merge(payload)
+                    self._dispatch_finished_extraction(title, extractor, repository, extractions_run)
+                elif message_type == self.ERROR_MESSAGE:
+                    self._log_error(payload)
+        self._wait_for_finished_extractions(extractions_run)
+        if extractions_run.errors:
+            raise extractions_run.errors[0]
+
+    def _run_extractions_process(self, extractions_indexes: List[int], connection: Connection):
+        try:
+            for index in extractions_indexes:
+                extractor = self.extractions[index][1]
+                extractor.schedule_extraction()
+                extractor.add_finished_callback(partial(self._send_records, connection, index, extractor))
+            self.crawler_process.start()
+        except BaseException:
+            connection.send((self.ERROR_MESSAGE, None, traceback.format_exc()))
+            raise
+        finally:
+            connection.close()
+
+    def _send_records(self, connection: Connection, extraction_index: int, extractor: RecordsExtractor):
+        records_batch = []
+        for record in extractor.get_records():
+            records_batch.append(record)
+            if len(records_batch) == self.RECORDS_BATCH_SIZE:
+                connection.send((self.RECORDS_MESSAGE, extraction_index, records_batch))
+                records_batch = []
+        if records_batch:
+            connection.send((self.RECORDS_MESSAGE, extraction_index, records_batch))
+        extractor.release_records()
+        connection.send((self.FINISHED_MESSAGE, extraction_index, extractor.get_metrics()))
+
+    def _log_error(self, message: str):
+        if self.logger:
+            self.logger.error(message)
+
+    def _log_info(self, message: str):
+        if self.logger:
+            self.logger.info(message)
+
+    def _finish_extraction(
+            self,
+            title: str,
+            extractor: RecordsExtractor,
+            repository: RecordsRepository,
+            extractions_run: ExtractionsRun
+    ):
+        """
+        Diffs and saves the records of the finished extraction, the records of the incomplete one are dropped.
+        The errors are collected to the run.
+        """
+        try:
+            if not extractor.is_complete():
+                is_failed = extractor.is_failed()
+                extractor.release_records()
+                if not is_failed:
+                    # The shutdown (e.g. SIGTERM or Ctrl-C) isn't the failure of the shop
+                    self._log_info(f"Extraction {title} is interrupted, its records aren't saved")
+                    return
+                self._log_error(f"Extraction {title} is incomplete, its records aren't saved")
+                with extractions_run.lock:
+                    if self.circuit_breaker:
+                        self.circuit_breaker.record_failure(title)
+                return
             new_records = extractor.get_records()
-            saved_records = repository.load_records()
+            incremental_saved_records = extractions_run.incremental_saved_records.get(title)
+            if incremental_saved_records is not None:
+                new_records = self._merge_records(new_records, incremental_saved_records)
+            loaded_saved_records = extractions_run.loaded_saved_records.pop(title, None)
+            if loaded_saved_records:
+                changeset = self.records_collections_differ.get_changeset(new_records, loaded_saved_records.result())
+            else:
+                changeset = repository.get_changeset(new_records, self.records_collections_differ)
             repository.save_records(new_records)
-            records_collections.append((title, new_records - saved_records))
-        self.records_collections_notifier.send_notification(records_collections)
+            extractor.release_records()
+            with extractions_run.lock:
+                extractions_run.records_changesets[title] = changeset
+                if self.records_matching_index:
+                    self.outdated_indexed_titles.add(title)
+                if self.full_crawl_schedule and incremental_saved_records is None:
+                    self.full_crawl_schedule.mark_full_crawl_done(title)
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_success(title)
+                if self.polling_schedule:
+                    self.polling_schedule.record_poll(title, len(changeset))
+        except Exception as e:
+            with extractions_run.lock:
+                extractions_run.errors.append(e)
+
+    def _merge_records(self, new_records: BaseRecordsCollection, saved_records: BaseRecordsCollection) \
+            -> BaseRecordsCollection:
+        """
+        Incremental extraction reads only the newest records, the saved ones it hasn't reached are kept
+        (and so they are never reported as removed).
+        """
+        merged_records = type(new_records)()
+        new_records_keys = set()
+        for record in new_records:
+            new_records_keys.add(self.records_collections_differ.get_record_key(record))
+            merged_records.add_record(record)
+        for record in saved_records:
+            if self.records_collections_differ.get_record_key(record) not in new_records_keys:
+                merged_records.add_record(record)
+        return merged_records
@@ -1,14 +1,26 @@
 import os
-from scrapy.crawler import CrawlerProcess
+import argparse
+from scrapy.crawler import CrawlerProcess, CrawlerRunner
+from scrapy.utils.log import configure_logging
 from rolba.log import StandardOutputLogger
 from rolba.configuration import Configuration, ConfigurationException
 from rolba.record import VinylRecordFactory, VinylRecordDictMapper
 from rolba.extraction import VinylEmpireRecordsExtractor, BlackVinylBazarRecordsExtractor, VinylBazarRecordsExtractor, \
-    LpBazarRecordsExtractor
-from rolba.repository import JsonFileRecordsRepository
-from rolba.notification import EmailVinylRecordsCollectionsNotifier
+    LpBazarRecordsExtractor, LxmlListingPageParser
+from rolba.diff import VinylRecordsCollectionsDiffer
+from rolba.repository import RecordsRepository, JsonFileRecordsRepository, BinaryFileRecordsRepository, \
+    CachedRecordsRepository
+from rolba.notification import EmailVinylRecordsCollectionsNotifier, SubscribersWatchlists
 from rolba.email import SimpleSmtpEmailSender
+from rolba.http_cache import JsonFileHttpCache, HttpCacheException
+from rolba.scheduling import JsonFileFullCrawlSchedule, JsonFileCircuitBreaker, JsonFileAdaptivePollingSchedule, \
+    ScheduleException
+from rolba.metrics import PrometheusTextFileMetricsWriter
+from rolba.crawl_profile import CrawlProfile, CrawlProfileException
+from rolba.checkpoint import JsonFileCrawlCheckpoint, CheckpointException
+from rolba.matching import InvertedRecordsMatchingIndex
 from rolba.worker import WebSpiderExtractionsProcessor
+from rolba.daemon import ExtractionsDaemon
 
 
 logger = StandardOutputLogger()
@@ -16,12 +28,75 @@ logger = StandardOutputLogger()
 current_dir_path = os.path.dirname(os.path.abspath(__file__))
 storage_dir_path = current_dir_path + "/storage"
 
+# The runs in between the full crawls extract only the newest records, until they reach the saved ones
+FULL_CRAWL_INTERVAL = 24 * 60 * 60
+
+# The shop failing in the consecutive runs is skipped for the cool-off period
+CIRCUIT_BREAKER_FAILURES_THRESHOLD = 3
+CIRCUIT_BREAKER_COOL_OFF_PERIOD = 6 * 60 * 60
+
+# Each shop has its own cache, the extraction processes don't share them
+HTTP_CACHE_MAX_SIZE = 5 * 1024 * 1024
+
+# The extractions are spread over the processes to use all the cores
+EXTRACTION_PROCESSES_COUNT = os.cpu_count()
+
+# The saved records are loaded during the crawl and each shop is diffed and saved as soon as its crawl finishes
+IO_THREADS_COUNT = 4
+
+# The listings of the same release at the shops share most of the words of their names
+RECORDS_MATCHING_MIN_SIMILARITY = 0.8
+
+# Extensions and repositories of the records files by their formats
+STORAGE_FORMATS = {
+    "json": (".json", JsonFileRecordsRepository),
+    "binary": (".bin", BinaryFileRecordsRepository)
+}
+
+parser = argparse.ArgumentParser(description="Extracts the shops records and notifies the subscribers of the changes.")
+parser.add_argument(
+    "--daemon",
+    type=float,
+    metavar="INTERVAL",
+    help="Keeps running and runs the extractions every INTERVAL seconds, in the single process"
+)
+parser.add_argument(
+    "--storage-format",
+    choices=STORAGE_FORMATS.keys(),
+    default="json",
+    help="Format of the records repository files, convert.py converts the files between the formats"
+)
+arguments = parser.parse_args()
+
+
+def create_repository(name: str) -> RecordsRepository:
+    file_extension, repository_class = STORAGE_FORMATS[arguments.storage_format]
+    repository = repository_class(
+        file_path=storage_dir_path + "/" + name + file_extension,
+        record_factory=VinylRecordFactory(),
+        record_dict_mapper=VinylRecordDictMapper()
+    )
+    # The daemon keeps the saved records in memory between the runs
+    return CachedRecordsRepository(repository) if arguments.daemon else repository
+
 
 try:
     configuration = Configuration(current_dir_path + "/config.json")
-    crawler_process = CrawlerProcess()
+    process_settings = CrawlProfile.from_dict(configuration.get_crawl_profile()).get_process_settings()
+    if arguments.daemon:
+        configure_logging(process_settings)
+        crawler_process = CrawlerRunner(process_settings)
+    else:
+        crawler_process = CrawlerProcess(process_settings)
+    page_parser = LxmlListingPageParser()
+    # Each shop is polled by its change rate, the runs crawl only the shops due
+    polling_intervals = configuration.get_polling_intervals()
+    polling_schedule = JsonFileAdaptivePollingSchedule(
+        storage_dir_path + "/polling.json", *polling_intervals
+    ) if polling_intervals else None
 
-    WebSpiderExtractionsProcessor(
+    records_matching_index = InvertedRecordsMatchingIndex(min_similarity=RECORDS_MATCHING_MIN_SIMILARITY)
+    extractions_processor = WebSpiderExtractionsProcessor(
         crawler_process=crawler_process,
         records_collections_notifier=EmailVinylRecordsCollectionsNotifier(
             email_sender=SimpleSmtpEmailSender(
@@ -30,49 +105,85 @@ try:
                 password=configuration.get_emailing_password()
             ),
             subscribers_emails=configuration.get_subscribers(),
-            email_subject="Vinyl records notification"
-        )
+            email_subject="Vinyl records notification",
+            records_matching_index=records_matching_index,
+            subscribers_watchlists=SubscribersWatchlists(configuration.get_watchlists())
+        ),
+        records_collections_differ=VinylRecordsCollectionsDiffer(),
+        full_crawl_schedule=JsonFileFullCrawlSchedule(
+            file_path=storage_dir_path + "/full_crawls.json",
+            full_crawl_interval=FULL_CRAWL_INTERVAL
+        ),
+        processes_count=None if arguments.daemon else EXTRACTION_PROCESSES_COUNT,
+        logger=logger,
+        metrics_writer=PrometheusTextFileMetricsWriter(storage_dir_path + "/metrics.prom"),
+        circuit_breaker=JsonFileCircuitBreaker(
+            file_path=storage_dir_path + "/circuit_breaker.json",
+            failures_threshold=CIRCUIT_BREAKER_FAILURES_THRESHOLD,
+            cool_off_period=CIRCUIT_BREAKER_COOL_OFF_PERIOD
+        ),
+        polling_schedule=polling_schedule,
+        io_threads_count=IO_THREADS_COUNT,
+        records_matching_index=records_matching_index
     ).register_extraction(
         title="Vinyl Empire",
         extractor=VinylEmpireRecordsExtractor(
-            crawler_process=crawler_process
+            crawler_process=crawler_process,
+            http_cache=JsonFileHttpCache(
+                file_path=storage_dir_path + "/vinyl_empire_http_cache.json",
+                max_size=HTTP_CACHE_MAX_SIZE
+            ),
+            page_parser=page_parser,
+            crawl_profile=CrawlProfile.from_dict(configuration.get_crawl_profile("Vinyl Empire")),
+            checkpoint=JsonFileCrawlCheckpoint(storage_dir_path + "/vinyl_empire_crawl")
         ),
-        repository=JsonFileRecordsRepository(
-            file_path=storage_dir_path + "/vinyl_empire_records.json",
-            record_factory=VinylRecordFactory(),
-            record_dict_mapper=VinylRecordDictMapper()
-        )
+        repository=create_repository("vinyl_empire_records")
     ).register_extraction(
         title="Black Vinyl Bazar",
         extractor=BlackVinylBazarRecordsExtractor(
-            crawler_process=crawler_process
+            crawler_process=crawler_process,
+            http_cache=JsonFileHttpCache(
+                file_path=storage_dir_path + "/black_vinyl_bazar_http_cache.json",
+                max_size=HTTP_CACHE_MAX_SIZE
+            ),
+            page_parser=page_parser,
+            crawl_profile=CrawlProfile.from_dict(configuration.get_crawl_profile("Black Vinyl Bazar")),
+            checkpoint=JsonFileCrawlCheckpoint(storage_dir_path + "/black_vinyl_bazar_crawl")
         ),
-        repository=JsonFileRecordsRepository(
-            file_path=storage_dir_path + "/black_vinyl_bazar_records.json",
-            record_factory=VinylRecordFactory(),
-            record_dict_mapper=VinylRecordDictMapper()
-        )
+        repository=create_repository("black_vinyl_bazar_records")
     ).register_extraction(
         title="Vinyl Bazar",
         extractor=VinylBazarRecordsExtractor(
-            crawler_process=crawler_process
+            crawler_process=crawler_process,
+            http_cache=JsonFileHttpCache(
+                file_path=storage_dir_path + "/vinyl_bazar_http_cache.json",
+                max_size=HTTP_CACHE_MAX_SIZE
+            ),
+            page_parser=page_parser,
+            crawl_profile=CrawlProfile.from_dict(configuration.get_crawl_profile("Vinyl Bazar")),
+            checkpoint=JsonFileCrawlCheckpoint(storage_dir_path + "/vinyl_bazar_crawl")
         ),
-        repository=JsonFileRecordsRepository(
-            file_path=storage_dir_path + "/vinyl_bazar_records.json",
-            record_factory=VinylRecordFactory(),
-            record_dict_mapper=VinylRecordDictMapper()
-        )
+        repository=create_repository("vinyl_bazar_records")
     ).register_extraction(
         title="LP Bazar",
         extractor=LpBazarRecordsExtractor(
-            crawler_process=crawler_process
+            crawler_process=crawler_process,
+            http_cache=JsonFileHttpCache(
+                file_path=storage_dir_path + "/lp_bazar_http_cache.json",
+                max_size=HTTP_CACHE_MAX_SIZE
+            ),
+            page_parser=page_parser,
+            crawl_profile=CrawlProfile.from_dict(configuration.get_crawl_profile("LP Bazar")),
+            checkpoint=JsonFileCrawlCheckpoint(storage_dir_path + "/lp_bazar_crawl")
         ),
-        repository=JsonFileRecordsRepository(
-            file_path=storage_dir_path + "/lp_bazar_records.json",
-            record_factory=VinylRecordFactory(),
-            record_dict_mapper=VinylRecordDictMapper()
-        )
-    ).run()
-except ConfigurationException as e:
+        repository=create_repository("lp_bazar_records")
+    )
+    if arguments.daemon:
+        ExtractionsDaemon(crawler_process, extractions_processor, arguments.daemon, logger).start()
+    else:
+        extractions_processor.run()
+except (
+        ConfigurationException, ScheduleException, HttpCacheException, CrawlProfileException, CheckpointException
+) as e:
     logger.error(str(e))
     exit(1)
@@ -3,6 +3,7 @@ import shutil
 from unittest import TestCase, mock
 from scrapy.crawler import CrawlerProcess
 from rolba.record import VinylRecordFactory, VinylRecordDictMapper
+from rolba.diff import VinylRecordsCollectionsDiffer
 from rolba.repository import JsonFileRecordsRepository
 from rolba.extraction import VinylEmpireRecordsExtractor, BlackVinylBazarRecordsExtractor, VinylBazarRecordsExtractor, \
     LpBazarRecordsExtractor
@@ -27,7 +28,8 @@ class WebSpiderExtractionsProcessorTest(TestCase):
         crawler_process = CrawlerProcess()
         WebSpiderExtractionsProcessor(
             crawler_process=crawler_process,
-            records_collections_notifier=mock.Mock()
+            records_collections_notifier=mock.Mock(),
+            records_collections_differ=VinylRecordsCollectionsDiffer()
         ).register_extraction(
             title="Vinyl Empire",
             extractor=VinylEmpireRecordsExtractor(
@@ -0,0 +1,60 @@
+import os
+import shutil
+from unittest import TestCase, mock
+from scrapy.crawler import CrawlerProcess
+from rolba import shops
+from rolba.record import VinylRecordFactory, VinylRecordDictMapper
+from rolba.diff import VinylRecordsCollectionsDiffer
+from rolba.repository import JsonFileRecordsRepository
+from rolba.extraction import ShopRecordsExtractor
+from rolba.worker import WebSpiderExtractionsProcessor
+from tests.shop_server import ShopServer
+
+
+class LocalShopsExtractionTest(TestCase):
+
+    TEST_STORAGE_DIR_PATH = os.path.dirname(os.path.abspath(__file__)) + "/local_storage"
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.TEST_STORAGE_DIR_PATH):
+            shutil.rmtree(self.TEST_STORAGE_DIR_PATH)
+        os.mkdir(self.TEST_STORAGE_DIR_PATH)
+        self.shop_server = ShopServer(pages_count=3, products_count=10).start()
+
+    def tearDown(self) -> None:
+        self.shop_server.stop()
+        shutil.rmtree(self.TEST_STORAGE_DIR_PATH)
+
+    def test_extraction(self):
+        crawler_process = CrawlerProcess({"LOG_LEVEL": "ERROR"})
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_process,
+            records_collections_notifier=mock.Mock(),
+            records_collections_differ=VinylRecordsCollectionsDiffer()
+        )
+        repositories = {}
+        for shop_definition in [shops.VINYL_EMPIRE, shops.BLACK_VINYL_BAZAR, shops.VINYL_BAZAR, shops.LP_BAZAR]:
+            repositories[shop_definition.name] = JsonFileRecordsRepository(
+                file_path=f"{self.TEST_STORAGE_DIR_PATH}/{len(repositories)}_records.json",
+                record_factory=VinylRecordFactory(),
+                record_dict_mapper=VinylRecordDictMapper()
+            )
+            processor.register_extraction(
+                title=shop_definition.name,
+                extractor=ShopRecordsExtractor(crawler_process, self.shop_server.get_shop_definition(shop_definition)),
+                repository=repositories[shop_definition.name]
+            )
+        processor.run()
+
+        self.assertEqual(len(repositories[shops.VINYL_EMPIRE.name].load_records()), 30)
+        self.assertEqual(len(repositories[shops.BLACK_VINYL_BAZAR.name].load_records()), 30)
+        self.assertEqual(len(repositories[shops.VINYL_BAZAR.name].load_records()), 7 * 30)
+        # Every fifth product is sold out
+        self.assertEqual(len(repositories[shops.LP_BAZAR.name].load_records()), 24)
+        served_pages_counts = self.shop_server.get_served_pages_counts()
+        self.assertEqual(served_pages_counts["vinyl_empire"], 3)
+        self.assertEqual(served_pages_counts["vinyl_bazar"], 7 * 3)
+        self.assertEqual(served_pages_counts["lp_bazar"], 3)
+        # The pages following the empty one may be requested speculatively
+        self.assertGreaterEqual(served_pages_counts["black_vinyl_bazar"], 4)
+        self.assertLessEqual(served_pages_counts["black_vinyl_bazar"], 3 + shops.BLACK_VINYL_BAZAR.pages_window)
@@ -0,0 +1,252 @@
+import copy
+import json
+import time
+import multiprocessing
+from abc import ABC, abstractmethod
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Dict, Optional
+from urllib.parse import urlsplit, parse_qs
+from urllib.request import urlopen
+from rolba.shops import ShopDefinition
+
+
+class ListingPages(ABC):
+    """
+    Synthetic listing pages in the markup and the pagination scheme of the shop.
+    """
+
+    name = ""
+
+    def __init__(self, pages_count: int, products_count: int):
+        self.pages_count = pages_count
+        self.products_count = products_count
+
+    @abstractmethod
+    def get_page_number(self, path: str, query: Dict[str, list]) -> Optional[int]:
+        """
+        :return: number of the requested page (from 1), None if the path isn't the shop's listing
+        """
+        pass
+
+    @abstractmethod
+    def render_page(self, origin: str, path: str, page_number: int) -> str:
+        pass
+
+    def _get_products(self, path: str, page_number: int) -> [(str, str, int)]:
+        """
+        :return: slug, name and price of the products of the page
+        """
+        if page_number > self.pages_count:
+            return []
+        category = path.strip("/").split("/")[0]
+        return [
+            (
+                f"{category}-{page_number}-{index}",
+                f"Artist {page_number}-{index} - Album {category}",
+                100 + index
+            )
+            for index in range(self.products_count)
+        ]
+
+
+class VinylEmpireListingPages(ListingPages):
+
+    name = "vinyl_empire"
+
+    def get_page_number(self, path: str, query: Dict[str, list]) -> Optional[int]:
+        if path != "/13-bazarove-vinyly":
+            return None
+        return int(query.get("p", [1])[0])
+
+    def render_page(self, origin: str, path: str, page_number: int) -> str:
+        products = "".join(
+            f"""
+            <li><div class="product-container">
+                <a class="product-name" href="{origin}/bazarove-vinyly/{slug}.html">{name}</a>
+                <span class="product-price">{price},00 Kč</span>
+            </div></li>"""
+            for (slug, name, price) in self._get_products(path, page_number)
+        )
+        pagination = f"""
+            <ul class="pagination"><li class="pagination_next">
+                <a href="/13-bazarove-vinyly?id_category=13&amp;n=60&amp;p={page_number + 1}">Další</a>
+            </li></ul>""" if page_number < self.pages_count else ""
+        return f"<ul class=\"product_list\">{products}</ul>{pagination}"
+
+
+class BlackVinylBazarListingPages(ListingPages):
+
+    name = "black_vinyl_bazar"
+
+    def get_page_number(self, path: str, query: Dict[str, list]) -> Optional[int]:
+        if path != "/bazar":
+            return None
+        return int(query["krit"][0].split("-")[-1])
+
+    def render_page(self, origin: str, path: str, page_number: int) -> str:
+        return "".join(
+            f"""
+            <div class="ramecekshop">
+                <a class="nadpisramecek" href="bazar/{slug}">{name}</a>
+                <a class="objednejkosobr" href="kosik?id={slug}">{price}&nbsp;Kč</a>
+            </div>"""
+            for (slug, name, price) in self._get_products(path, page_number)
+        )
+
+
+class VinylBazarListingPages(ListingPages):
+    """
+    Serves any other path as the category listing.
+    """
+
+    name = "vinyl_bazar"
+
+    def get_page_number(self, path: str, query: Dict[str, list]) -> Optional[int]:
+        return int(query.get("page", [1])[0])
+
+    def render_page(self, origin: str, path: str, page_number: int) -> str:
+        products = "".join(
+            f"""
+            <div class="product">
+                <div class="productTitleContent"><a href="/{slug}">{name}</a></div>
+                <span class="product_price_text">{price},90&nbsp;Kč</span>
+            </div>"""
+            for (slug, name, price) in self._get_products(path, page_number)
+        )
+        pagination = f"""
+            <div class="pagination"><a class="next" href="{path}?page={page_number + 1}">Další</a></div>""" \
+            if page_number < self.pages_count else ""
+        return f"<div class=\"products\">{products}</div>{pagination}"
+
+
+class LpBazarListingPages(ListingPages):
+    """
+    Every fifth product is sold out.
+    """
+
+    name = "lp_bazar"
+
+    def get_page_number(self, path: str, query: Dict[str, list]) -> Optional[int]:
+        if not path.startswith("/lp-desky/"):
+            return None
+        page = path[len("/lp-desky/"):].strip("/")
+        return int(page.split("-")[-1]) if page else 1
+
+    def render_page(self, origin: str, path: str, page_number: int) -> str:
+        products = "".join(
+            f"""
+            <div class="product">
+                <a class="p-name" href="/{slug}/"><span>{name}</span></a>
+                <span class="p-cat-availability">{"Vyprodáno" if price % 5 == 0 else "Skladem"}</span>
+                <span class="p-det-main-price">{price} Kč</span>
+            </div>"""
+            for (slug, name, price) in self._get_products(path, page_number)
+        )
+        pagination = f"""
+            <div class="pagination">
+                <a class="s-page pagination-page" href="/lp-desky/strana-{page_number + 1}/">{page_number + 1}</a>
+            </div>""" if page_number < self.pages_count else ""
+        return f"<div class=\"products\">{products}</div>{pagination}"
+
+
+class ShopServer:
+    """
+    Local HTTP server standing in for the shops, it runs in its own process.
+    """
+
+    STATS_PATH = "/_stats"
+
+    def __init__(self, pages_count: int = 10, products_count: int = 60, latency: float = 0.0):
+        """
+        :param pages_count: count of the listing pages of each shop category
+        :param products_count: count of the products of each listing page
+        :param latency: delay of each response in seconds
+        """
+        self.pages_count = pages_count
+        self.products_count = products_count
+        self.latency = latency
+        self.process: Optional[BaseProcess] = None
+        self.origin: Optional[str] = None
+
+    def start(self) -> "ShopServer":
+        context = multiprocessing.get_context("fork")
+        receiving_connection, sending_connection = context.Pipe(duplex=False)
+        self.process = context.Process(target=self._serve, args=(sending_connection,), daemon=True)
+        self.process.start()
+        self.origin = f"http://127.0.0.1:{receiving_connection.recv()}"
+        return self
+
+    def stop(self):
+        if self.process:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self) -> "ShopServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def get_shop_definition(self, shop_definition: ShopDefinition) -> ShopDefinition:
+        """
+        :return: copy of the definition with the start URLs on this server
+        """
+        local_shop_definition = copy.copy(shop_definition)
+        local_shop_definition.start_urls = [
+            self.origin + urlsplit(url)._replace(scheme="", netloc="").geturl()
+            for url in shop_definition.start_urls
+        ]
+        return local_shop_definition
+
+    def get_served_pages_counts(self) -> Dict[str, int]:
+        with urlopen(self.origin + self.STATS_PATH) as response:
+            return json.load(response)
+
+    def _serve(self, connection: Connection):
+        listing_pages = [
+            VinylEmpireListingPages(self.pages_count, self.products_count),
+            BlackVinylBazarListingPages(self.pages_count, self.products_count),
+            LpBazarListingPages(self.pages_count, self.products_count),
+            VinylBazarListingPages(self.pages_count, self.products_count)
+        ]
+        served_pages_counts = Counter()
+        latency = self.latency
+
+        class RequestHandler(BaseHTTPRequestHandler):
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url_split = urlsplit(self.path)
+                if url_split.path == ShopServer.STATS_PATH:
+                    self._send(json.dumps(served_pages_counts), "application/json")
+                    return
+                query = parse_qs(url_split.query)
+                for pages in listing_pages:
+                    page_number = pages.get_page_number(url_split.path, query)
+                    if page_number is not None:
+                        break
+                served_pages_counts[pages.name] += 1
+                time.sleep(latency)
+                body = pages.render_page(f"http://{self.headers['Host']}", url_split.path, page_number)
+                self._send(f"<html><body>{body}</body></html>", "text/html; charset=utf-8")
+
+            def log_message(self, format: str, *args):
+                pass
+
+            def _send(self, body: str, content_type: str):
+                encoded_body = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(encoded_body)))
+                self.end_headers()
+                self.wfile.write(encoded_body)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        connection.send(server.server_port)
+        connection.close()
+        server.serve_forever()
@@ -0,0 +1,71 @@
+import os
+import shutil
+from unittest import TestCase
+from rolba.checkpoint import JsonFileCrawlCheckpoint, InvalidCheckpointError
+
+
+class JsonFileCrawlCheckpointTest(TestCase):
+
+    STORAGE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/test_checkpoint_storage"
+
+    RECORD = {"name": "a", "price": 1, "link": "l"}
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.STORAGE_PATH):
+            shutil.rmtree(self.STORAGE_PATH)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.STORAGE_PATH)
+
+    def test_save_and_load(self):
+        checkpoint = JsonFileCrawlCheckpoint(self.STORAGE_PATH)
+        self.assertFalse(checkpoint.is_saved())
+        checkpoint.add_pending_request("1", {"url": "page 1"})
+        checkpoint.add_pending_request("2", {"url": "page 2"})
+        checkpoint.finish_request("1")
+        checkpoint.add_record(self.RECORD)
+        checkpoint.close({"state": 1})
+        loaded_checkpoint = JsonFileCrawlCheckpoint(self.STORAGE_PATH)
+        self.assertTrue(loaded_checkpoint.is_saved())
+        self.assertEqual(loaded_checkpoint.get_pending_requests(), [{"url": "page 2"}])
+        self.assertTrue(loaded_checkpoint.is_finished_request("1"))
+        self.assertFalse(loaded_checkpoint.is_finished_request("2"))
+        self.assertEqual(loaded_checkpoint.get_spider_state(), {"state": 1})
+        self.assertEqual(list(loaded_checkpoint.get_records()), [self.RECORD])
+
+    def test_records_added_after_save_dropped(self):
+        checkpoint = JsonFileCrawlCheckpoint(self.STORAGE_PATH)
+        checkpoint.add_record(self.RECORD)
+        checkpoint.save({}, force=True)
+        checkpoint.add_record({**self.RECORD, "link": "m"})
+        checkpoint.records_file.close()
+        loaded_checkpoint = JsonFileCrawlCheckpoint(self.STORAGE_PATH)
+        self.assertEqual(list(loaded_checkpoint.get_records()), [self.RECORD])
+        loaded_checkpoint.add_record({**self.RECORD, "link": "n"})
+        loaded_checkpoint.close({})
+        self.assertEqual(
+            [record["link"] for record in JsonFileCrawlCheckpoint(self.STORAGE_PATH).get_records()],
+            ["l", "n"]
+        )
+
+    def test_save_interval(self):
+        checkpoint = JsonFileCrawlCheckpoint(self.STORAGE_PATH, save_interval=60)
+        checkpoint.save({})
+        self.assertFalse(JsonFileCrawlCheckpoint(self.STORAGE_PATH).is_saved())
+        checkpoint.save({}, force=True)
+        self.assertTrue(JsonFileCrawlCheckpoint(self.STORAGE_PATH).is_saved())
+
+    def test_clear(self):
+        checkpoint = JsonFileCrawlCheckpoint(self.STORAGE_PATH)
+        checkpoint.add_record(self.RECORD)
+        checkpoint.save({}, force=True)
+        checkpoint.clear()
+        self.assertFalse(checkpoint.is_saved())
+        self.assertFalse(JsonFileCrawlCheckpoint(self.STORAGE_PATH).is_saved())
+
+    def test_invalid_checkpoint_error(self):
+        os.makedirs(self.STORAGE_PATH)
+        with open(self.STORAGE_PATH + "/" + JsonFileCrawlCheckpoint.STATE_FILE_NAME, "w") as f:
+            f.write("[]")
+        with self.assertRaises(InvalidCheckpointError):
+            JsonFileCrawlCheckpoint(self.STORAGE_PATH)
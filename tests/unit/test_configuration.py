@@ -17,6 +17,25 @@ class ConfigurationTest(TestCase):
         self.assertEqual(config.get_emailing_password(), "test password")
         self.assertEqual(config.get_subscribers(), ["test@test.test"])
 
+    def test_crawl_profiles(self):
+        config = Configuration(self.fixtures_path + "/crawl_profiles_config.json")
+        self.assertEqual(
+            config.get_crawl_profile("Test shop"),
+            {"concurrent_requests_per_domain": 16, "download_timeout": 30, "autothrottle": True}
+        )
+        self.assertEqual(config.get_crawl_profile(), {"concurrent_requests_per_domain": 4, "download_timeout": 30})
+        self.assertEqual(Configuration(self.fixtures_path + "/valid_config.json").get_crawl_profile("Test shop"), {})
+
+    def test_polling_intervals(self):
+        config = Configuration(self.fixtures_path + "/polling_config.json")
+        self.assertEqual(config.get_polling_intervals(), (900, 86400))
+        self.assertIsNone(Configuration(self.fixtures_path + "/valid_config.json").get_polling_intervals())
+
+    def test_watchlists(self):
+        config = Configuration(self.fixtures_path + "/watchlists_config.json")
+        self.assertEqual(config.get_watchlists(), {"test@test.test": [("Radiohead", 800), ("Kryštof", None)]})
+        self.assertEqual(Configuration(self.fixtures_path + "/valid_config.json").get_watchlists(), {})
+
     def test_config_file_not_found_error(self):
         with self.assertRaises(ConfigurationFileNotFound):
             Configuration("invalid_path")
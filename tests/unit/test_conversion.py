@@ -0,0 +1,21 @@
+from unittest import TestCase, mock
+from rolba.record import VinylRecord, RecordsCollection
+from rolba.conversion import RecordsRepositoryConverter
+
+
+class RecordsRepositoryConverterTest(TestCase):
+
+    def test_convert(self):
+        records = RecordsCollection().add_record(
+            VinylRecord("a", 1, "l1")
+        ).add_record(
+            VinylRecord("b", 2, "l2")
+        )
+        source_repository_mock = mock.Mock()
+        source_repository_mock.load_records.return_value = records
+        target_repository_mock = mock.Mock()
+        self.assertEqual(
+            RecordsRepositoryConverter(source_repository_mock, target_repository_mock).convert(),
+            2
+        )
+        target_repository_mock.save_records.assert_called_once_with(records)
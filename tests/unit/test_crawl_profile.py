@@ -0,0 +1,38 @@
+from unittest import TestCase, mock
+from rolba.crawl_profile import CrawlProfile, Http2NotAvailableError
+
+
+class CrawlProfileTest(TestCase):
+
+    def test_settings(self):
+        settings = CrawlProfile.from_dict({
+            "concurrent_requests_per_domain": 32,
+            "autothrottle": True,
+            "keep_alive": False
+        }).get_settings()
+        self.assertEqual(settings["CONCURRENT_REQUESTS"], 32)
+        self.assertEqual(settings["CONCURRENT_REQUESTS_PER_DOMAIN"], 32)
+        self.assertTrue(settings["AUTOTHROTTLE_ENABLED"])
+        self.assertEqual(settings["DEFAULT_REQUEST_HEADERS"]["Connection"], "close")
+        self.assertNotIn("DOWNLOAD_HANDLERS", settings)
+
+    def test_default_settings(self):
+        settings = CrawlProfile().get_settings()
+        self.assertEqual(settings["CONCURRENT_REQUESTS"], 16)
+        self.assertEqual(settings["CLOSESPIDER_TIMEOUT"], 0)
+        self.assertNotIn("DEFAULT_REQUEST_HEADERS", settings)
+        self.assertEqual(
+            CrawlProfile(dns_cache_size=0).get_process_settings(),
+            {"DNSCACHE_ENABLED": False, "DNSCACHE_SIZE": 0, "DNS_TIMEOUT": 60.0}
+        )
+
+    @mock.patch("importlib.util.find_spec")
+    def test_http2(self, find_spec_mock):
+        find_spec_mock.return_value = mock.Mock()
+        self.assertEqual(
+            CrawlProfile(http2=True).get_settings()["DOWNLOAD_HANDLERS"],
+            {"https": CrawlProfile.HTTP2_DOWNLOAD_HANDLER}
+        )
+        find_spec_mock.return_value = None
+        with self.assertRaises(Http2NotAvailableError):
+            CrawlProfile(http2=True)
@@ -0,0 +1,71 @@
+from unittest import TestCase, mock
+from twisted.internet import defer
+from rolba import shops
+from rolba.record import VinylRecord, RecordsCollection
+from rolba.diff import VinylRecordsCollectionsDiffer
+from rolba.extraction import ShopRecordsExtractor
+from rolba.repository import CachedRecordsRepository
+from rolba.worker import WebSpiderExtractionsProcessor
+from rolba.daemon import ExtractionsDaemon
+from tests.unit.test_worker import create_vinyl_empire_crawler_process
+
+
+class ExtractionsDaemonTest(TestCase):
+
+    def test_failed_run(self):
+        processor_mock = mock.Mock()
+        logger_mock = mock.Mock()
+        daemon = ExtractionsDaemon(mock.Mock(), processor_mock, run_interval=60, logger=logger_mock)
+        for run_in_reactor in [lambda: defer.fail(ValueError()), mock.Mock(side_effect=ValueError)]:
+            processor_mock.run_in_reactor = run_in_reactor
+            results = []
+            daemon._run().addBoth(results.append)
+            # The failure doesn't stop the next runs
+            self.assertEqual(results, [None])
+        self.assertEqual(logger_mock.error.call_count, 2)
+        self.assertTrue(logger_mock.error.call_args[0][0].startswith("Extractions run has failed"))
+
+    # The I/O threads are waited for synchronously, as there's no reactor running the tests
+    @mock.patch("rolba.worker.deferToThread", lambda function, *args: defer.maybeDeferred(function, *args))
+    def test_consecutive_runs(self):
+        crawler_runner = create_vinyl_empire_crawler_process()
+        notifier_mock = mock.Mock()
+        logger_mock = mock.Mock()
+        stored_repository_mock = mock.Mock()
+        cached_repository = CachedRecordsRepository(stored_repository_mock)
+        stored_repository_mock.load_records.return_value = RecordsCollection().add_record(VinylRecord(
+            "Pink Floyd - Animals",
+            450,
+            "https://vinylempire.cz/bazarove-vinyly/1001-pink-floyd-animals.html"
+        ))
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_runner,
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=VinylRecordsCollectionsDiffer(),
+            logger=logger_mock,
+            io_threads_count=2
+        ).register_extraction(
+            "test",
+            ShopRecordsExtractor(crawler_runner, shops.VINYL_EMPIRE),
+            cached_repository
+        )
+        daemon = ExtractionsDaemon(crawler_runner, processor, run_interval=60, logger=logger_mock)
+
+        results = []
+        for _ in range(2):
+            daemon._run().addBoth(results.append)
+
+        # Each run has its own metrics and its records are diffed and saved before its deferred fires
+        self.assertEqual([extractions_metrics["test"].items_count for extractions_metrics in results], [3, 3])
+        self.assertIsNot(results[0]["test"], results[1]["test"])
+        self.assertEqual(stored_repository_mock.save_records.call_count, 2)
+        # The second run diffs against the records cached by the first one
+        stored_repository_mock.load_records.assert_called_once_with()
+        added_records_counts = []
+        for call in notifier_mock.send_notification.call_args_list:
+            [(_, changeset)] = call[0][0]
+            added_records_counts.append(len(changeset.get_added()))
+        self.assertEqual(added_records_counts, [2, 0])
+        self.assertIs(cached_repository.load_records(), stored_repository_mock.save_records.call_args[0][0])
+        logger_mock.error.assert_not_called()
+        self.assertEqual(logger_mock.info.call_count, 2)
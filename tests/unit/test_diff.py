@@ -0,0 +1,62 @@
+from unittest import TestCase
+from rolba.record import VinylRecord, RecordsCollection
+from rolba.diff import VinylRecordsCollectionsDiffer
+
+
+class VinylRecordsCollectionsDifferTest(TestCase):
+
+    def test_changeset(self):
+        changeset = VinylRecordsCollectionsDiffer().get_changeset(
+            RecordsCollection().add_record(
+                VinylRecord("a", 1, "l1")
+            ).add_record(
+                VinylRecord("a", 2, "l2")
+            ).add_record(
+                VinylRecord("b", 5, "l3")
+            ).add_record(
+                VinylRecord("c", 1, "l4")
+            ),
+            RecordsCollection().add_record(
+                VinylRecord("a", 1, "l1")
+            ).add_record(
+                VinylRecord("b", 3, "l3")
+            ).add_record(
+                VinylRecord("c", 2, "l4")
+            ).add_record(
+                VinylRecord("d", 1, "l5")
+            )
+        )
+        self.assertEqual(
+            changeset.get_added(),
+            RecordsCollection().add_record(VinylRecord("a", 2, "l2"))
+        )
+        self.assertEqual(
+            changeset.get_removed(),
+            RecordsCollection().add_record(VinylRecord("d", 1, "l5"))
+        )
+        self.assertEqual(
+            changeset.get_price_increased(),
+            [(VinylRecord("b", 3, "l3"), VinylRecord("b", 5, "l3"))]
+        )
+        self.assertEqual(
+            changeset.get_price_decreased(),
+            [(VinylRecord("c", 2, "l4"), VinylRecord("c", 1, "l4"))]
+        )
+        self.assertEqual(len(changeset), 4)
+
+    def test_saved_records_from_generator(self):
+        saved_records = (record for record in [VinylRecord("a", 1, "l1"), VinylRecord("a", 1, "l1")])
+        changeset = VinylRecordsCollectionsDiffer().get_changeset(
+            RecordsCollection().add_record(VinylRecord("a", 1, "l1")),
+            saved_records
+        )
+        self.assertEqual(len(changeset), 0)
+
+    def test_custom_record_key(self):
+        changeset = VinylRecordsCollectionsDiffer(VinylRecord.get_identity).get_changeset(
+            RecordsCollection().add_record(VinylRecord("a", 2, "l1")),
+            RecordsCollection().add_record(VinylRecord("a", 1, "l1"))
+        )
+        self.assertEqual(len(changeset.get_added()), 1)
+        self.assertEqual(len(changeset.get_removed()), 1)
+        self.assertEqual(changeset.get_price_increased(), [])
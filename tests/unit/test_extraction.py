@@ -0,0 +1,406 @@
+import os
+import shutil
+from unittest import TestCase, mock
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse, Request
+from scrapy.spidermiddlewares.httperror import HttpError
+from twisted.python.failure import Failure
+from rolba import shops
+from rolba.record import VinylRecord
+from rolba.metrics import ExtractionMetrics
+from rolba.crawl_profile import CrawlProfile
+from rolba.checkpoint import JsonFileCrawlCheckpoint
+from rolba.extraction import ShopRecordsExtractor, ShopRecordsSpider, ListingPageParser, SelectorListingPageParser, \
+    LxmlListingPageParser, SpeculativePagesWindow
+
+
+class ShopRecordsSpiderTest(TestCase):
+
+    PAGE_URL = "https://www.vinylbazar.net/pop-rock-usa-uk"
+
+    PAGE_BODY = """
+        <div class="product">
+            <div class="productTitleContent"><a href="/product-1">Record 1</a></div>
+            <span class="product_price_text">100\xa0Kč</span>
+        </div>
+        <div class="product">
+            <div class="productTitleContent"><a href="/product-2">Record 2</a></div>
+            <span class="product_price_text">250,50\xa0Kč</span>
+        </div>
+        <div class="pagination"><a class="next" href="?page=2">Next</a></div>
+    """
+
+    def setUp(self) -> None:
+        self.http_cache = mock.Mock()
+        self.http_cache.get_entry.return_value = None
+
+    def _parse(self, known_links: [str], known_pages_count: int = 0, **response_kwargs) -> ([dict], list):
+        records = []
+        spider = ShopRecordsSpider(args={
+            "start_urls": [self.PAGE_URL],
+            "shop_definition": shops.VINYL_BAZAR,
+            "data_read_callback": records.append,
+            "is_known_record": lambda record: record["link"] in known_links,
+            "known_pages_limit": 2,
+            "http_cache": self.http_cache
+        })
+        response = HtmlResponse(
+            url=self.PAGE_URL,
+            encoding="utf-8",
+            request=Request(self.PAGE_URL, meta={spider.KNOWN_PAGES_COUNT_META_KEY: known_pages_count}),
+            **{"body": self.PAGE_BODY.encode(), **response_kwargs}
+        )
+        return records, list(spider.parse(response))
+
+    def test_parse(self):
+        records, requests = self._parse(known_links=[])
+        self.assertEqual(
+            records,
+            [
+                {"name": "Record 1", "price": 100, "link": "https://www.vinylbazar.net/product-1"},
+                {"name": "Record 2", "price": 250.5, "link": "https://www.vinylbazar.net/product-2"}
+            ]
+        )
+        self.assertEqual([request.url for request in requests], [self.PAGE_URL + "?page=2"])
+
+    def test_known_pages_limit(self):
+        known_links = ["https://www.vinylbazar.net/product-1", "https://www.vinylbazar.net/product-2"]
+        _, requests = self._parse(known_links=known_links[:1], known_pages_count=1)
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0].meta[ShopRecordsSpider.KNOWN_PAGES_COUNT_META_KEY], 0)
+        _, requests = self._parse(known_links=known_links)
+        self.assertEqual(requests[0].meta[ShopRecordsSpider.KNOWN_PAGES_COUNT_META_KEY], 1)
+        _, requests = self._parse(known_links=known_links, known_pages_count=1)
+        self.assertEqual(requests, [])
+
+    def test_not_modified_page_replay(self):
+        records, _ = self._parse(known_links=[], headers={"ETag": "etag"})
+        url, cache_entry = self.http_cache.set_entry.call_args[0]
+        self.assertEqual(url, self.PAGE_URL)
+        self.assertEqual(cache_entry.get_conditional_headers(), {"If-None-Match": "etag"})
+        self.assertEqual(cache_entry.get_records(), records)
+        self.http_cache.reset_mock()
+        self.http_cache.get_entry.return_value = cache_entry
+        replayed_records, requests = self._parse(known_links=[], status=304, body=b"")
+        self.assertEqual(replayed_records, records)
+        self.assertEqual([request.url for request in requests], [self.PAGE_URL + "?page=2"])
+        self.http_cache.set_entry.assert_not_called()
+
+    def test_not_modified_page_without_cache_entry(self):
+        records, requests = self._parse(known_links=[], status=304, body=b"")
+        self.assertEqual(records, [])
+        self.assertEqual([request.url for request in requests], [self.PAGE_URL])
+        self.assertTrue(requests[0].dont_filter)
+
+
+class ShopDefinitionsTest(TestCase):
+
+    FIXTURES_DIR_PATH = os.path.dirname(os.path.abspath(__file__)) + "/fixtures/extraction"
+
+    FIXTURES = [
+        (shops.VINYL_EMPIRE, "https://vinylempire.cz/13-bazarove-vinyly?id_category=13&n=60", "vinyl_empire.html"),
+        (
+            shops.BLACK_VINYL_BAZAR,
+            "https://www.blackvinylbazar.cz/bazar?ids=2&krit=raz8-80-1",
+            "black_vinyl_bazar.html"
+        ),
+        (shops.VINYL_BAZAR, "https://www.vinylbazar.net/pop-rock-usa-uk", "vinyl_bazar.html"),
+        (shops.LP_BAZAR, "https://www.lpbazar.cz/lp-desky/", "lp_bazar.html")
+    ]
+
+    def _parse(
+            self,
+            shop_definition: shops.ShopDefinition,
+            page_url: str,
+            fixture_name: str,
+            page_parser: ListingPageParser = None,
+            encoding: str = "utf-8"
+    ) -> ([dict], [str]):
+        records = []
+        spider = ShopRecordsSpider(args={
+            "start_urls": [page_url],
+            "shop_definition": shop_definition,
+            "page_parser": page_parser,
+            "data_read_callback": records.append
+        })
+        with open(f"{self.FIXTURES_DIR_PATH}/{fixture_name}", encoding="utf-8") as f:
+            body = f.read().encode(encoding)
+        response = HtmlResponse(
+            url=page_url,
+            body=body,
+            headers={"Content-Type": f"text/html; charset={encoding}"},
+            request=Request(page_url)
+        )
+        return records, [request.url for request in spider.parse(response)]
+
+    def test_lxml_parser_parity(self):
+        for (shop_definition, page_url, fixture_name) in self.FIXTURES:
+            for encoding in ["utf-8", "cp1250"]:
+                with self.subTest(fixture_name=fixture_name, encoding=encoding):
+                    records, next_urls = self._parse(
+                        shop_definition, page_url, fixture_name, SelectorListingPageParser(), encoding
+                    )
+                    self.assertEqual(len(records), 2)
+                    self.assertEqual(
+                        self._parse(shop_definition, page_url, fixture_name, LxmlListingPageParser(), encoding),
+                        (records, next_urls)
+                    )
+
+    def test_lxml_parser_empty_page(self):
+        spider = ShopRecordsSpider(args={
+            "start_urls": [],
+            "shop_definition": shops.BLACK_VINYL_BAZAR,
+            "page_parser": LxmlListingPageParser(),
+            "data_read_callback": mock.Mock()
+        })
+        page_url = "https://www.blackvinylbazar.cz/bazar?ids=2&krit=raz8-80-3"
+        self.assertEqual(list(spider.parse(HtmlResponse(url=page_url, body=b"", request=Request(page_url)))), [])
+
+    def test_vinyl_empire(self):
+        records, next_urls = self._parse(
+            shops.VINYL_EMPIRE,
+            "https://vinylempire.cz/13-bazarove-vinyly?id_category=13&n=60",
+            "vinyl_empire.html"
+        )
+        self.assertEqual(records, [
+            {
+                "name": "Pink Floyd - Animals",
+                "price": 450.0,
+                "link": "https://vinylempire.cz/bazarove-vinyly/1001-pink-floyd-animals.html"
+            },
+            {
+                "name": "Olympic - Želva",
+                "price": 1290.5,
+                "link": "https://vinylempire.cz/bazarove-vinyly/1002-olympic-zelva.html"
+            }
+        ])
+        self.assertEqual(next_urls, ["https://vinylempire.cz/13-bazarove-vinyly?id_category=13&n=60&p=2"])
+
+    def test_black_vinyl_bazar(self):
+        records, next_urls = self._parse(
+            shops.BLACK_VINYL_BAZAR,
+            "https://www.blackvinylbazar.cz/bazar?ids=2&krit=raz8-80-1",
+            "black_vinyl_bazar.html"
+        )
+        self.assertEqual(records, [
+            {
+                "name": "Deep Purple - Machine Head",
+                "price": 390.0,
+                "link": "https://www.blackvinylbazar.cz/bazar/deep-purple-machine-head-2101"
+            },
+            {
+                "name": "Marta Kubišová - Songy a balady",
+                "price": 1250.5,
+                "link": "https://www.blackvinylbazar.cz/bazar/marta-kubisova-songy-a-balady-2102"
+            }
+        ])
+        self.assertEqual(next_urls, ["https://www.blackvinylbazar.cz/bazar?ids=2&krit=raz8-80-2"])
+
+    def test_vinyl_bazar(self):
+        records, next_urls = self._parse(
+            shops.VINYL_BAZAR,
+            "https://www.vinylbazar.net/pop-rock-usa-uk",
+            "vinyl_bazar.html"
+        )
+        self.assertEqual(records, [
+            {
+                "name": "The Beatles - Abbey Road",
+                "price": 799.0,
+                "link": "https://www.vinylbazar.net/the-beatles-abbey-road"
+            },
+            {"name": "Karel Gott - Zpívá", "price": 149.9, "link": "https://www.vinylbazar.net/karel-gott-zpiva"}
+        ])
+        self.assertEqual(next_urls, ["https://www.vinylbazar.net/pop-rock-usa-uk?page=2"])
+
+    def test_lp_bazar(self):
+        records, next_urls = self._parse(
+            shops.LP_BAZAR,
+            "https://www.lpbazar.cz/lp-desky/",
+            "lp_bazar.html"
+        )
+        self.assertEqual(records, [
+            {
+                "name": "Queen - A Night At The Opera",
+                "price": 590.0,
+                "link": "https://www.lpbazar.cz/queen-a-night-at-the-opera/"
+            },
+            {
+                "name": "Pražský výběr - Straka v hrsti",
+                "price": 1200.0,
+                "link": "https://www.lpbazar.cz/pražský-výběr-straka-v-hrsti/"
+            }
+        ])
+        self.assertEqual(next_urls, ["https://www.lpbazar.cz/lp-desky/strana-2/"])
+
+
+class SpeculativePagesWindowTest(TestCase):
+
+    def test_window(self):
+        pages_window = SpeculativePagesWindow(size=3)
+        self.assertEqual(list(pages_window.get_pages_to_request(0)), [0, 1, 2])
+        self.assertEqual(list(pages_window.get_pages_to_request(2)), [3, 4])
+        self.assertEqual(list(pages_window.get_pages_to_request(1)), [])
+        pages_window.set_last_page(3)
+        self.assertEqual(list(pages_window.get_pages_to_request(4)), [])
+        self.assertFalse(pages_window.is_cancelled(3))
+        self.assertTrue(pages_window.is_cancelled(4))
+
+    def test_known_pages_limit(self):
+        pages_window = SpeculativePagesWindow(size=4, known_pages_limit=2)
+        pages_window.mark_known_page(1)
+        pages_window.mark_known_page(3)
+        self.assertIsNone(pages_window.last_page_number)
+        pages_window.mark_known_page(2)
+        self.assertEqual(pages_window.last_page_number, 2)
+
+    def test_dict_conversion(self):
+        pages_window = SpeculativePagesWindow(size=4, known_pages_limit=2)
+        pages_window.get_pages_to_request(0)
+        pages_window.mark_known_page(1)
+        pages_window.set_last_page(6)
+        self.assertEqual(SpeculativePagesWindow.from_dict(pages_window.to_dict()).to_dict(), pages_window.to_dict())
+
+
+class SpeculativePaginationTest(TestCase):
+
+    FIRST_PAGE_URL = "https://www.blackvinylbazar.cz/bazar?ids=2&krit=raz8-80-1"
+
+    RECORD_BODY = """
+        <div class="ramecekshop">
+            <a class="nadpisramecek" href="bazar/record-{0}">Record {0}</a>
+            <a class="objednejkosobr">100\xa0Kč</a>
+        </div>
+    """
+
+    def setUp(self) -> None:
+        self.records = []
+        self.spider = ShopRecordsSpider(args={
+            "start_urls": [self.FIRST_PAGE_URL],
+            "shop_definition": shops.BLACK_VINYL_BAZAR,
+            "data_read_callback": self.records.append
+        })
+
+    def _parse(self, request: Request, is_empty: bool = False) -> [Request]:
+        page_number = request.meta[ShopRecordsSpider.PAGE_NUMBER_META_KEY]
+        body = "" if is_empty else self.RECORD_BODY.format(page_number)
+        return list(self.spider.parse(
+            HtmlResponse(url=request.url, body=body.encode(), encoding="utf-8", request=request)
+        ))
+
+    def _fail(self, request: Request, exception: Exception = None):
+        failure = Failure(exception or HttpError(HtmlResponse(url=request.url, status=500, request=request)))
+        failure.request = request
+        request.errback(failure)
+
+    def test_window(self):
+        requests = list(self.spider.start_requests())
+        self.assertEqual(
+            [request.url for request in requests],
+            [self.FIRST_PAGE_URL[:-1] + str(page) for page in range(1, 5)]
+        )
+        self.assertEqual([request.priority for request in requests], [0, -1, -2, -3])
+        self.assertEqual(
+            [request.url for request in self._parse(requests[1])],
+            [self.FIRST_PAGE_URL[:-1] + "5", self.FIRST_PAGE_URL[:-1] + "6"]
+        )
+        self.assertEqual(self._parse(requests[2], is_empty=True), [])
+        self.assertEqual(self._parse(requests[0]), [])
+        self.assertEqual(len(self.records), 2)
+        self.assertFalse(self.spider.is_cancelled_request(requests[1]))
+        self.assertTrue(self.spider.is_cancelled_request(requests[3]))
+
+    def test_failed_pages(self):
+        self.spider.metrics = ExtractionMetrics()
+        requests = list(self.spider.start_requests())
+        self._parse(requests[0])
+        self._fail(requests[1])
+        followed_requests = self._parse(requests[2])
+        self._fail(followed_requests[0], IgnoreRequest())
+        self._parse(requests[3], is_empty=True)
+        # The pages past the last one aren't missed
+        for request in followed_requests[1:]:
+            self._fail(request)
+        self.spider.closed("finished")
+        self.assertEqual(self.spider.failed_requests, [requests[1]] + followed_requests[1:])
+        self.assertEqual(self.spider.metrics.failed_pages_count, 1)
+
+
+class ResumedCrawlTest(SpeculativePaginationTest):
+
+    STORAGE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/test_resumed_crawl_storage"
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.STORAGE_PATH):
+            shutil.rmtree(self.STORAGE_PATH)
+        self.records = []
+        self.spider = self._create_spider()
+
+    def tearDown(self) -> None:
+        self.spider.checkpoint.clear()
+        shutil.rmtree(self.STORAGE_PATH)
+
+    def _create_spider(self) -> ShopRecordsSpider:
+        return ShopRecordsSpider(args={
+            "start_urls": [self.FIRST_PAGE_URL],
+            "shop_definition": shops.BLACK_VINYL_BAZAR,
+            "data_read_callback": self.records.append,
+            "checkpoint": JsonFileCrawlCheckpoint(self.STORAGE_PATH)
+        })
+
+    def test_resumed_crawl(self):
+        requests = list(self.spider.start_requests())
+        followed_requests = self._parse(requests[0]) + self._parse(requests[1])
+        # The crawl is interrupted
+        self.spider.closed("shutdown")
+        self.records.clear()
+        self.spider = self._create_spider()
+        resumed_requests = sorted(self.spider.start_requests(), key=lambda request: request.url)
+        self.assertEqual(len(self.records), 2)
+        self.assertEqual(
+            [request.url for request in resumed_requests],
+            sorted(request.url for request in requests[2:] + followed_requests)
+        )
+        self.assertEqual(self._parse(resumed_requests[0], is_empty=True), [])
+        self.assertTrue(self.spider.is_cancelled_request(requests[3]))
+        self.spider.closed("finished")
+        self.assertFalse(JsonFileCrawlCheckpoint(self.STORAGE_PATH).is_saved())
+
+
+class ShopRecordsExtractorTest(TestCase):
+
+    def test_records_validation(self):
+        crawler_process_mock = mock.Mock()
+        extractor = ShopRecordsExtractor(crawler_process_mock, shops.VINYL_BAZAR)
+        crawler_process_mock.crawl.assert_not_called()
+        extractor.schedule_extraction()
+        data_read_callback = crawler_process_mock.crawl.call_args[1]["args"]["data_read_callback"]
+        data_read_callback({"name": "Record 1", "price": 100.0, "link": "l1"})
+        data_read_callback({"name": "Record 1", "price": 100.0, "link": "l1"})
+        data_read_callback({"name": "Record 2", "price": "100", "link": "l2"})
+        self.assertEqual(extractor.get_records().get_records(), [VinylRecord("Record 1", 100.0, "l1")])
+        self.assertEqual(extractor.get_metrics().invalid_items_count, 1)
+        extractor.release_records()
+        self.assertEqual(len(extractor.get_records()), 0)
+
+    def test_finished_callback(self):
+        crawler_process_mock = mock.Mock()
+        extractor = ShopRecordsExtractor(crawler_process_mock, shops.VINYL_BAZAR)
+        extractor.schedule_extraction()
+        callback = mock.Mock()
+        extractor.add_finished_callback(callback)
+        finished_callback = crawler_process_mock.crawl.return_value.addBoth.call_args[0][0]
+        self.assertEqual(finished_callback("result"), "result")
+        callback.assert_called_once_with()
+
+    def test_crawl_profile(self):
+        crawler_process_mock = mock.Mock()
+        ShopRecordsExtractor(
+            crawler_process_mock,
+            shops.VINYL_BAZAR,
+            crawl_profile=CrawlProfile(concurrent_requests_per_domain=2)
+        ).schedule_extraction()
+        spider_class = crawler_process_mock.create_crawler.call_args[0][0]
+        self.assertTrue(issubclass(spider_class, ShopRecordsSpider))
+        self.assertEqual(spider_class.custom_settings["CONCURRENT_REQUESTS_PER_DOMAIN"], 2)
+        self.assertEqual(spider_class.custom_settings["USER_AGENT"], ShopRecordsSpider.custom_settings["USER_AGENT"])
+        self.assertNotIn("CONCURRENT_REQUESTS_PER_DOMAIN", ShopRecordsSpider.custom_settings)
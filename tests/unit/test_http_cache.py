@@ -0,0 +1,53 @@
+import os
+import json
+import shutil
+from unittest import TestCase
+from rolba.http_cache import JsonFileHttpCache, HttpCacheEntry, InvalidHttpCacheFileError
+
+
+class JsonFileHttpCacheTest(TestCase):
+
+    STORAGE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/test_http_cache_storage"
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.STORAGE_PATH):
+            shutil.rmtree(self.STORAGE_PATH)
+        self.file_path = self.STORAGE_PATH + "/http_cache.json"
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.STORAGE_PATH)
+
+    @staticmethod
+    def _create_entry(etag: str) -> HttpCacheEntry:
+        return HttpCacheEntry(etag, None, [{"name": "a", "price": 1, "link": "l"}], "next")
+
+    def test_save_and_load(self):
+        cache = JsonFileHttpCache(self.file_path, max_size=10000)
+        cache.set_entry("url", HttpCacheEntry("etag", "yesterday", [{"name": "a", "price": 1, "link": "l"}], None))
+        cache.save()
+        entry = JsonFileHttpCache(self.file_path, max_size=10000).get_entry("url")
+        self.assertEqual(entry.get_records(), [{"name": "a", "price": 1, "link": "l"}])
+        self.assertIsNone(entry.get_next_page_url())
+        self.assertEqual(
+            entry.get_conditional_headers(),
+            {"If-None-Match": "etag", "If-Modified-Since": "yesterday"}
+        )
+
+    def test_least_recently_used_eviction(self):
+        entry_size = len("url 1") + len(json.dumps(self._create_entry("etag 1").to_dict()))
+        cache = JsonFileHttpCache(self.file_path, max_size=2 * entry_size)
+        cache.set_entry("url 1", self._create_entry("etag 1"))
+        cache.set_entry("url 2", self._create_entry("etag 2"))
+        cache.get_entry("url 1")
+        cache.set_entry("url 3", self._create_entry("etag 3"))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get_entry("url 2"))
+        self.assertEqual(cache.get_entry("url 1").get_etag(), "etag 1")
+        self.assertEqual(cache.get_entry("url 3").get_etag(), "etag 3")
+
+    def test_invalid_file_error(self):
+        os.makedirs(self.STORAGE_PATH)
+        with open(self.file_path, "w") as f:
+            f.write("[]")
+        with self.assertRaises(InvalidHttpCacheFileError):
+            JsonFileHttpCache(self.file_path, max_size=10000)
@@ -0,0 +1,83 @@
+from unittest import TestCase
+from rolba.record import VinylRecord
+from rolba.matching import InvertedRecordsMatchingIndex, KeywordsAutomaton, get_name_tokens
+
+
+class NameTokensTest(TestCase):
+
+    def test_folding(self):
+        self.assertEqual(get_name_tokens("Kryštof – OSTROV (LP)"), {"krystof", "ostrov", "lp"})
+        self.assertEqual(get_name_tokens("Žlutý pes: Příběh"), {"zluty", "pes", "pribeh"})
+        self.assertEqual(get_name_tokens(" – "), set())
+
+
+class InvertedRecordsMatchingIndexTest(TestCase):
+
+    def setUp(self):
+        self.index = InvertedRecordsMatchingIndex(min_similarity=0.6)
+        self.index.set_records("shop_1", [
+            VinylRecord("Kryštof - Ostrov LP", 600, "l1"),
+            VinylRecord("Radiohead - OK Computer LP", 700, "l2")
+        ])
+        self.index.set_records("shop_2", [
+            VinylRecord("KRYSTOF: Ostrov (LP)", 550, "l3"),
+            VinylRecord("Kryštof - Inzerát LP", 500, "l4")
+        ])
+
+    def test_find_matches(self):
+        matches = self.index.find_matches(VinylRecord("Krystof - Ostrov LP", 650, "l5"))
+        self.assertEqual(
+            sorted((title, record.get_link(), similarity) for title, record, similarity in matches),
+            [("shop_1", "l1", 1.0), ("shop_2", "l3", 1.0)]
+        )
+        matches = self.index.find_matches(VinylRecord("Kryštof - Ostrov", 650, "l5"))
+        self.assertEqual([similarity for _, _, similarity in matches], [2 / 3, 2 / 3])
+        self.assertEqual(self.index.find_matches(VinylRecord("Beatles - Abbey Road", 650, "l6")), [])
+        self.assertEqual(self.index.find_matches(VinylRecord("", 650, "l6")), [])
+
+    def test_excluded_title(self):
+        matches = self.index.find_matches(VinylRecord("Kryštof - Ostrov LP", 600, "l1"), "shop_1")
+        self.assertEqual([record.get_link() for _, record, _ in matches], ["l3"])
+
+    def test_cheapest_match(self):
+        self.index.set_records("shop_3", [VinylRecord("Kryštof Ostrov", 450, "l5")])
+        self.assertEqual(
+            self.index.get_cheapest_match(VinylRecord("Kryštof - Ostrov LP", 600, "l1"), "shop_1"),
+            ("shop_3", VinylRecord("Kryštof Ostrov", 450, "l5"))
+        )
+        self.assertIsNone(self.index.get_cheapest_match(VinylRecord("Beatles - Abbey Road", 650, "l6")))
+
+    def test_set_records(self):
+        self.index.set_records("shop_2", [VinylRecord("Radiohead - OK Computer (LP)", 650, "l5")])
+        self.assertTrue(self.index.has_records("shop_2"))
+        self.assertFalse(self.index.has_records("shop_3"))
+        self.assertEqual(
+            [record.get_link() for _, record, _ in self.index.find_matches(VinylRecord("Kryštof Ostrov LP", 1, "l"))],
+            ["l1"]
+        )
+        self.assertEqual(
+            [record.get_link() for _, record, _ in self.index.find_matches(VinylRecord("OK Computer", 1, "l"))],
+            []
+        )
+        self.assertEqual(
+            sorted(record.get_link() for _, record, _ in self.index.find_matches(
+                VinylRecord("Radiohead OK Computer", 1, "l")
+            )),
+            ["l2", "l5"]
+        )
+
+
+class KeywordsAutomatonTest(TestCase):
+
+    def test_find(self):
+        automaton = KeywordsAutomaton(["Radiohead", "Kryštof", "OK Computer", "he", "The Beatles", "beat", " – "])
+        self.assertEqual(automaton.find("RADIOHEAD - OK Computer (LP)"), {0, 2})
+        self.assertEqual(automaton.find("Krystof: Ostrov"), {1})
+        self.assertEqual(automaton.find("Kryštofová"), set())
+        self.assertEqual(automaton.find("The Beatles - Abbey Road"), {4})
+        self.assertEqual(automaton.find("He said he"), {3})
+        self.assertEqual(automaton.find(""), set())
+
+    def test_overlapping_keywords(self):
+        automaton = KeywordsAutomaton(["a b c", "b c d", "c", "b c d e f"])
+        self.assertEqual(automaton.find("a b c d e"), {0, 1, 2})
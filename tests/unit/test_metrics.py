@@ -0,0 +1,97 @@
+import os
+import json
+import tempfile
+from unittest import TestCase
+from rolba.metrics import Histogram, ExtractionMetrics, JsonFileMetricsWriter, PrometheusTextFileMetricsWriter
+
+
+class HistogramTest(TestCase):
+
+    def test_observe(self):
+        histogram = Histogram([0.1, 1])
+        for value in [0.05, 0.1, 0.5, 5]:
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.get_cumulative_counts(), [(0.1, 2), (1, 3), (float("inf"), 4)])
+        self.assertEqual(histogram.sum, 5.65)
+        self.assertEqual(histogram.count, 4)
+
+    def test_merge(self):
+        histogram = Histogram([1])
+        histogram.observe(0.5)
+        other_histogram = Histogram([1])
+        other_histogram.observe(2)
+        histogram.merge(other_histogram)
+        self.assertEqual(histogram.counts, [1, 1])
+        self.assertEqual(histogram.count, 2)
+
+
+class ExtractionMetricsTest(TestCase):
+
+    def test_crawl_stats(self):
+        metrics = ExtractionMetrics()
+        metrics.set_crawl_stats({
+            "elapsed_time_seconds": 2.0,
+            "downloader/response_count": 10,
+            "downloader/response_status_count/304": 3,
+            "downloader/response_bytes": 1000,
+            "retry/count": 1,
+            "downloader/exception_count": 3,
+            "downloader/exception_type_count/scrapy.exceptions.IgnoreRequest": 2
+        })
+        metrics.items_count = 100
+        self.assertEqual(metrics.pages_count, 10)
+        self.assertEqual(metrics.not_modified_pages_count, 3)
+        self.assertEqual(metrics.retries_count, 1)
+        self.assertEqual(metrics.cancelled_requests_count, 2)
+        self.assertEqual(metrics.download_errors_count, 1)
+        self.assertEqual(metrics.errors_count, 0)
+        self.assertEqual(metrics.get_items_per_second(), 50)
+        self.assertFalse(metrics.is_incomplete)
+
+    def test_finish_reason(self):
+        metrics = ExtractionMetrics()
+        metrics.set_crawl_stats({"finish_reason": "closespider_timeout"})
+        self.assertTrue(metrics.is_incomplete)
+        self.assertTrue(metrics.is_timed_out)
+        metrics.set_crawl_stats({"finish_reason": "shutdown"})
+        self.assertTrue(metrics.is_incomplete)
+        self.assertFalse(metrics.is_timed_out)
+
+
+class MetricsWritersTest(TestCase):
+
+    def setUp(self) -> None:
+        self.file_path = tempfile.mktemp()
+        self.metrics = ExtractionMetrics()
+        self.metrics.pages_count = 5
+        self.metrics.download_latency.observe(0.2)
+
+    def tearDown(self) -> None:
+        if os.path.isfile(self.file_path):
+            os.remove(self.file_path)
+
+    def test_json_file(self):
+        JsonFileMetricsWriter(self.file_path).write({"Shop": self.metrics})
+        with open(self.file_path) as f:
+            dict_metrics = json.load(f)["Shop"]
+        self.assertEqual(dict_metrics["pages_count"], 5)
+        self.assertEqual(dict_metrics["download_latency"]["count"], 1)
+        self.assertEqual(dict_metrics["download_latency"]["buckets"]["0.25"], 1)
+
+    def test_prometheus_text_file(self):
+        PrometheusTextFileMetricsWriter(self.file_path).write({"Shop \"1\"": self.metrics})
+        with open(self.file_path) as f:
+            lines = f.read().splitlines()
+        self.assertIn("# TYPE rolba_extraction_pages gauge", lines)
+        self.assertIn("rolba_extraction_pages{extraction=\"Shop \\\"1\\\"\"} 5", lines)
+        self.assertIn("# TYPE rolba_extraction_download_latency_seconds histogram", lines)
+        self.assertIn(
+            "rolba_extraction_download_latency_seconds_bucket{extraction=\"Shop \\\"1\\\"\",le=\"0.1\"} 0",
+            lines
+        )
+        self.assertIn(
+            "rolba_extraction_download_latency_seconds_bucket{extraction=\"Shop \\\"1\\\"\",le=\"+Inf\"} 1",
+            lines
+        )
+        self.assertIn("rolba_extraction_download_latency_seconds_count{extraction=\"Shop \\\"1\\\"\"} 1", lines)
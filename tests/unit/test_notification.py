@@ -0,0 +1,55 @@
+from unittest import TestCase, mock
+from rolba.record import VinylRecord
+from rolba.diff import RecordsChangeSet
+from rolba.notification import EmailVinylRecordsCollectionsNotifier, SubscribersWatchlists
+
+
+class SubscribersWatchlistsTest(TestCase):
+
+    def test_watchers(self):
+        watchlists = SubscribersWatchlists({
+            "a@test.test": [("Radiohead", 800), ("Kryštof", None)],
+            "b@test.test": [("radiohead", None)],
+            "c@test.test": []
+        })
+        self.assertEqual(
+            watchlists.get_watchers(VinylRecord("Radiohead - OK Computer", 700, "l1")),
+            {"a@test.test", "b@test.test"}
+        )
+        self.assertEqual(watchlists.get_watchers(VinylRecord("Radiohead - Kid A", 900, "l2")), {"b@test.test"})
+        self.assertEqual(watchlists.get_watchers(VinylRecord("Krystof - Ostrov", 900, "l3")), {"a@test.test"})
+        self.assertEqual(watchlists.get_watchers(VinylRecord("Beatles - Abbey Road", 500, "l4")), set())
+        self.assertTrue(watchlists.has_watchlist("c@test.test"))
+        self.assertFalse(watchlists.has_watchlist("d@test.test"))
+
+
+class EmailVinylRecordsCollectionsNotifierTest(TestCase):
+
+    def test_watchlists(self):
+        email_sender_mock = mock.Mock()
+        notifier = EmailVinylRecordsCollectionsNotifier(
+            email_sender=email_sender_mock,
+            subscribers_emails=["a@test.test", "b@test.test", "c@test.test"],
+            email_subject="test",
+            subscribers_watchlists=SubscribersWatchlists({
+                "a@test.test": [("Radiohead", 800)],
+                "b@test.test": [("Beatles", None)]
+            })
+        )
+        changeset = RecordsChangeSet()
+        changeset.added.add_record(VinylRecord("Radiohead - OK Computer", 700, "l1"))
+        changeset.added.add_record(VinylRecord("Kryštof - Ostrov", 500, "l2"))
+        changeset.price_decreased.append(
+            (VinylRecord("Radiohead - Kid A", 1000, "l3"), VinylRecord("Radiohead - Kid A", 750, "l3"))
+        )
+        notifier.send_notification([("test shop", changeset)])
+
+        self.assertEqual(email_sender_mock.send_email.call_count, 2)
+        (full_email, full_recipients), _ = email_sender_mock.send_email.call_args_list[0]
+        self.assertEqual(full_recipients, ["c@test.test"])
+        self.assertIn("Ostrov", full_email.get_body())
+        (watched_email, watched_recipients), _ = email_sender_mock.send_email.call_args_list[1]
+        self.assertEqual(watched_recipients, ["a@test.test"])
+        self.assertIn("OK Computer", watched_email.get_body())
+        self.assertIn("Kid A", watched_email.get_body())
+        self.assertNotIn("Ostrov", watched_email.get_body())
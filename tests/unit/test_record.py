@@ -1,6 +1,6 @@
 from unittest import TestCase
 from rolba.record import VinylRecord, VinylRecordFactory, InvalidJsonSchemaError, \
-    VinylRecordDictMapper, RecordsCollection
+    VinylRecordDictMapper, RecordsCollection, VinylRecordsCollection
 
 
 class VinylRecordTest(TestCase):
@@ -15,6 +15,19 @@ class VinylRecordTest(TestCase):
             VinylRecord("b", 2, "l"),
         )
 
+    def test_hash(self):
+        self.assertEqual(
+            hash(VinylRecord("a", 1, "l")),
+            hash(VinylRecord("a", 1, "l"))
+        )
+        self.assertEqual(
+            len({VinylRecord("a", 1, "l"), VinylRecord("a", 1, "l"), VinylRecord("a", 2, "l")}),
+            2
+        )
+
+    def test_slots(self):
+        self.assertFalse(hasattr(VinylRecord("a", 1, "l"), "__dict__"))
+
 
 class VinylRecordFactoryTest(TestCase):
 
@@ -38,6 +51,23 @@ class VinylRecordFactoryTest(TestCase):
         with self.assertRaises(InvalidJsonSchemaError):
             self.factory.create_from_dict({"name": "a", "price": -1, "link": "l"})
 
+    def test_create_many_success(self):
+        self.assertEqual(
+            self.factory.create_many(
+                [{"name": "a", "price": 1, "link": "l"}, {"name": "b", "price": 2.5, "link": "m"}]
+            ),
+            [VinylRecord("a", 1, "l"), VinylRecord("b", 2.5, "m")]
+        )
+
+    def test_create_many_from_invalid_schema(self):
+        with self.assertRaises(InvalidJsonSchemaError) as context:
+            self.factory.create_many(
+                [{"name": "a", "price": 1, "link": "l"}, {"name": "b", "price": -1, "link": "m"}]
+            )
+        self.assertEqual(context.exception.given_json, {"name": "b", "price": -1, "link": "m"})
+        with self.assertRaises(InvalidJsonSchemaError):
+            self.factory.create_many({"name": "a", "price": 1, "link": "l"})
+
 
 class VinylRecordJsonMapperTest(TestCase):
 
@@ -56,6 +86,20 @@ class VinylRecordJsonMapperTest(TestCase):
 
 class RecordsCollectionTest(TestCase):
 
+    def test_add_record_keeps_order_and_skips_duplicates(self):
+        collection = RecordsCollection().add_record(
+            VinylRecord("b", 2, "l")
+        ).add_record(
+            VinylRecord("a", 1, "l")
+        ).add_record(
+            VinylRecord("b", 2, "l")
+        )
+        self.assertEqual(len(collection), 2)
+        self.assertEqual(
+            collection.get_records(),
+            [VinylRecord("b", 2, "l"), VinylRecord("a", 1, "l")]
+        )
+
     def test_contains(self):
         collection = RecordsCollection().add_record(
             VinylRecord("a", 1, "l")
@@ -118,3 +162,60 @@ class RecordsCollectionTest(TestCase):
                 VinylRecord("b", 2, "l")
             )
         )
+
+
+class VinylRecordsCollectionTest(TestCase):
+
+    def test_add_record(self):
+        collection = VinylRecordsCollection().add_record(
+            VinylRecord("b", 2, "l1")
+        ).add_record(
+            VinylRecord("a", 1, "l2")
+        ).add_record(
+            VinylRecord("b", 2, "l1")
+        ).add_record(
+            VinylRecord("c", 3, "l1")
+        )
+        self.assertEqual(len(collection), 3)
+        self.assertEqual(
+            collection.get_records(),
+            [VinylRecord("b", 2, "l1"), VinylRecord("a", 1, "l2"), VinylRecord("c", 3, "l1")]
+        )
+
+    def test_contains(self):
+        collection = VinylRecordsCollection().add_record(
+            VinylRecord("a", 1, "l")
+        ).add_record(
+            VinylRecord("b", 1, "l")
+        )
+        self.assertIn(VinylRecord("a", 1, "l"), collection)
+        self.assertIn(VinylRecord("b", 1, "l"), collection)
+        self.assertNotIn(VinylRecord("a", 2, "l"), collection)
+        self.assertNotIn(VinylRecord("a", 1, "m"), collection)
+
+    def test_equality_with_records_collection(self):
+        self.assertEqual(
+            VinylRecordsCollection().add_record(
+                VinylRecord("a", 1, "l")
+            ),
+            RecordsCollection().add_record(
+                VinylRecord("a", 1, "l")
+            )
+        )
+
+    def test_subtraction(self):
+        diff_collection = VinylRecordsCollection().add_record(
+            VinylRecord("a", 1, "l")
+        ).add_record(
+            VinylRecord("b", 2, "l")
+        ) - VinylRecordsCollection().add_record(
+            VinylRecord("a", 1, "l")
+        )
+        self.assertIsInstance(diff_collection, VinylRecordsCollection)
+        self.assertEqual(diff_collection.get_records(), [VinylRecord("b", 2, "l")])
+
+    def test_no_list_storage(self):
+        collection = VinylRecordsCollection().add_record(VinylRecord("a", 1, "l"))
+        self.assertNotIsInstance(collection, RecordsCollection)
+        self.assertFalse(hasattr(collection, "records"))
+        self.assertFalse(hasattr(collection, "records_index"))
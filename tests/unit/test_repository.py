@@ -1,9 +1,14 @@
+import io
 import os
 import shutil
 import json
-from unittest import TestCase
-from rolba.record import Record, RecordFactory, RecordDictMapper, RecordsCollection
-from rolba.repository import JsonFileRecordsRepository, InvalidJsonError
+from unittest import TestCase, mock
+from rolba.record import Record, RecordFactory, RecordDictMapper, RecordsCollection, VinylRecord, \
+    VinylRecordFactory, VinylRecordDictMapper, RecordFactoryException
+from rolba.diff import VinylRecordsCollectionsDiffer
+from rolba.repository import JsonFileRecordsRepository, InvalidJsonError, JsonLinesFileRecordsRepository, \
+    InvalidJsonLineError, SqliteRecordsRepository, InvalidTableNameError, BinaryFileRecordsRepository, \
+    BinaryRecordsSnapshot, InvalidBinarySnapshotError, CachedRecordsRepository
 
 
 class TestRecord(Record):
@@ -14,6 +19,9 @@ class TestRecord(Record):
     def __eq__(self, other: "TestRecord") -> bool:
         return self.name == other.name
 
+    def __hash__(self) -> int:
+        return hash(self.name)
+
     def __str__(self) -> str:
         return "Test Record"
 
@@ -85,6 +93,36 @@ class JsonFileRecordsRepositoryTest(TestCase):
         self.assertIsInstance(records_collection, RecordsCollection)
         self.assertEqual(len(records_collection), 2)
 
+    def test_iter_records_streams_in_chunks(self):
+        file_path = self.STORAGE_PATH + "/iter_records.json"
+        repository = JsonFileRecordsRepository(
+            file_path=file_path,
+            record_factory=self.record_factory,
+            record_dict_mapper=self.record_dict_mapper
+        )
+        repository.READ_CHUNK_SIZE = 3
+        repository.LOAD_BATCH_SIZE = 2
+        records = RecordsCollection()
+        for i in range(5):
+            records.add_record(TestRecord(f"test {i}"))
+        repository.save_records(records)
+        records_iterator = repository.iter_records()
+        self.assertEqual(next(records_iterator), TestRecord("test 0"))
+        self.assertEqual(list(records_iterator), records.get_records()[1:])
+
+    def test_invalid_item_fails_without_reading_on(self):
+        repository = JsonFileRecordsRepository(
+            file_path=self.STORAGE_PATH + "/invalid_item.json",
+            record_factory=self.record_factory,
+            record_dict_mapper=self.record_dict_mapper
+        )
+        repository.READ_CHUNK_SIZE = 64
+        for invalid_item in ['{"name": tx}', '{"name": "a"x}', '{"name" "a"}', '{"name": "a\n"}']:
+            f = io.StringIO("[" + invalid_item + ", " + ", ".join(['{"name": "test"}'] * 1000) + "]")
+            with self.assertRaises(InvalidJsonError):
+                list(repository._iter_json_array_items(f))
+            self.assertLess(f.tell(), 3 * repository.READ_CHUNK_SIZE)
+
     def test_invalid_json_load_error(self):
         with self.assertRaises(InvalidJsonError):
             JsonFileRecordsRepository(
@@ -92,3 +130,307 @@ class JsonFileRecordsRepositoryTest(TestCase):
                 record_factory=self.record_factory,
                 record_dict_mapper=self.record_dict_mapper
             ).load_records()
+        file_path = self.STORAGE_PATH + "/truncated.json"
+        with open(file_path, "w") as f:
+            f.write('[{"name": "test 1"}, {"name": "te')
+        with self.assertRaises(InvalidJsonError):
+            JsonFileRecordsRepository(
+                file_path=file_path,
+                record_factory=self.record_factory,
+                record_dict_mapper=self.record_dict_mapper
+            ).load_records()
+
+
+class JsonLinesFileRecordsRepositoryTest(TestCase):
+
+    STORAGE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/test_jsonl_storage"
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.STORAGE_PATH):
+            shutil.rmtree(self.STORAGE_PATH)
+        os.makedirs(self.STORAGE_PATH)
+        self.file_path = self.STORAGE_PATH + "/records.jsonl"
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.STORAGE_PATH)
+
+    def _create_repository(self, compaction_threshold: int = 100) -> JsonLinesFileRecordsRepository:
+        return JsonLinesFileRecordsRepository(
+            file_path=self.file_path,
+            record_factory=TestRecordFactory(),
+            record_dict_mapper=TestRecordDictMapper(),
+            compaction_threshold=compaction_threshold
+        )
+
+    def _get_lines(self) -> [dict]:
+        with open(self.file_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_save_appends_changes_only(self):
+        repository = self._create_repository()
+        repository.save_records(
+            RecordsCollection().add_record(TestRecord("test 1")).add_record(TestRecord("test 2"))
+        )
+        repository.save_records(
+            RecordsCollection().add_record(TestRecord("test 2")).add_record(TestRecord("test 3"))
+        )
+        self.assertEqual(
+            self._get_lines(),
+            [
+                {"op": "add", "record": {"name": "test 1"}},
+                {"op": "add", "record": {"name": "test 2"}},
+                {"op": "remove", "record": {"name": "test 1"}},
+                {"op": "add", "record": {"name": "test 3"}},
+            ]
+        )
+        self.assertEqual(
+            self._create_repository().load_records(),
+            RecordsCollection().add_record(TestRecord("test 2")).add_record(TestRecord("test 3"))
+        )
+
+    def test_compaction(self):
+        repository = self._create_repository(compaction_threshold=1)
+        repository.save_records(RecordsCollection().add_record(TestRecord("test 1")))
+        repository.save_records(RecordsCollection().add_record(TestRecord("test 2")))
+        repository.wait_for_compaction()
+        self.assertEqual(self._get_lines(), [{"op": "add", "record": {"name": "test 2"}}])
+
+    def test_truncated_last_line_is_ignored(self):
+        with open(self.file_path, "w") as f:
+            f.write('{"op": "add", "record": {"name": "test 1"}}\n{"op": "add", "rec')
+        repository = self._create_repository()
+        self.assertEqual(
+            repository.load_records(),
+            RecordsCollection().add_record(TestRecord("test 1"))
+        )
+        self.assertEqual(self._get_lines(), [{"op": "add", "record": {"name": "test 1"}}])
+
+    def test_invalid_line_load_error(self):
+        with open(self.file_path, "w") as f:
+            f.write('{"op": "add", "rec\n{"op": "add", "record": {"name": "test 1"}}\n')
+        with self.assertRaises(InvalidJsonLineError):
+            self._create_repository().load_records()
+
+
+class SqliteRecordsRepositoryTest(TestCase):
+
+    STORAGE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/test_sqlite_storage"
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.STORAGE_PATH):
+            shutil.rmtree(self.STORAGE_PATH)
+        os.makedirs(self.STORAGE_PATH)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.STORAGE_PATH)
+
+    def _create_repository(self, table_name: str) -> SqliteRecordsRepository:
+        return SqliteRecordsRepository(
+            file_path=self.STORAGE_PATH + "/records.db",
+            table_name=table_name,
+            record_factory=VinylRecordFactory(),
+            record_dict_mapper=VinylRecordDictMapper()
+        )
+
+    def test_save_and_load(self):
+        records = RecordsCollection().add_record(
+            VinylRecord("b", 2, "l2")
+        ).add_record(
+            VinylRecord("a", 1, "l1")
+        )
+        repository = self._create_repository("shop_1")
+        repository.save_records(records)
+        repository.save_records(records)
+        self.assertEqual(self._create_repository("shop_1").load_records().get_records(), records.get_records())
+        self.assertEqual(len(self._create_repository("shop_2").load_records()), 0)
+
+    def test_changeset(self):
+        saved_records = RecordsCollection().add_record(
+            VinylRecord("a", 1, "l1")
+        ).add_record(
+            VinylRecord("b", 3, "l2")
+        ).add_record(
+            VinylRecord("c", 3, "l3")
+        ).add_record(
+            VinylRecord("d", 3, "l4")
+        )
+        new_records = RecordsCollection().add_record(
+            VinylRecord("a", 1, "l1")
+        ).add_record(
+            VinylRecord("b", 4, "l2")
+        ).add_record(
+            VinylRecord("c", 2, "l3")
+        ).add_record(
+            VinylRecord("e", 3, "l5")
+        )
+        differ = VinylRecordsCollectionsDiffer()
+        repository = self._create_repository("shop")
+        repository.save_records(saved_records)
+        self.assertEqual(
+            repository.get_changeset(new_records, differ),
+            differ.get_changeset(new_records, saved_records)
+        )
+
+    def test_changeset_with_other_record_key(self):
+        saved_records = RecordsCollection().add_record(
+            VinylRecord("a", 1, "l1")
+        ).add_record(
+            VinylRecord("b", 3, "l2")
+        )
+        new_records = RecordsCollection().add_record(
+            VinylRecord("a", 2, "l3")
+        ).add_record(
+            VinylRecord("c", 3, "l2")
+        )
+        differ = VinylRecordsCollectionsDiffer(VinylRecord.get_name)
+        repository = self._create_repository("shop")
+        repository.save_records(saved_records)
+        self.assertFalse(repository.is_changeset_in_storage(differ))
+        self.assertTrue(repository.is_changeset_in_storage(VinylRecordsCollectionsDiffer()))
+        self.assertEqual(
+            repository.get_changeset(new_records, differ),
+            differ.get_changeset(new_records, saved_records)
+        )
+
+    def test_changeset_with_duplicate_links(self):
+        saved_records = RecordsCollection().add_record(
+            VinylRecord("a", 3, "l1")
+        ).add_record(
+            VinylRecord("a", 5, "l1")
+        ).add_record(
+            VinylRecord("b", 1, "l2")
+        ).add_record(
+            VinylRecord("b", 2, "l2")
+        )
+        new_records = RecordsCollection().add_record(
+            VinylRecord("a", 2, "l1")
+        ).add_record(
+            VinylRecord("a", 1, "l1")
+        ).add_record(
+            VinylRecord("c", 1, "l3")
+        ).add_record(
+            VinylRecord("c", 2, "l3")
+        )
+        differ = VinylRecordsCollectionsDiffer()
+        repository = self._create_repository("shop")
+        repository.save_records(saved_records)
+        changeset = repository.get_changeset(new_records, differ)
+        self.assertEqual(changeset, differ.get_changeset(new_records, saved_records))
+        self.assertEqual(len(changeset.get_price_decreased()), 1)
+
+    def test_changeset_after_failure(self):
+        repository = self._create_repository("shop")
+        repository.save_records(RecordsCollection().add_record(VinylRecord("a", 1, "l1")))
+        new_records = RecordsCollection().add_record(VinylRecord("b", 2, "l2"))
+        with mock.patch.object(repository, "_create_records", side_effect=RecordFactoryException):
+            with self.assertRaises(RecordFactoryException):
+                repository.get_changeset(new_records, VinylRecordsCollectionsDiffer())
+        changeset = repository.get_changeset(
+            RecordsCollection().add_record(VinylRecord("a", 1, "l1")), VinylRecordsCollectionsDiffer()
+        )
+        self.assertEqual(len(changeset), 0)
+
+    def test_invalid_table_name_error(self):
+        with self.assertRaises(InvalidTableNameError):
+            self._create_repository("shop; DROP TABLE shop")
+
+
+class BinaryFileRecordsRepositoryTest(TestCase):
+
+    STORAGE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/test_binary_storage"
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.STORAGE_PATH):
+            shutil.rmtree(self.STORAGE_PATH)
+        os.makedirs(self.STORAGE_PATH)
+        self.file_path = self.STORAGE_PATH + "/records.bin"
+        self.repository = BinaryFileRecordsRepository(
+            file_path=self.file_path,
+            record_factory=VinylRecordFactory(),
+            record_dict_mapper=VinylRecordDictMapper()
+        )
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.STORAGE_PATH)
+
+    def test_save_and_load(self):
+        records = RecordsCollection().add_record(
+            VinylRecord("Příliš žluťoučký kůň", 1.5, "https://shop.cz/item-1")
+        ).add_record(
+            VinylRecord("b", 2, "https://shop.cz/item-2")
+        ).add_record(
+            VinylRecord("b", 3, "https://other-shop.cz")
+        ).add_record(
+            VinylRecord("c", 4, "relative/link")
+        )
+        self.repository.save_records(records)
+        self.assertEqual(self.repository.load_records().get_records(), records.get_records())
+        with BinaryRecordsSnapshot(self.file_path) as snapshot:
+            self.assertEqual(len(snapshot), 4)
+            self.assertEqual(snapshot.prefixes, ["https://shop.cz/", "https://other-shop.cz", ""])
+            self.assertEqual(
+                snapshot.get_dict_record(1),
+                {"name": "b", "price": 2, "link": "https://shop.cz/item-2"}
+            )
+            self.assertEqual(
+                [record["price"] for record in snapshot.iter_dict_records()],
+                [1.5, 2, 3, 4]
+            )
+            self.assertRaises(IndexError, snapshot.get_dict_record, 4)
+            self.assertRaises(IndexError, snapshot.get_dict_record, -1)
+
+    def test_load_missing_file(self):
+        self.assertEqual(len(self.repository.load_records()), 0)
+
+    def test_invalid_snapshot_load_error(self):
+        for content in [b"", b"RLBA", b"{}" * 20]:
+            with open(self.file_path, "wb") as f:
+                f.write(content)
+            with self.assertRaises(InvalidBinarySnapshotError):
+                self.repository.load_records()
+
+    def test_corrupt_record_load_error(self):
+        self.repository.save_records(RecordsCollection().add_record(VinylRecord("ab", 1, "https://shop.cz/item")))
+        with BinaryRecordsSnapshot(self.file_path) as snapshot:
+            records_offset, strings_size = snapshot.records_offset, snapshot.strings_size
+            prefix_index, link_offset, link_length, name_offset, name_length = \
+                BinaryRecordsSnapshot.RECORD.unpack_from(snapshot.buffer, records_offset)
+        with open(self.file_path, "rb") as f:
+            content = f.read()
+        for record in [
+            (5, link_offset, link_length, name_offset, name_length),
+            (prefix_index, link_offset, link_length, strings_size, 1),
+            (prefix_index, strings_size - 1, 2, name_offset, name_length)
+        ]:
+            with open(self.file_path, "wb") as f:
+                f.write(content[:records_offset] + BinaryRecordsSnapshot.RECORD.pack(*record)
+                        + content[records_offset + BinaryRecordsSnapshot.RECORD.size:])
+            with self.assertRaises(InvalidBinarySnapshotError):
+                self.repository.load_records()
+            with BinaryRecordsSnapshot(self.file_path) as snapshot:
+                with self.assertRaises(InvalidBinarySnapshotError):
+                    snapshot.get_dict_record(0)
+        with open(self.file_path, "wb") as f:
+            f.write(content[:-1] + b"\xff")
+        with self.assertRaises(InvalidBinarySnapshotError):
+            self.repository.load_records()
+
+
+class CachedRecordsRepositoryTest(TestCase):
+
+    def test_cached_records(self):
+        saved_records = RecordsCollection().add_record(VinylRecord("a", 1, "l1"))
+        new_records = RecordsCollection().add_record(VinylRecord("b", 2, "l2"))
+        repository = mock.Mock()
+        repository.load_records.return_value = saved_records
+        cached_repository = CachedRecordsRepository(repository)
+        self.assertIs(cached_repository.load_records(), saved_records)
+        self.assertIs(cached_repository.load_records(), saved_records)
+        repository.load_records.assert_called_once()
+        changeset = cached_repository.get_changeset(new_records, VinylRecordsCollectionsDiffer())
+        self.assertEqual(changeset.get_added().get_records(), [VinylRecord("b", 2, "l2")])
+        self.assertEqual(changeset.get_removed().get_records(), [VinylRecord("a", 1, "l1")])
+        cached_repository.save_records(new_records)
+        repository.save_records.assert_called_once_with(new_records)
+        self.assertIs(cached_repository.load_records(), new_records)
+        repository.load_records.assert_called_once()
@@ -0,0 +1,119 @@
+import os
+import shutil
+from unittest import TestCase, mock
+from rolba.scheduling import JsonFileFullCrawlSchedule, JsonFileCircuitBreaker, JsonFileAdaptivePollingSchedule, \
+    InvalidScheduleFileError
+
+
+class JsonFileFullCrawlScheduleTest(TestCase):
+
+    STORAGE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/test_schedule_storage"
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.STORAGE_PATH):
+            shutil.rmtree(self.STORAGE_PATH)
+        self.file_path = self.STORAGE_PATH + "/full_crawls.json"
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.STORAGE_PATH)
+
+    def test_full_crawl_due(self):
+        schedule = JsonFileFullCrawlSchedule(self.file_path, full_crawl_interval=3600)
+        self.assertTrue(schedule.is_full_crawl_due("shop"))
+        schedule.mark_full_crawl_done("shop")
+        self.assertFalse(schedule.is_full_crawl_due("shop"))
+        self.assertTrue(schedule.is_full_crawl_due("other shop"))
+        self.assertFalse(JsonFileFullCrawlSchedule(self.file_path, full_crawl_interval=3600).is_full_crawl_due("shop"))
+        self.assertTrue(JsonFileFullCrawlSchedule(self.file_path, full_crawl_interval=0).is_full_crawl_due("shop"))
+
+    def test_invalid_file_error(self):
+        os.makedirs(self.STORAGE_PATH)
+        with open(self.file_path, "w") as f:
+            f.write("{")
+        with self.assertRaises(InvalidScheduleFileError):
+            JsonFileFullCrawlSchedule(self.file_path, full_crawl_interval=3600)
+
+
+class JsonFileCircuitBreakerTest(TestCase):
+
+    STORAGE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/test_circuit_breaker_storage"
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.STORAGE_PATH):
+            shutil.rmtree(self.STORAGE_PATH)
+        self.file_path = self.STORAGE_PATH + "/circuit_breaker.json"
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.STORAGE_PATH)
+
+    def test_circuit_breaker(self):
+        circuit_breaker = JsonFileCircuitBreaker(self.file_path, failures_threshold=2, cool_off_period=3600)
+        circuit_breaker.record_failure("shop")
+        self.assertFalse(circuit_breaker.is_open("shop"))
+        circuit_breaker.record_success("shop")
+        circuit_breaker.record_failure("shop")
+        self.assertFalse(circuit_breaker.is_open("shop"))
+        circuit_breaker.record_failure("shop")
+        self.assertTrue(circuit_breaker.is_open("shop"))
+        self.assertFalse(circuit_breaker.is_open("other shop"))
+        self.assertTrue(
+            JsonFileCircuitBreaker(self.file_path, failures_threshold=2, cool_off_period=3600).is_open("shop")
+        )
+
+    def test_cool_off_period(self):
+        circuit_breaker = JsonFileCircuitBreaker(self.file_path, failures_threshold=1, cool_off_period=3600)
+        with mock.patch("time.time", return_value=1000):
+            circuit_breaker.record_failure("shop")
+        with mock.patch("time.time", return_value=1000 + 3600):
+            self.assertFalse(circuit_breaker.is_open("shop"))
+            # The failure of the trial run opens the circuit again
+            circuit_breaker.record_failure("shop")
+            self.assertTrue(circuit_breaker.is_open("shop"))
+
+
+class JsonFileAdaptivePollingScheduleTest(TestCase):
+
+    STORAGE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/test_polling_storage"
+
+    def setUp(self) -> None:
+        if os.path.isdir(self.STORAGE_PATH):
+            shutil.rmtree(self.STORAGE_PATH)
+        self.file_path = self.STORAGE_PATH + "/polling.json"
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.STORAGE_PATH)
+
+    def _create_schedule(self) -> JsonFileAdaptivePollingSchedule:
+        return JsonFileAdaptivePollingSchedule(self.file_path, min_interval=600, max_interval=86400)
+
+    @mock.patch("time.time")
+    def test_adaptive_interval(self, time_mock):
+        schedule = self._create_schedule()
+        for title in ["busy shop", "quiet shop"]:
+            time_mock.return_value = 0
+            self.assertTrue(schedule.is_poll_due(title))
+            schedule.record_poll(title, 100)
+            self.assertEqual(schedule.get_interval(title), 600)
+            time_mock.return_value = 600
+            self.assertTrue(schedule.is_poll_due(title))
+        # 6 changes per hour
+        schedule.record_poll("busy shop", 1)
+        self.assertEqual(schedule.get_interval("busy shop"), 600)
+        # Halving the rate doubles the interval
+        time_mock.return_value = 1200
+        schedule.record_poll("busy shop", 0)
+        self.assertEqual(schedule.get_interval("busy shop"), 1200)
+        self.assertFalse(schedule.is_poll_due("busy shop"))
+        time_mock.return_value = 2400
+        self.assertTrue(schedule.is_poll_due("busy shop"))
+        schedule.record_poll("quiet shop", 0)
+        self.assertEqual(schedule.get_interval("quiet shop"), 86400)
+        self.assertEqual(self._create_schedule().get_interval("busy shop"), 1200)
+        self.assertFalse(self._create_schedule().is_poll_due("quiet shop"))
+
+    def test_invalid_file_error(self):
+        os.makedirs(self.STORAGE_PATH)
+        with open(self.file_path, "w") as f:
+            f.write("{")
+        with self.assertRaises(InvalidScheduleFileError):
+            self._create_schedule()
@@ -1,21 +1,151 @@
+import os
+from typing import Callable, Dict
 from unittest import TestCase, mock
-from rolba.record import Record, RecordsCollection
+from scrapy.http import HtmlResponse
+from scrapy.spidermiddlewares.httperror import HttpError
+from twisted.internet import defer
+from twisted.python.failure import Failure
+from rolba import shops
+from rolba.record import VinylRecord, RecordsCollection
+from rolba.diff import RecordsChangeSet, VinylRecordsCollectionsDiffer
+from rolba.extraction import RecordsExtractor, ShopRecordsExtractor
+from rolba.metrics import ExtractionMetrics
+from rolba.matching import InvertedRecordsMatchingIndex
+from rolba.repository import CachedRecordsRepository
 from rolba.worker import WebSpiderExtractionsProcessor
 
 
-class TestRecord(Record):
+class TestRecordsExtractor(RecordsExtractor):
+    """
+    Extracts the given records once scheduled, in the process running the crawl.
+    """
 
-    def __init__(self, name: str):
-        self.name = name
+    def __init__(
+            self,
+            extracted_records: [VinylRecord],
+            crashes: bool = False,
+            is_incomplete: bool = False,
+            is_interrupted: bool = False
+    ):
+        """
+        :param is_incomplete: the extraction times out
+        :param is_interrupted: the extraction is stopped by the shutdown
+        """
+        self.extracted_records = extracted_records
+        self.crashes = crashes
+        self.is_incomplete = is_incomplete
+        self.is_interrupted = is_interrupted
+        self.records = RecordsCollection()
+        self.finished_callbacks = []
+        self.is_scheduled = False
+        self.metrics = ExtractionMetrics()
 
-    def __eq__(self, other: "TestRecord") -> bool:
-        return self.name == other.name
+    def schedule_extraction(self):
+        self.is_scheduled = True
+        self.finished_callbacks = []
+        for record in self.extracted_records:
+            self.records.add_record(record)
+        self.metrics.items_count = len(self.extracted_records)
+        self.metrics.is_incomplete = self.is_incomplete or self.is_interrupted
+        self.metrics.is_timed_out = self.is_incomplete
 
-    def __str__(self) -> str:
-        return "Test Record"
+    def start(self):
+        if not self.is_scheduled:
+            return
+        if self.crashes:
+            os._exit(3)
+        for callback in self.finished_callbacks:
+            callback()
 
-    def get_name(self) -> str:
-        return self.name
+    def get_records(self) -> RecordsCollection:
+        return self.records
+
+    def set_known_records(self, records):
+        pass
+
+    def add_finished_callback(self, callback: Callable[[], None]):
+        self.finished_callbacks.append(callback)
+
+    def is_complete(self) -> bool:
+        return not self.metrics.is_incomplete
+
+    def is_failed(self) -> bool:
+        return self.metrics.is_timed_out
+
+    def get_metrics(self) -> ExtractionMetrics:
+        return self.metrics
+
+    def release_records(self):
+        self.records = RecordsCollection()
+
+
+class TestCrawlerProcess:
+    """
+    Crawls the pages of the given bodies once started, the requests of the other pages fail with the HTTP 500.
+    """
+
+    def __init__(self, pages_bodies: Dict[str, bytes]):
+        self.pages_bodies = pages_bodies
+        self.crawls = []
+
+    def create_crawler(self, spider_class):
+        crawler = mock.Mock(spidercls=spider_class)
+        crawler.stats.get_stats.return_value = {"finish_reason": "finished"}
+        return crawler
+
+    def crawl(self, crawler, args: dict) -> defer.Deferred:
+        crawl_deferred = defer.Deferred()
+        self.crawls.append((crawler.spidercls(args=args), crawl_deferred))
+        return crawl_deferred
+
+    def start(self):
+        for spider, crawl_deferred in self.crawls:
+            requests = list(spider.start_requests())
+            while requests:
+                request = requests.pop(0)
+                if request.url in self.pages_bodies:
+                    response = HtmlResponse(
+                        url=request.url,
+                        body=self.pages_bodies[request.url],
+                        encoding="utf-8",
+                        request=request
+                    )
+                    requests.extend(spider.parse(response))
+                else:
+                    failure = Failure(HttpError(HtmlResponse(url=request.url, status=500, request=request)))
+                    failure.request = request
+                    request.errback(failure)
+            spider.closed("finished")
+            crawl_deferred.callback(None)
+        self.crawls = []
+
+    def join(self) -> defer.Deferred:
+        self.start()
+        return defer.succeed(None)
+
+
+FIXTURES_DIR_PATH = os.path.dirname(os.path.abspath(__file__)) + "/fixtures/extraction"
+
+VINYL_EMPIRE_SECOND_PAGE_BODY = """
+    <div class="product-container">
+        <a class="product-name" href="https://vinylempire.cz/bazarove-vinyly/1003-beatles-abbey-road.html">
+            Beatles - Abbey Road
+        </a>
+        <span class="product-price">990,00 Kč</span>
+    </div>
+"""
+
+
+def create_vinyl_empire_crawler_process() -> TestCrawlerProcess:
+    """
+    :return: crawler process of the Vinyl Empire listing of three records on two pages
+    """
+    first_page_url = shops.VINYL_EMPIRE.start_urls[0]
+    with open(FIXTURES_DIR_PATH + "/vinyl_empire.html", "rb") as f:
+        return TestCrawlerProcess({
+            first_page_url: f.read(),
+            first_page_url + "&p=2": VINYL_EMPIRE_SECOND_PAGE_BODY.encode()
+        })
 
 
 class WebSpiderExtractionsProcessorTest(TestCase):
@@ -25,31 +155,470 @@ class WebSpiderExtractionsProcessorTest(TestCase):
         notifier_mock = mock.Mock()
         extractor_mock = mock.Mock()
         repository_mock = mock.Mock()
+        differ = VinylRecordsCollectionsDiffer()
 
         collection1 = RecordsCollection().add_record(
-            TestRecord("test_record_1")
+            VinylRecord("test_record_1", 1, "l1")
         ).add_record(
-            TestRecord("test_record_2")
+            VinylRecord("test_record_2", 2, "l2")
         )
         collection2 = RecordsCollection().add_record(
-            TestRecord("test_record_2")
+            VinylRecord("test_record_2", 2, "l2")
         ).add_record(
-            TestRecord("test_record_3")
+            VinylRecord("test_record_3", 3, "l3")
         )
 
         extractor_mock.get_records.return_value = collection1
-        repository_mock.load_records.return_value = collection2
+        repository_mock.get_changeset.side_effect = \
+            lambda records, records_differ: records_differ.get_changeset(records, collection2)
 
-        self.assertIsNone(WebSpiderExtractionsProcessor(
+        extractions_metrics = WebSpiderExtractionsProcessor(
             crawler_process=crawler_process_mock,
-            records_collections_notifier=notifier_mock
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=differ
         ).register_extraction(
             title="test",
             extractor=extractor_mock,
             repository=repository_mock
-        ).run())
+        ).run()
 
+        self.assertEqual(extractions_metrics, {"test": extractor_mock.get_metrics.return_value})
         crawler_process_mock.start.assert_called_once()
+        repository_mock.save_records.assert_called_once_with(collection1)
         notifier_mock.send_notification.assert_called_with(
-            [("test", collection1 - collection2)]
+            [("test", differ.get_changeset(collection1, collection2))]
+        )
+
+    def test_incremental_run(self):
+        notifier_mock = mock.Mock()
+        extractor_mock = mock.Mock()
+        repository_mock = mock.Mock()
+        full_crawl_schedule_mock = mock.Mock()
+        differ = VinylRecordsCollectionsDiffer()
+
+        saved_records = RecordsCollection().add_record(
+            VinylRecord("test_record_2", 2, "l2")
+        ).add_record(
+            VinylRecord("test_record_3", 3, "l3")
+        )
+        new_records = RecordsCollection().add_record(
+            VinylRecord("test_record_1", 1, "l1")
+        ).add_record(
+            VinylRecord("test_record_2", 1, "l2")
+        )
+        merged_records = RecordsCollection().add_record(
+            VinylRecord("test_record_1", 1, "l1")
+        ).add_record(
+            VinylRecord("test_record_2", 1, "l2")
+        ).add_record(
+            VinylRecord("test_record_3", 3, "l3")
+        )
+
+        extractor_mock.get_records.return_value = new_records
+        repository_mock.load_records.return_value = saved_records
+        repository_mock.get_changeset.side_effect = \
+            lambda records, records_differ: records_differ.get_changeset(records, saved_records)
+        full_crawl_schedule_mock.is_full_crawl_due.return_value = False
+
+        WebSpiderExtractionsProcessor(
+            crawler_process=mock.Mock(),
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=differ,
+            full_crawl_schedule=full_crawl_schedule_mock
+        ).register_extraction(
+            title="test",
+            extractor=extractor_mock,
+            repository=repository_mock
+        ).run()
+
+        extractor_mock.set_known_records.assert_called_once_with(saved_records)
+        repository_mock.save_records.assert_called_once_with(merged_records)
+        full_crawl_schedule_mock.mark_full_crawl_done.assert_not_called()
+        changeset = notifier_mock.send_notification.call_args[0][0][0][1]
+        self.assertEqual(changeset.get_added().get_records(), [VinylRecord("test_record_1", 1, "l1")])
+        self.assertEqual(len(changeset.get_price_decreased()), 1)
+        self.assertEqual(len(changeset.get_removed()), 0)
+
+    def test_extractions_finished_while_crawling(self):
+        crawler_process_mock = mock.Mock()
+        notifier_mock = mock.Mock()
+        differ = VinylRecordsCollectionsDiffer()
+        finished_callbacks = []
+        extractions = []
+        for i in range(2):
+            extractor_mock = mock.Mock()
+            extractor_mock.get_records.return_value = RecordsCollection().add_record(
+                VinylRecord(f"test_record_{i}", i, f"l{i}")
+            )
+            extractor_mock.add_finished_callback.side_effect = finished_callbacks.append
+            repository_mock = mock.Mock()
+            repository_mock.get_changeset.side_effect = \
+                lambda records, records_differ: records_differ.get_changeset(records, RecordsCollection())
+            extractions.append((f"test_{i}", extractor_mock, repository_mock))
+
+        def start():
+            # The second spider closes first
+            finished_callbacks[1]()
+            extractions[1][2].save_records.assert_called_once()
+            extractions[0][2].save_records.assert_not_called()
+            finished_callbacks[0]()
+        crawler_process_mock.start.side_effect = start
+
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_process_mock,
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=differ
+        )
+        for (title, extractor_mock, repository_mock) in extractions:
+            processor.register_extraction(title, extractor_mock, repository_mock)
+        metrics_writer_mock = mock.Mock()
+        processor.metrics_writer = metrics_writer_mock
+        extractions_metrics = processor.run()
+
+        metrics_writer_mock.write.assert_called_once_with(extractions_metrics)
+        self.assertEqual(list(extractions_metrics), ["test_0", "test_1"])
+        for (_, extractor_mock, repository_mock) in extractions:
+            repository_mock.save_records.assert_called_once()
+            extractor_mock.release_records.assert_called_once()
+        self.assertEqual(
+            [title for (title, _) in notifier_mock.send_notification.call_args[0][0]],
+            ["test_0", "test_1"]
+        )
+
+    def test_finished_extraction_error(self):
+        extractor_mock = mock.Mock()
+        repository_mock = mock.Mock()
+        repository_mock.get_changeset.side_effect = ValueError
+        crawler_process_mock = mock.Mock()
+        crawler_process_mock.start.side_effect = \
+            lambda: extractor_mock.add_finished_callback.call_args[0][0]()
+        notifier_mock = mock.Mock()
+
+        with self.assertRaises(ValueError):
+            WebSpiderExtractionsProcessor(
+                crawler_process=crawler_process_mock,
+                records_collections_notifier=notifier_mock,
+                records_collections_differ=VinylRecordsCollectionsDiffer()
+            ).register_extraction(
+                title="test",
+                extractor=extractor_mock,
+                repository=repository_mock
+            ).run()
+        notifier_mock.send_notification.assert_not_called()
+
+    def test_run_in_processes(self):
+        extractors = [
+            TestRecordsExtractor([VinylRecord(f"test_record_{i}", i, f"l{i}") for i in range(2500)]),
+            TestRecordsExtractor([VinylRecord("test_record", 1, "l1")], crashes=True),
+            TestRecordsExtractor([]),
+            TestRecordsExtractor([VinylRecord("test_record", 1, "l1")], is_incomplete=True)
+        ]
+        crawler_process_mock = mock.Mock()
+        crawler_process_mock.start.side_effect = lambda: [extractor.start() for extractor in extractors]
+        notifier_mock = mock.Mock()
+        logger_mock = mock.Mock()
+        repositories_mocks = [mock.Mock() for _ in extractors]
+        for repository_mock in repositories_mocks:
+            repository_mock.get_changeset.side_effect = \
+                lambda records, records_differ: records_differ.get_changeset(records, RecordsCollection())
+
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_process_mock,
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=VinylRecordsCollectionsDiffer(),
+            processes_count=3,
+            logger=logger_mock
+        )
+        for i, (extractor, repository_mock) in enumerate(zip(extractors, repositories_mocks)):
+            processor.register_extraction(f"test_{i}", extractor, repository_mock)
+        extractions_metrics = processor.run()
+
+        self.assertEqual(extractions_metrics["test_0"].items_count, 2500)
+        self.assertFalse(extractions_metrics["test_0"].is_crashed)
+        self.assertTrue(extractions_metrics["test_1"].is_crashed)
+        self.assertFalse(extractions_metrics["test_3"].is_crashed)
+        self.assertTrue(extractions_metrics["test_3"].is_incomplete)
+        saved_records = repositories_mocks[0].save_records.call_args[0][0]
+        self.assertEqual(saved_records.get_records(), extractors[0].extracted_records)
+        repositories_mocks[1].save_records.assert_not_called()
+        repositories_mocks[2].save_records.assert_called_once_with(RecordsCollection())
+        repositories_mocks[3].save_records.assert_not_called()
+        self.assertEqual(
+            sorted(call[0][0] for call in logger_mock.error.call_args_list),
+            ["Extraction test_1 has crashed (exit code 3)", "Extraction test_3 is incomplete, its records aren't saved"]
+        )
+        records_changesets = notifier_mock.send_notification.call_args[0][0]
+        self.assertEqual([title for (title, _) in records_changesets], ["test_0", "test_2"])
+        self.assertEqual(len(records_changesets[0][1].get_added()), 2500)
+
+    def test_circuit_breaker(self):
+        extractors = [
+            TestRecordsExtractor([VinylRecord("test_record_1", 1, "l1")]),
+            TestRecordsExtractor([VinylRecord("test_record_2", 2, "l2")], is_incomplete=True),
+            TestRecordsExtractor([VinylRecord("test_record_3", 3, "l3")]),
+            TestRecordsExtractor([VinylRecord("test_record_4", 4, "l4")], is_interrupted=True)
+        ]
+        crawler_process_mock = mock.Mock()
+        crawler_process_mock.start.side_effect = lambda: [extractor.start() for extractor in extractors]
+        notifier_mock = mock.Mock()
+        logger_mock = mock.Mock()
+        circuit_breaker_mock = mock.Mock()
+        circuit_breaker_mock.is_open.side_effect = lambda title: title == "test_2"
+        repositories_mocks = [mock.Mock() for _ in extractors]
+        for repository_mock in repositories_mocks:
+            repository_mock.get_changeset.side_effect = \
+                lambda records, records_differ: records_differ.get_changeset(records, RecordsCollection())
+
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_process_mock,
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=VinylRecordsCollectionsDiffer(),
+            logger=logger_mock,
+            circuit_breaker=circuit_breaker_mock
+        )
+        for i, (extractor, repository_mock) in enumerate(zip(extractors, repositories_mocks)):
+            processor.register_extraction(f"test_{i}", extractor, repository_mock)
+        extractions_metrics = processor.run()
+
+        self.assertFalse(extractors[2].is_scheduled)
+        self.assertTrue(extractions_metrics["test_2"].is_skipped)
+        repositories_mocks[0].save_records.assert_called_once()
+        repositories_mocks[1].save_records.assert_not_called()
+        repositories_mocks[2].save_records.assert_not_called()
+        circuit_breaker_mock.record_success.assert_called_once_with("test_0")
+        repositories_mocks[3].save_records.assert_not_called()
+        circuit_breaker_mock.record_failure.assert_called_once_with("test_1")
+        logger_mock.info.assert_called_once_with("Extraction test_3 is interrupted, its records aren't saved")
+        self.assertEqual([title for (title, _) in notifier_mock.send_notification.call_args[0][0]], ["test_0"])
+
+    def test_run_in_reactor(self):
+        extractor = TestRecordsExtractor([VinylRecord("test_record", 1, "l1")])
+        crawler_runner_mock = mock.Mock()
+        crawler_runner_mock.join.side_effect = lambda: extractor.start() or defer.succeed(None)
+        notifier_mock = mock.Mock()
+        repository_mock = mock.Mock()
+        repository_mock.get_changeset.side_effect = \
+            lambda records, records_differ: records_differ.get_changeset(records, RecordsCollection())
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_runner_mock,
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=VinylRecordsCollectionsDiffer()
+        ).register_extraction("test", extractor, repository_mock)
+
+        for _ in range(2):
+            extractions_metrics = []
+            processor.run_in_reactor().addCallback(extractions_metrics.append)
+            self.assertEqual(extractions_metrics[0]["test"].items_count, 1)
+        crawler_runner_mock.start.assert_not_called()
+        self.assertEqual(repository_mock.save_records.call_count, 2)
+        self.assertEqual(notifier_mock.send_notification.call_count, 2)
+
+    def test_polling_schedule(self):
+        extractors = [
+            TestRecordsExtractor([VinylRecord("test_record_1", 1, "l1"), VinylRecord("test_record_2", 2, "l2")]),
+            TestRecordsExtractor([VinylRecord("test_record_3", 3, "l3")])
+        ]
+        crawler_process_mock = mock.Mock()
+        crawler_process_mock.start.side_effect = lambda: [extractor.start() for extractor in extractors]
+        polling_schedule_mock = mock.Mock()
+        polling_schedule_mock.is_poll_due.side_effect = lambda title: title == "test_0"
+        repositories_mocks = [mock.Mock() for _ in extractors]
+        for repository_mock in repositories_mocks:
+            repository_mock.get_changeset.side_effect = \
+                lambda records, records_differ: records_differ.get_changeset(records, RecordsCollection())
+
+        notifier_mock = mock.Mock()
+        metrics_writer_mock = mock.Mock()
+
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_process_mock,
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=VinylRecordsCollectionsDiffer(),
+            metrics_writer=metrics_writer_mock,
+            polling_schedule=polling_schedule_mock
+        )
+        for i, (extractor, repository_mock) in enumerate(zip(extractors, repositories_mocks)):
+            processor.register_extraction(f"test_{i}", extractor, repository_mock)
+        extractions_metrics = processor.run()
+
+        self.assertFalse(extractors[1].is_scheduled)
+        repositories_mocks[1].save_records.assert_not_called()
+        polling_schedule_mock.record_poll.assert_called_once_with("test_0", 2)
+        self.assertEqual(list(extractions_metrics), ["test_0"])
+        metrics_writer_mock.write.assert_called_once_with(extractions_metrics)
+
+        notifier_mock.send_notification.assert_called_once()
+        polling_schedule_mock.is_poll_due.side_effect = lambda title: False
+        self.assertEqual(processor.run(), {})
+        notifier_mock.send_notification.assert_called_once()
+
+    def test_pipelined_io(self):
+        extractors = [
+            TestRecordsExtractor([VinylRecord("test_record_1", 1, "l1"), VinylRecord("test_record_2", 2, "l2")]),
+            TestRecordsExtractor([VinylRecord("test_record_3", 3, "l3")]),
+            TestRecordsExtractor([VinylRecord("test_record_4", 4, "l4")], is_incomplete=True)
+        ]
+        repositories_mocks = [mock.Mock() for _ in extractors]
+        for repository_mock in repositories_mocks:
+            repository_mock.load_records.return_value = RecordsCollection().add_record(
+                VinylRecord("test_record_1", 1, "l1")
+            )
+            repository_mock.is_changeset_in_storage.return_value = False
+        # The repository diffing in its storage isn't preloaded
+        in_storage_repository_mock = mock.Mock()
+        in_storage_repository_mock.is_changeset_in_storage.return_value = True
+        in_storage_repository_mock.get_changeset.return_value = RecordsChangeSet()
+        extractors.append(TestRecordsExtractor([VinylRecord("test_record_5", 5, "l5")]))
+
+        def start():
+            # The saved records are loaded before the crawl ends
+            for repository_mock in repositories_mocks:
+                repository_mock.load_records.assert_called_once()
+            for extractor in extractors:
+                extractor.start()
+        crawler_process_mock = mock.Mock()
+        crawler_process_mock.start.side_effect = start
+        notifier_mock = mock.Mock()
+
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_process_mock,
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=VinylRecordsCollectionsDiffer(),
+            io_threads_count=2
+        )
+        for i, (extractor, repository_mock) in enumerate(zip(extractors, repositories_mocks)):
+            processor.register_extraction(f"test_{i}", extractor, repository_mock)
+        processor.register_extraction("test_3", extractors[3], in_storage_repository_mock)
+        processor.run()
+
+        for repository_mock in repositories_mocks:
+            repository_mock.get_changeset.assert_not_called()
+        repositories_mocks[0].save_records.assert_called_once()
+        repositories_mocks[1].save_records.assert_called_once()
+        repositories_mocks[2].save_records.assert_not_called()
+        in_storage_repository_mock.load_records.assert_not_called()
+        in_storage_repository_mock.get_changeset.assert_called_once()
+        in_storage_repository_mock.save_records.assert_called_once()
+        (notified_changesets,), _ = notifier_mock.send_notification.call_args
+        self.assertEqual([title for title, _ in notified_changesets], ["test_0", "test_1", "test_3"])
+        self.assertEqual(len(notified_changesets[0][1]), 1)
+        self.assertEqual(len(notified_changesets[1][1]), 2)
+
+    def test_records_matching_index(self):
+        extractors = [
+            TestRecordsExtractor([VinylRecord("Kryštof - Ostrov", 600, "l1")]),
+            TestRecordsExtractor([VinylRecord("Kryštof - Ostrov", 500, "l2")])
+        ]
+        crawler_process_mock = mock.Mock()
+        crawler_process_mock.start.side_effect = lambda: [extractor.start() for extractor in extractors]
+        polling_schedule_mock = mock.Mock()
+        polling_schedule_mock.is_poll_due.side_effect = lambda title: title == "test_0"
+        repositories = [
+            CachedRecordsRepository(mock.Mock(**{"load_records.return_value": saved_records}))
+            for saved_records in [
+                RecordsCollection(),
+                RecordsCollection().add_record(VinylRecord("KRYSTOF: Ostrov", 450, "l3"))
+            ]
+        ]
+        records_matching_index = InvertedRecordsMatchingIndex()
+
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_process_mock,
+            records_collections_notifier=mock.Mock(),
+            records_collections_differ=VinylRecordsCollectionsDiffer(),
+            polling_schedule=polling_schedule_mock,
+            records_matching_index=records_matching_index
+        )
+        for i, (extractor, repository) in enumerate(zip(extractors, repositories)):
+            processor.register_extraction(f"test_{i}", extractor, repository)
+        with mock.patch.object(records_matching_index, "set_records", wraps=records_matching_index.set_records) \
+                as set_records_mock:
+            processor.run()
+            self.assertEqual(set_records_mock.call_count, 2)
+            # No new records to match, so nothing is indexed
+            processor.run()
+            self.assertEqual(set_records_mock.call_count, 2)
+
+        self.assertEqual(
+            records_matching_index.get_cheapest_match(VinylRecord("Kryštof Ostrov", 700, "l4")),
+            ("test_1", VinylRecord("KRYSTOF: Ostrov", 450, "l3"))
+        )
+        self.assertEqual(
+            records_matching_index.get_cheapest_match(VinylRecord("Kryštof Ostrov", 700, "l4"), "test_1"),
+            ("test_0", VinylRecord("Kryštof - Ostrov", 600, "l1"))
+        )
+        self.assertEqual(processor.outdated_indexed_titles, {"test_0"})
+
+    def test_failed_page(self):
+        first_page_url = shops.VINYL_EMPIRE.start_urls[0]
+        with open(FIXTURES_DIR_PATH + "/vinyl_empire.html", "rb") as f:
+            # The first page links the second one, whose request fails, so the third one is never reached
+            crawler_process = TestCrawlerProcess({first_page_url: f.read()})
+        notifier_mock = mock.Mock()
+        logger_mock = mock.Mock()
+        circuit_breaker_mock = mock.Mock()
+        circuit_breaker_mock.is_open.return_value = False
+        repository_mock = mock.Mock()
+
+        extractions_metrics = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_process,
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=VinylRecordsCollectionsDiffer(),
+            logger=logger_mock,
+            circuit_breaker=circuit_breaker_mock
+        ).register_extraction(
+            "test",
+            ShopRecordsExtractor(crawler_process, shops.VINYL_EMPIRE),
+            repository_mock
+        ).run()
+
+        self.assertEqual(extractions_metrics["test"].items_count, 2)
+        self.assertEqual(extractions_metrics["test"].failed_pages_count, 1)
+        repository_mock.save_records.assert_not_called()
+        circuit_breaker_mock.record_failure.assert_called_once_with("test")
+        logger_mock.error.assert_called_once_with("Extraction test is incomplete, its records aren't saved")
+        notifier_mock.send_notification.assert_not_called()
+
+    def test_full_run_after_incremental_run_in_reactor(self):
+        crawler_runner = create_vinyl_empire_crawler_process()
+        full_crawl_schedule_mock = mock.Mock()
+        full_crawl_schedule_mock.is_full_crawl_due.side_effect = [False, True]
+        notifier_mock = mock.Mock()
+        repository_mock = mock.Mock()
+        links_prefix = "https://vinylempire.cz/bazarove-vinyly/"
+        saved_records = RecordsCollection().add_record(
+            VinylRecord("Pink Floyd - Animals", 450, links_prefix + "1001-pink-floyd-animals.html")
+        ).add_record(
+            VinylRecord("Olympic - Želva", 1290.5, links_prefix + "1002-olympic-zelva.html")
+        ).add_record(
+            VinylRecord("Beatles - Abbey Road", 990, links_prefix + "1003-beatles-abbey-road.html")
+        )
+        repository_mock.load_records.return_value = saved_records
+        repository_mock.get_changeset.side_effect = \
+            lambda records, records_differ: records_differ.get_changeset(records, saved_records)
+        processor = WebSpiderExtractionsProcessor(
+            crawler_process=crawler_runner,
+            records_collections_notifier=notifier_mock,
+            records_collections_differ=VinylRecordsCollectionsDiffer(),
+            full_crawl_schedule=full_crawl_schedule_mock
+        ).register_extraction(
+            "test",
+            ShopRecordsExtractor(crawler_runner, shops.VINYL_EMPIRE, known_pages_limit=1),
+            repository_mock
+        )
+
+        extractions_metrics = []
+        for _ in range(2):
+            processor.run_in_reactor().addCallback(extractions_metrics.append)
+
+        # The incremental run stops at the known first page, the full one reads both pages
+        self.assertEqual([metrics["test"].items_count for metrics in extractions_metrics], [2, 3])
+        self.assertEqual(
+            [call[0][0].get_records() for call in repository_mock.save_records.call_args_list],
+            [saved_records.get_records(), saved_records.get_records()]
         )
+        # Nothing is reported as removed after the incremental run either
+        for call in notifier_mock.send_notification.call_args_list:
+            [(_, changeset)] = call[0][0]
+            self.assertEqual(len(changeset), 0)
+        full_crawl_schedule_mock.mark_full_crawl_done.assert_called_once_with("test")